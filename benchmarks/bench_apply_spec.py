@@ -0,0 +1,111 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Measures re-applying a large scene spec after one edited wall,
+# only the edited room may be rebuilt.
+# Run: blender --background --python benchmarks/bench_apply_spec.py
+#      -- [--count 20000]
+# ----------------------------------------------------------
+import argparse
+import importlib
+import sys
+import time
+from os import path
+
+import bpy
+
+
+# --------------------------------------------------------------------
+# Imports addon package from the repository source folder
+# --------------------------------------------------------------------
+def import_addon():
+    repo_dir = path.dirname(path.dirname(path.realpath(__file__)))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    return importlib.import_module("src")
+
+
+# --------------------------------------------------------------------
+# Reads arguments given after "--"
+# --------------------------------------------------------------------
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="ArchLab scene spec benchmark")
+    parser.add_argument("--count", type=int, default=20000)
+    return parser.parse_args(argv)
+
+
+# --------------------------------------------------------------------
+# Creates scene spec of rooms and plates on a grid
+# --------------------------------------------------------------------
+def create_spec(count):
+    objects = []
+    for t in range(count):
+        location = [(t % 100) * 10.0, (t // 100) * 10.0, 0.0]
+        if t % 2:
+            objects.append({"id": "plate-%i" % t, "type": "plate", "location": location,
+                            "params": {"plate_diameter": 0.2 + (t % 5) * 0.02}})
+        else:
+            objects.append({"id": "room-%i" % t, "type": "room", "location": location,
+                            "params": {"room_wall_count": 4, "room_walls": [
+                                {"wall_width": 8.0}, {"wall_width": 6.0, "wall_angle": 1.5708},
+                                {"wall_width": 8.0, "wall_angle": 1.5708}, {"wall_width": 6.0, "wall_angle": 1.5708}]}})
+    return {"collection": "Spec", "objects": objects}
+
+
+def main():
+    args = parse_args()
+    archlab = import_addon()
+    build = archlab.archlab_utils_build
+    bpy.ops.wm.read_homefile(use_empty=True)
+
+    spec = create_spec(args.count)
+    start = time.perf_counter()
+    build.apply_spec(spec)
+    first = time.perf_counter() - start
+
+    # one wall of the first room is edited
+    spec["objects"][0] = dict(spec["objects"][0], params=dict(spec["objects"][0]["params"]))
+    spec["objects"][0]["params"]["room_walls"] = [{"wall_width": 9.0}] + spec["objects"][0]["params"]["room_walls"][1:]
+    timings = {}
+    start = time.perf_counter()
+    stats = build.apply_spec(spec, timings)
+    again = time.perf_counter() - start
+
+    print("objects,first_apply_ms,reapply_ms,diff_ms,changed,unchanged")
+    print("%i,%.3f,%.3f,%.3f,%i,%i" % (args.count, first * 1000.0, again * 1000.0,
+                                       timings['diff'] * 1000.0, stats['changed'], stats['unchanged']))
+    if stats['changed'] != 1 or stats['added'] or stats['removed']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Micro benchmarks of the core mesh generators with scaling sweeps,
+# runs without Blender. Every case records the generator time, the
+# full build time (weld and normals), the peak memory of the build and
+# the output sizes.
+# Run: python benchmarks/bench_generators.py [--quick] [--output FILE]
+#      [--baseline FILE] [--threshold 0.25] [--case PREFIX ...]
+# Exits with 1 when a case is slower (or needs more memory) than the
+# baseline by more than the threshold.
+# ----------------------------------------------------------
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from os import path
+
+# Time below which cases are not compared (timer noise), in seconds
+compare_min_seconds = 0.002
+
+# Cases slower than this are measured once
+repeat_max_seconds = 1.0
+
+
+# --------------------------------------------------------------------
+# Imports geometry core from the repository source folder
+# --------------------------------------------------------------------
+def import_core():
+    src_dir = path.join(path.dirname(path.dirname(path.realpath(__file__))), "src")
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    import archlab_core
+    return archlab_core
+
+
+# --------------------------------------------------------------------
+# Reads arguments
+# --------------------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="ArchLab generator benchmarks")
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, the best is kept")
+    parser.add_argument("--output", default=None, help="JSON file receiving the results")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--case", nargs="*", default=None, help="run only cases starting with these names")
+    return parser.parse_args()
+
+
+# --------------------------------------------------------------------
+# Gets benchmark cases, name: core mesh builder task
+# --------------------------------------------------------------------
+def get_cases(quick=False):
+    cases = {}
+    for vertices in (8, 64, 512, 4096) + (() if quick else (32768, 100000)):
+        for fill_type in ('NONE', 'NGON', 'TRIF'):
+            cases["circle_%s_%i" % (fill_type.lower(), vertices)] = ('circle', 1.0, vertices, fill_type, 0.0)
+    for (segments, rings) in ((32, 16), (128, 64), (256, 128)) + (() if quick else ((512, 256), (1024, 512))):
+        cases["sphere_uv_%ix%i" % (segments, rings)] = ('sphere', 1.0, 'UV', segments, rings, 1)
+    for level in range(1, 6 if quick else 8):
+        cases["sphere_ico_%i" % level] = ('sphere', 1.0, 'ICO', 32, 16, level)
+    for segments in (16, 64, 256) + (() if quick else (1024, 4096)):
+        cases["sord_glass_%i" % segments] = ('glass', 0.08, 0.15, segments)
+        cases["sord_cup_%i" % segments] = ('plate', 0.08, 0.1, segments, 'Cup01')
+    for walls in (1, 10, 100) + (() if quick else (1000,)):
+        cases["room_%i" % walls] = ('room', 2.5, tuple((2.0, 0.1, 0.0 if t == 0 else 0.1) for t in range(walls)), True, True)
+    for units in (1, 10, 100) + (() if quick else (1000,)):
+        cases["stairs_%i" % units] = ('stairs', 1.0, units, 0.3, 0.17)
+    return cases
+
+
+# --------------------------------------------------------------------
+# Gets best time of the function in seconds
+# --------------------------------------------------------------------
+def measure_time(function, args, repeat):
+    best = None
+    for t in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        if elapsed > repeat_max_seconds:
+            break
+    return best
+
+
+# --------------------------------------------------------------------
+# Runs one case, returns dict of the measured values
+# --------------------------------------------------------------------
+def run_case(archlab_core, task, repeat):
+    generate = archlab_core.mesh_generators[task[0]]
+    result = {
+        'generate_s': measure_time(generate, task[1:], repeat),
+        'build_s': measure_time(archlab_core.build_packed_mesh_data, task, repeat),
+    }
+    tracemalloc.start()
+    (coords, edges, loop_totals, loop_indices) = archlab_core.build_packed_mesh_data(*task)
+    result['peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024.0
+    tracemalloc.stop()
+    result['vertices'] = len(coords)
+    result['edges'] = len(edges)
+    result['faces'] = len(loop_totals)
+    result['loops'] = len(loop_indices)
+    return result
+
+
+# --------------------------------------------------------------------
+# Compares results with the baseline, returns list of regressions
+# --------------------------------------------------------------------
+def compare_results(results, baseline, threshold):
+    regressions = []
+    for (name, result) in results['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            continue
+        for key in ('generate_s', 'build_s', 'peak_kb'):
+            if key.endswith('_s') and base[key] < compare_min_seconds:
+                continue
+            ratio = result[key] / base[key] if base[key] else 1.0
+            if ratio > 1.0 + threshold:
+                regressions.append((name, key, base[key], result[key], ratio))
+        for key in ('vertices', 'faces'):
+            if result[key] != base[key]:
+                regressions.append((name, key, base[key], result[key], 0.0))
+    return regressions
+
+
+def main():
+    args = parse_args()
+    archlab_core = import_core()
+    cases = get_cases(args.quick)
+    if args.case:
+        cases = {name: task for (name, task) in cases.items()
+                 if any(name.startswith(prefix) for prefix in args.case)}
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cases': {},
+    }
+    print("case,vertices,faces,generate_ms,build_ms,peak_kb")
+    for (name, task) in cases.items():
+        result = run_case(archlab_core, task, args.repeat)
+        results['cases'][name] = result
+        print("%s,%i,%i,%.3f,%.3f,%.1f" % (name, result['vertices'], result['faces'],
+                                            result['generate_s'] * 1000.0, result['build_s'] * 1000.0,
+                                            result['peak_kb']))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        for (name, key, base, value, ratio) in regressions:
+            print("REGRESSION: %s %s %.6g -> %.6g (x%.2f)" % (name, key, base, value, ratio), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
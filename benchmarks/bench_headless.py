@@ -0,0 +1,106 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+# ----------------------------------------------------------
+# Measures parameter writes on many objects from a script,
+# selection and active object must stay untouched.
+# Run: blender --background --python benchmarks/bench_headless.py
+#      -- [--count 10000]
+# ----------------------------------------------------------
+import argparse
+import importlib
+import sys
+import time
+from os import path
+
+import bpy
+
+
+# --------------------------------------------------------------------
+# Imports addon package from the repository source folder
+# --------------------------------------------------------------------
+def import_addon():
+    repo_dir = path.dirname(path.dirname(path.realpath(__file__)))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    return importlib.import_module("src")
+
+
+# --------------------------------------------------------------------
+# Reads arguments given after "--"
+# --------------------------------------------------------------------
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="ArchLab headless benchmark")
+    parser.add_argument("--count", type=int, default=10000)
+    return parser.parse_args(argv)
+
+
+# --------------------------------------------------------------------
+# Creates generator objects through the data API only
+# --------------------------------------------------------------------
+def create_cubes(collection, count):
+    cubes = []
+    for t in range(count):
+        cubeobject = bpy.data.objects.new("Cube", bpy.data.meshes.new("Cube"))
+        collection.objects.link(cubeobject)
+        cubeobject.ArchLabCubeGenerator.add()
+        cubes.append(cubeobject)
+    return cubes
+
+
+def main():
+    args = parse_args()
+    archlab = import_addon()
+    regeneration = archlab.archlab_utils_regeneration
+    context = bpy.context
+    collection = context.scene.collection
+
+    for o in list(bpy.data.objects):
+        bpy.data.objects.remove(o)
+    cubes = create_cubes(collection, args.count)
+    context.view_layer.objects.active = None
+
+    start = time.perf_counter()
+    with regeneration.suspended_regeneration():
+        for (t, cube) in enumerate(cubes):
+            cube.ArchLabCubeGenerator[0].cube_width = 1.0 + (t % 10) * 0.1
+    elapsed = time.perf_counter() - start
+
+    untouched = context.view_layer.objects.active is None and \
+        len(context.view_layer.objects.selected) == 0
+    rebuilt = sum(1 for cube in cubes if len(cube.data.vertices) > 0)
+    print("objects,rebuilt,total_ms,selection_untouched")
+    print("%i,%i,%.3f,%s" % (args.count, rebuilt, elapsed * 1000.0, untouched))
+    if not untouched or rebuilt != args.count:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
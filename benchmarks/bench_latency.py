@@ -0,0 +1,227 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Measures property change to mesh ready latency of every ArchLab tool
+# at several sizes, split into phases:
+#   write - property write (rebuild is suspended)
+#   regenerate - rebuild of the object (generate, weld, mesh write,
+#                modifier reconcile)
+#   generate - core mesh builder alone, part of regenerate
+#   evaluate - depsgraph update (modifiers, mesh ready for drawing)
+# Every phase is the median of the repeated edits, in seconds.
+# Run: blender --background --python benchmarks/bench_latency.py
+#      -- [--repeat 5] [--output FILE.json] [--csv FILE.csv]
+#      [--baseline FILE.json] [--threshold 0.25] [--case PREFIX ...]
+# Exits with 1 when the regenerate or evaluate phase of a case is
+# slower than the baseline by more than the threshold.
+# ----------------------------------------------------------
+import argparse
+import importlib
+import json
+import statistics
+import sys
+import time
+from os import path
+
+import bpy
+
+# Phases written to the report, in order
+latency_phases = ('write', 'regenerate', 'generate', 'evaluate', 'total')
+
+# Phases compared with the baseline
+compare_phases = ('regenerate', 'evaluate')
+
+# Time below which phases are not compared (timer noise), in seconds
+compare_min_seconds = 0.002
+
+
+# --------------------------------------------------------------------
+# Imports addon package from the repository source folder
+# --------------------------------------------------------------------
+def import_addon():
+    repo_dir = path.dirname(path.dirname(path.realpath(__file__)))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    return importlib.import_module("src")
+
+
+# --------------------------------------------------------------------
+# Reads arguments given after "--"
+# --------------------------------------------------------------------
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="ArchLab tool latency benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="edits per case")
+    parser.add_argument("--output", default=None, help="JSON file receiving the results")
+    parser.add_argument("--csv", default=None, help="CSV file receiving the results")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--case", nargs="*", default=None, help="run only cases starting with these names")
+    return parser.parse_args(argv)
+
+
+# --------------------------------------------------------------------
+# Gets benchmark cases, name: (type, params, edited float parameter)
+# Every edit writes a new value, so no shared mesh is reused
+# --------------------------------------------------------------------
+def get_cases():
+    cases = {}
+    for vertices in (32, 256, 1000):
+        cases["circle_%i" % vertices] = ('circle', {'circle_quality': vertices, 'circle_fill_type': 'TRIF'}, 'circle_radius')
+    for (segments, rings) in ((32, 16), (128, 64), (512, 256)):
+        cases["sphere_uv_%ix%i" % (segments, rings)] = (
+            'sphere', {'sphere_type': 'UV', 'sphere_segments': segments, 'sphere_rings': rings}, 'sphere_radius')
+    for level in (2, 4, 6):
+        cases["sphere_ico_%i" % level] = ('sphere', {'sphere_type': 'ICO', 'sphere_subdivisions': level}, 'sphere_radius')
+    for segments in (16, 128, 1000):
+        cases["glass_%i" % segments] = ('glass', {'glass_segments': segments}, 'glass_diameter')
+        cases["plate_%i" % segments] = ('plate', {'plate_segments': segments}, 'plate_diameter')
+    for walls in (4, 64, 512):
+        cases["room_%i" % walls] = ('room', {'room_wall_count': walls}, 'room_height')
+    for units in (5, 50, 500):
+        cases["stairs_%i" % units] = ('stairs', {'stairs_unit_count': units}, 'stairs_width')
+    cases["wall"] = ('wall', {}, 'wall_width')
+    cases["cube"] = ('cube', {}, 'cube_width')
+    cases["plane"] = ('plane', {}, 'plane_width')
+    cases["bench"] = ('bench', {}, 'bench_width')
+    cases["shelve"] = ('shelve', {}, 'shelve_width')
+    return cases
+
+
+# --------------------------------------------------------------------
+# Runs one case, returns dict of the measured values
+# --------------------------------------------------------------------
+def run_case(archlab, typename, params, propname, repeat):
+    build = archlab.archlab_utils_build
+    regeneration = archlab.archlab_utils_regeneration
+    myobject = build.build_object(typename, params)
+    props = getattr(myobject, build.get_generator_name(typename))[0]
+    view_layer = bpy.context.view_layer
+    view_layer.update()
+
+    samples = {phase: [] for phase in latency_phases}
+    value = getattr(props, propname)
+    for t in range(repeat):
+        value *= 1.01
+        start = time.perf_counter()
+        with regeneration.suspended_regeneration():
+            setattr(props, propname, value)
+            written = time.perf_counter()
+        regenerated = time.perf_counter()
+        view_layer.update()
+        evaluated = time.perf_counter()
+
+        task = build.get_mesh_task(myobject)
+        generate_start = time.perf_counter()
+        archlab.archlab_core.build_packed_mesh_data(*task)
+        samples['generate'].append(time.perf_counter() - generate_start)
+        samples['write'].append(written - start)
+        samples['regenerate'].append(regenerated - written)
+        samples['evaluate'].append(evaluated - regenerated)
+        samples['total'].append(evaluated - start)
+
+    result = {phase: statistics.median(values) for (phase, values) in samples.items()}
+    result['vertices'] = len(myobject.data.vertices)
+    result['faces'] = len(myobject.data.polygons)
+    result['modifiers'] = len(myobject.modifiers)
+    return result
+
+
+# --------------------------------------------------------------------
+# Writes results as CSV, one row per case
+# --------------------------------------------------------------------
+def write_csv(filepath, results):
+    with open(filepath, 'w') as f:
+        f.write("case,vertices,faces,modifiers,%s\n" % ",".join(p + "_ms" for p in latency_phases))
+        for (name, result) in results['cases'].items():
+            f.write("%s,%i,%i,%i,%s\n" % (name, result['vertices'], result['faces'], result['modifiers'],
+                                          ",".join("%.3f" % (result[p] * 1000.0) for p in latency_phases)))
+
+
+# --------------------------------------------------------------------
+# Compares results with the baseline, returns list of regressions
+# --------------------------------------------------------------------
+def compare_results(results, baseline, threshold):
+    regressions = []
+    for (name, result) in results['cases'].items():
+        base = baseline['cases'].get(name)
+        if base is None:
+            continue
+        for phase in compare_phases:
+            if base[phase] < compare_min_seconds:
+                continue
+            ratio = result[phase] / base[phase]
+            if ratio > 1.0 + threshold:
+                regressions.append((name, phase, base[phase], result[phase], ratio))
+    return regressions
+
+
+def main():
+    args = parse_args()
+    archlab = import_addon()
+    bpy.ops.wm.read_homefile(use_empty=True)
+    cases = get_cases()
+    if args.case:
+        cases = {name: case for (name, case) in cases.items()
+                 if any(name.startswith(prefix) for prefix in args.case)}
+
+    results = {
+        'blender': bpy.app.version_string,
+        'cases': {},
+    }
+    print("case,vertices,faces,%s" % ",".join(p + "_ms" for p in latency_phases))
+    for (name, (typename, params, propname)) in cases.items():
+        result = run_case(archlab, typename, params, propname, args.repeat)
+        results['cases'][name] = result
+        print("%s,%i,%i,%s" % (name, result['vertices'], result['faces'],
+                               ",".join("%.3f" % (result[p] * 1000.0) for p in latency_phases)))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if args.csv:
+        write_csv(args.csv, results)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        for (name, phase, base, value, ratio) in regressions:
+            print("REGRESSION: %s %s %.6g -> %.6g (x%.2f, Blender %s -> %s)" % (
+                name, phase, base, value, ratio, baseline.get('blender'), results['blender']), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Memory benchmarks of the core mesh generators and of the mesh library
+# loading, runs without Blender. tracemalloc traces Python objects
+# (tuples and lists of the generated data) and NumPy arrays. Every case
+# records:
+#   generate_peak - peak of the generator alone, per output vertex
+#   build_peak - peak of the full build (weld and normals), per vertex
+#   result - size of the packed mesh data, per vertex
+#   retained - memory left allocated once the result is dropped
+# Budgets below are enforced, the script exits with 1 when a case
+# needs more memory than declared.
+# Run: python benchmarks/bench_memory.py [--quick] [--output FILE]
+#      [--case PREFIX ...]
+# ----------------------------------------------------------
+import argparse
+import gc
+import json
+import platform
+import sys
+import tracemalloc
+from os import path
+
+from bench_generators import import_core, get_cases
+
+# Peak bytes per output vertex of the full build, case name prefix:
+# budget, checked for cases with at least budget_min_vertices vertices
+build_peak_budgets = {
+    'circle_none': 800,
+    'circle_ngon': 550,
+    'circle_trif': 800,
+    'sphere_uv': 550,
+    'sphere_ico': 450,
+    'sord_glass': 1200,
+    'sord_cup': 1200,
+    'room': 600,
+    'stairs': 400,
+}
+
+# Smaller cases are dominated by fixed costs
+budget_min_vertices = 1000
+
+# Bytes left allocated by a build once its result is dropped
+retained_budget = 64 * 1024
+
+# Bytes of the parsed mesh library per byte of the library file
+library_budget = 16
+
+# Extra ico sphere levels, the largest (655k vertices) is measured
+# without --quick only
+ico_levels = (8, 9)
+
+
+# --------------------------------------------------------------------
+# Reads arguments
+# --------------------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="ArchLab memory benchmarks")
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    parser.add_argument("--output", default=None, help="JSON file receiving the results")
+    parser.add_argument("--case", nargs="*", default=None, help="run only cases starting with these names")
+    return parser.parse_args()
+
+
+# --------------------------------------------------------------------
+# Gets peak and current traced memory of the call, with its result
+# --------------------------------------------------------------------
+def trace_call(function, *args):
+    gc.collect()
+    tracemalloc.start()
+    result = function(*args)
+    (current, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, current
+
+
+# --------------------------------------------------------------------
+# Gets memory left allocated by the call once its result is dropped
+# --------------------------------------------------------------------
+def trace_retained(function, *args):
+    gc.collect()
+    tracemalloc.start()
+    result = function(*args)
+    del result
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return retained
+
+
+# --------------------------------------------------------------------
+# Runs one case, returns dict of the measured values
+# --------------------------------------------------------------------
+def run_case(archlab_core, task):
+    generate = archlab_core.mesh_generators[task[0]]
+    generate_peak = trace_call(generate, *task[1:])[1]
+    (packed, build_peak) = trace_call(archlab_core.build_packed_mesh_data, *task)[:2]
+    vertices = max(1, len(packed[0]))
+    # the first build fills caches (e.g. mesh library), measured again
+    retained = trace_retained(archlab_core.build_packed_mesh_data, *task)
+    return {
+        'vertices': len(packed[0]),
+        'faces': len(packed[2]),
+        'generate_peak': generate_peak / vertices,
+        'build_peak': build_peak / vertices,
+        'result': sum(a.nbytes for a in packed) / vertices,
+        'retained': retained,
+    }
+
+
+# --------------------------------------------------------------------
+# Measures loading of the mesh library
+# --------------------------------------------------------------------
+def run_library(archlab_core):
+    library_path = archlab_core.get_meshlibrary_path()
+    archlab_core.meshlibrary_cache.pop(library_path, None)
+    (data, peak, current) = trace_call(archlab_core.load_meshlibrary_data, library_path)
+    return {
+        'file': path.getsize(library_path),
+        'peak': peak,
+        'retained': current,
+        'meshes': len(data['Meshes']),
+    }
+
+
+# --------------------------------------------------------------------
+# Checks results against the declared budgets, returns list of failures
+# --------------------------------------------------------------------
+def check_budgets(results):
+    failures = []
+    for (name, result) in results['cases'].items():
+        if result['retained'] > retained_budget:
+            failures.append((name, 'retained', result['retained'], retained_budget))
+        if result['vertices'] < budget_min_vertices:
+            continue
+        for (prefix, budget) in build_peak_budgets.items():
+            if name.startswith(prefix) and result['build_peak'] > budget:
+                failures.append((name, 'build_peak', result['build_peak'], budget))
+    library = results.get('library')
+    if library is not None and library['retained'] > library_budget * library['file']:
+        failures.append(('library', 'retained', library['retained'], library_budget * library['file']))
+    return failures
+
+
+def main():
+    args = parse_args()
+    archlab_core = import_core()
+    cases = get_cases(args.quick)
+    for level in ico_levels[:1] if args.quick else ico_levels:
+        cases["sphere_ico_%i" % level] = ('sphere', 1.0, 'ICO', 32, 16, level)
+    if args.case:
+        cases = {name: task for (name, task) in cases.items()
+                 if any(name.startswith(prefix) for prefix in args.case)}
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'library': run_library(archlab_core),
+        'cases': {},
+    }
+    library = results['library']
+    print("library: %i bytes file, %i bytes peak, %i bytes retained" % (
+        library['file'], library['peak'], library['retained']))
+    print("case,vertices,generate_peak_b_per_vertex,build_peak_b_per_vertex,result_b_per_vertex,retained_b")
+    for (name, task) in cases.items():
+        result = run_case(archlab_core, task)
+        results['cases'][name] = result
+        print("%s,%i,%.1f,%.1f,%.1f,%i" % (name, result['vertices'], result['generate_peak'],
+                                           result['build_peak'], result['result'], result['retained']))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    failures = check_budgets(results)
+    for (name, key, value, budget) in failures:
+        print("OVER BUDGET: %s %s %.1f > %.1f" % (name, key, value, budget), file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Measures memory of ArchLab mesh datablocks in Blender: the process
+# memory growth per mesh vertex (Blender mesh data, evaluated meshes)
+# and the peak of Python allocations while the meshes are built.
+# The process growth is a lower bound, later cases reuse memory freed
+# by earlier ones. Budgets given as arguments are enforced, the script
+# exits with 1 when a case needs more memory per vertex.
+# Run: blender --background --python benchmarks/bench_mesh_memory.py
+#      -- [--copies 4] [--output FILE.json] [--case PREFIX ...]
+#      [--mesh-budget BYTES] [--python-peak-budget BYTES]
+# ----------------------------------------------------------
+import argparse
+import gc
+import importlib
+import json
+import os
+import sys
+import tracemalloc
+from os import path
+
+import bpy
+
+
+# --------------------------------------------------------------------
+# Imports addon package from the repository source folder
+# --------------------------------------------------------------------
+def import_addon():
+    repo_dir = path.dirname(path.dirname(path.realpath(__file__)))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    return importlib.import_module("src")
+
+
+# --------------------------------------------------------------------
+# Reads arguments given after "--"
+# --------------------------------------------------------------------
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="ArchLab mesh memory benchmark")
+    parser.add_argument("--copies", type=int, default=4, help="objects built per case")
+    parser.add_argument("--output", default=None, help="JSON file receiving the results")
+    parser.add_argument("--case", nargs="*", default=None, help="run only cases starting with these names")
+    parser.add_argument("--mesh-budget", type=float, default=None,
+                        help="process memory growth per mesh vertex, in bytes")
+    parser.add_argument("--python-peak-budget", type=float, default=None,
+                        help="peak of Python allocations per vertex while building, in bytes")
+    return parser.parse_args(argv)
+
+
+# --------------------------------------------------------------------
+# Gets benchmark cases, name: (type, params, float parameter varied
+# per copy, so no mesh is shared)
+# --------------------------------------------------------------------
+def get_cases():
+    return {
+        'circle_1000': ('circle', {'circle_quality': 1000, 'circle_fill_type': 'TRIF'}, 'circle_radius'),
+        'sphere_uv_512x256': ('sphere', {'sphere_type': 'UV', 'sphere_segments': 512, 'sphere_rings': 256},
+                              'sphere_radius'),
+        'sphere_ico_7': ('sphere', {'sphere_type': 'ICO', 'sphere_subdivisions': 7}, 'sphere_radius'),
+        'glass_1000': ('glass', {'glass_segments': 1000}, 'glass_diameter'),
+        'plate_1000': ('plate', {'plate_segments': 1000}, 'plate_diameter'),
+        'room_512': ('room', {'room_wall_count': 512}, 'room_height'),
+        'stairs_500': ('stairs', {'stairs_unit_count': 500}, 'stairs_width'),
+    }
+
+
+# --------------------------------------------------------------------
+# Gets resident memory of the process in bytes, None when unknown
+# --------------------------------------------------------------------
+def get_resident_memory():
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# --------------------------------------------------------------------
+# Runs one case, returns dict of the measured values
+# --------------------------------------------------------------------
+def run_case(build, typename, params, propname, copies):
+    genname = build.get_generator_name(typename)
+    gc.collect()
+    resident = get_resident_memory()
+    tracemalloc.start()
+    objects = []
+    for t in range(copies):
+        myobject = build.build_object(typename, params)
+        props = getattr(myobject, genname)[0]
+        setattr(props, propname, getattr(props, propname) * (1.0 + 0.01 * t))
+        objects.append(myobject)
+    bpy.context.view_layer.update()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    gc.collect()
+
+    vertices = sum(len(o.data.vertices) for o in objects)
+    result = {
+        'vertices': vertices // copies,
+        'faces': sum(len(o.data.polygons) for o in objects) // copies,
+        'meshes': len(set(o.data.name for o in objects)),
+        'python_peak': peak / max(1, vertices // copies),
+        'mesh': None,
+    }
+    if resident is not None:
+        result['mesh'] = (get_resident_memory() - resident) / max(1, vertices)
+    return result
+
+
+def main():
+    args = parse_args()
+    archlab = import_addon()
+    build = archlab.archlab_utils_build
+    bpy.ops.wm.read_homefile(use_empty=True)
+    cases = get_cases()
+    if args.case:
+        cases = {name: case for (name, case) in cases.items()
+                 if any(name.startswith(prefix) for prefix in args.case)}
+
+    results = {
+        'blender': bpy.app.version_string,
+        'cases': {},
+    }
+    failures = []
+    print("case,vertices,faces,mesh_b_per_vertex,python_peak_b_per_vertex")
+    for (name, (typename, params, propname)) in cases.items():
+        result = run_case(build, typename, params, propname, args.copies)
+        results['cases'][name] = result
+        print("%s,%i,%i,%s,%.1f" % (name, result['vertices'], result['faces'],
+                                    "-" if result['mesh'] is None else "%.1f" % result['mesh'],
+                                    result['python_peak']))
+        sys.stdout.flush()
+        if args.mesh_budget is not None and result['mesh'] is not None and result['mesh'] > args.mesh_budget:
+            failures.append((name, 'mesh', result['mesh'], args.mesh_budget))
+        if args.python_peak_budget is not None and result['python_peak'] > args.python_peak_budget:
+            failures.append((name, 'python_peak', result['python_peak'], args.python_peak_budget))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    for (name, key, value, budget) in failures:
+        print("OVER BUDGET: %s %s %.1f > %.1f" % (name, key, value, budget), file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
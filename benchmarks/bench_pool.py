@@ -0,0 +1,102 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Measures parallel mesh generation of a large build spec (rooms,
+# plates and spheres with distinct parameters), runs without Blender.
+# Run: python benchmarks/bench_pool.py [--count 5000] [--processes 1 2 4 8]
+# ----------------------------------------------------------
+import argparse
+import sys
+import time
+from os import path
+
+
+# --------------------------------------------------------------------
+# Imports geometry core from the repository source folder
+# --------------------------------------------------------------------
+def import_core():
+    src_dir = path.join(path.dirname(path.dirname(path.realpath(__file__))), "src")
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    import archlab_core
+    return archlab_core
+
+
+# --------------------------------------------------------------------
+# Reads arguments
+# --------------------------------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="ArchLab process pool benchmark")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    return parser.parse_args()
+
+
+# --------------------------------------------------------------------
+# Creates core mesh builder tasks, every task is distinct
+# --------------------------------------------------------------------
+def create_tasks(count):
+    tasks = []
+    for t in range(count):
+        kind = t % 3
+        if kind == 0:
+            walls = tuple((4.0 + (t % 7) * 0.1, 0.1, 1.5708 if w else 0.0) for w in range(4 + t % 5))
+            tasks.append(('room', 2.5 + t * 1e-4, walls, True, True))
+        elif kind == 1:
+            tasks.append(('plate', 0.2 + t * 1e-5, 0.02, 32, 'Plate01'))
+        else:
+            tasks.append(('sphere', 0.5 + t * 1e-5, 'UV', 32, 16, 2))
+    return tasks
+
+
+def main():
+    args = parse_args()
+    archlab_core = import_core()
+    tasks = create_tasks(args.count)
+
+    # workers are limited to the available CPUs
+    print("processes,workers,tasks,seconds,speedup")
+    serial = None
+    for processes in args.processes:
+        start = time.perf_counter()
+        if processes <= 1:
+            mesh_data = {task: archlab_core.build_packed_mesh_data(*task) for task in tasks}
+        else:
+            mesh_data = archlab_core.build_mesh_data_parallel(tasks, processes)
+        seconds = time.perf_counter() - start
+        if serial is None:
+            serial = seconds
+        workers = max(1, min(processes, archlab_core.get_available_cpus()))
+        print("%i,%i,%i,%.3f,%.2f" % (processes, workers, len(mesh_data), seconds, serial / seconds))
+
+
+if __name__ == "__main__":
+    main()
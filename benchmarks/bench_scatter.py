@@ -0,0 +1,97 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Measures scatter of plate instances on a grid.
+# Run: blender --background --python benchmarks/bench_scatter.py
+#      -- [--count 10000] [--budget 1.0]
+# ----------------------------------------------------------
+import argparse
+import importlib
+import sys
+import time
+from math import ceil, sqrt
+from os import path
+from types import SimpleNamespace
+
+import bpy
+
+
+# --------------------------------------------------------------------
+# Imports addon package from the repository source folder
+# --------------------------------------------------------------------
+def import_addon():
+    repo_dir = path.dirname(path.dirname(path.realpath(__file__)))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    return importlib.import_module("src")
+
+
+# --------------------------------------------------------------------
+# Reads arguments given after "--"
+# --------------------------------------------------------------------
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="ArchLab scatter benchmark")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--budget", type=float, default=1.0)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    archlab = import_addon()
+    context = bpy.context
+
+    for o in list(bpy.data.objects):
+        bpy.data.objects.remove(o)
+
+    preset = SimpleNamespace(plate_diameter=0.21, plate_height=0.03, plate_segments=16, plate_type='Plate01')
+    archlab.archlab_dcrt_plate_tool.create_plate(preset, context)
+    plate = context.view_layer.objects.active
+
+    side = int(ceil(sqrt(args.count)))
+    settings = SimpleNamespace(
+        scatter_mode='GRID', scatter_count_x=side, scatter_count_y=side,
+        scatter_spacing_x=0.3, scatter_spacing_y=0.3
+    )
+    start = time.perf_counter()
+    count = archlab.archlab_utils_scatter.create_scatter(settings, context, plate)
+    context.view_layer.update()
+    elapsed = time.perf_counter() - start
+
+    print("instances,total_s")
+    print("%i,%.3f" % (count, elapsed))
+    if elapsed > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+# ----------------------------------------------------------
+# Measures cube update latency against scene size.
+# Run: blender --background --python benchmarks/bench_selection.py
+#      -- [--sizes 100,1000,10000,100000] [--repeat 20]
+# ----------------------------------------------------------
+import argparse
+import importlib
+import sys
+import time
+from os import path
+from types import SimpleNamespace
+
+import bpy
+
+
+# --------------------------------------------------------------------
+# Imports addon package from the repository source folder
+# --------------------------------------------------------------------
+def import_addon():
+    repo_dir = path.dirname(path.dirname(path.realpath(__file__)))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    return importlib.import_module("src")
+
+
+# --------------------------------------------------------------------
+# Reads arguments given after "--"
+# --------------------------------------------------------------------
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="ArchLab selection benchmark")
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+# --------------------------------------------------------------------
+# Fills the scene with empties up to the requested object count
+# --------------------------------------------------------------------
+def fill_scene(collection, count):
+    for t in range(count - len(bpy.data.objects)):
+        collection.objects.link(bpy.data.objects.new("Filler", None))
+
+
+def main():
+    args = parse_args()
+    archlab = import_addon()
+    cube_tool = archlab.archlab_mesh_cube_tool
+    context = bpy.context
+    collection = context.scene.collection
+
+    for o in list(bpy.data.objects):
+        bpy.data.objects.remove(o)
+
+    preset = SimpleNamespace(cube_width=1.0, cube_height=1.0, cube_depth=1.0)
+    cube_tool.create_cube(preset, context)
+    cube = context.view_layer.objects.active
+
+    print("objects,update_ms")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        fill_scene(collection, size)
+        start = time.perf_counter()
+        for t in range(args.repeat):
+            cube.ArchLabCubeGenerator[0].cube_width = 1.0 + t * 0.01
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print("%i,%.3f" % (len(bpy.data.objects), elapsed * 1000.0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Builds scenes from build specs, without the user interface.
+# Run: blender --background --python scripts/archlab_build.py
+#      -- spec.json [spec2.json ...] [--output-dir DIR] [--processes N]
+#      [--incremental]
+# Every spec is built into an empty file saved as DIR/<spec name>.blend
+# With --processes mesh data is generated by N worker processes, only
+# the mesh writes run in Blender
+# With --incremental an existing file is opened and the spec is applied
+# to it, only added or changed objects are rebuilt (objects need "id")
+# ----------------------------------------------------------
+import argparse
+import importlib
+import json
+import sys
+import time
+from os import path
+
+import bpy
+
+
+# --------------------------------------------------------------------
+# Imports addon package from the repository source folder
+# --------------------------------------------------------------------
+def import_addon():
+    repo_dir = path.dirname(path.dirname(path.realpath(__file__)))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    return importlib.import_module("src")
+
+
+# --------------------------------------------------------------------
+# Reads arguments given after "--"
+# --------------------------------------------------------------------
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="ArchLab batch build")
+    parser.add_argument("specs", nargs="+", help="build spec JSON files")
+    parser.add_argument("--output-dir", default=None,
+                        help="folder of saved files, spec folder by default")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="worker processes generating mesh data, 0 to generate in Blender")
+    parser.add_argument("--incremental", action="store_true",
+                        help="apply the spec to the existing file instead of building it again")
+    return parser.parse_args(argv)
+
+
+# --------------------------------------------------------------------
+# Builds one spec into an empty file and saves it
+# Returns seconds spent per phase
+# --------------------------------------------------------------------
+def build_file(archlab, specpath, outputdir, processes=0, incremental=False):
+    timings = {}
+    start = time.perf_counter()
+    with open(specpath, 'r') as f:
+        spec = json.load(f)
+    timings['load'] = time.perf_counter() - start
+
+    name = path.splitext(path.basename(specpath))[0]
+    filepath = path.join(outputdir or path.dirname(path.abspath(specpath)), name + ".blend")
+    start = time.perf_counter()
+    if incremental and path.isfile(filepath):
+        bpy.ops.wm.open_mainfile(filepath=filepath)
+    else:
+        bpy.ops.wm.read_homefile(use_empty=True)
+    timings['reset'] = time.perf_counter() - start
+
+    if incremental:
+        archlab.archlab_utils_build.apply_spec(spec, timings, processes)
+    else:
+        archlab.archlab_utils_build.build_spec(spec, timings, processes)
+
+    start = time.perf_counter()
+    bpy.ops.wm.save_as_mainfile(filepath=filepath)
+    timings['save'] = time.perf_counter() - start
+    timings['objects'] = len(spec.get('objects', []))
+    return timings
+
+
+def main():
+    args = parse_args()
+    archlab = import_addon()
+    archlab.register()
+
+    phases = ('load', 'reset', 'diff', 'create', 'generate', 'regenerate', 'save')
+    print("spec,objects," + ",".join(phase + "_ms" for phase in phases))
+    failed = 0
+    for specpath in args.specs:
+        try:
+            timings = build_file(archlab, specpath, args.output_dir, args.processes, args.incremental)
+        except (OSError, ValueError, KeyError) as e:
+            print("ERROR: %s: %s" % (specpath, e), file=sys.stderr)
+            failed += 1
+            continue
+        print("%s,%i," % (specpath, timings['objects']) +
+              ",".join("%.3f" % (timings.get(phase, 0.0) * 1000.0) for phase in phases))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -33,10 +33,13 @@
 import bpy
 
 from bpy.types import (
+    AddonPreferences,
     Menu,
     Panel,
+    TOPBAR_MT_file_export,
     VIEW3D_MT_mesh_add
 )
+from bpy.props import BoolProperty, FloatProperty, IntProperty
 
 
 # ----------------------------------------------
@@ -61,6 +64,20 @@ bl_info = {
 # ----------------------------------------------
 if "archlab_modules" in locals():
     import importlib
+    # Modules are reloaded after the modules they import from
+    importlib.reload(archlab_core.geometry)
+    importlib.reload(archlab_core.library)
+    importlib.reload(archlab_core.mesh_ops)
+    importlib.reload(archlab_core.profile)
+    importlib.reload(archlab_core.generators)
+    importlib.reload(archlab_core.pool)
+    importlib.reload(archlab_core.export_obj)
+    importlib.reload(archlab_core.export_gltf)
+    importlib.reload(archlab_core.export_print)
+    importlib.reload(archlab_core)
+    importlib.reload(archlab_utils)
+    importlib.reload(archlab_utils_regeneration)
+    importlib.reload(archlab_utils_material_data)
     importlib.reload(archlab_bldn_room_tool)
     importlib.reload(archlab_bldn_stairs_tool)
     importlib.reload(archlab_bldn_wall_tool)
@@ -68,13 +85,20 @@ if "archlab_modules" in locals():
     importlib.reload(archlab_dcrt_plate_tool)
     importlib.reload(archlab_frnt_bench_tool)
     importlib.reload(archlab_frnt_shelve_tool)
-    importlib.reload(archlab_mesh_cube_tool)
+    importlib.reload(archlab_mesh_circle_tool)
     importlib.reload(archlab_mesh_cube_tool)
     importlib.reload(archlab_mesh_plane_tool)
     importlib.reload(archlab_mesh_sphere_tool)
+    importlib.reload(archlab_utils_framecache)
+    importlib.reload(archlab_utils_scatter)
+    importlib.reload(archlab_utils_build)
+    importlib.reload(archlab_utils_export)
+    importlib.reload(archlab_utils_profile)
 
     print("archlab: Reloaded multifiles")
 else:
+    from . import archlab_core
+    from . import archlab_utils
     from . import archlab_bldn_room_tool
     from . import archlab_bldn_stairs_tool
     from . import archlab_bldn_wall_tool
@@ -86,6 +110,13 @@ else:
     from . import archlab_mesh_cube_tool
     from . import archlab_mesh_plane_tool
     from . import archlab_mesh_sphere_tool
+    from . import archlab_utils_regeneration
+    from . import archlab_utils_framecache
+    from . import archlab_utils_material_data
+    from . import archlab_utils_scatter
+    from . import archlab_utils_build
+    from . import archlab_utils_export
+    from . import archlab_utils_profile
 
     print("archlab: Imported multifiles")
 
@@ -113,6 +144,18 @@ archlab_modules = [
     archlab_mesh_sphere_tool.ArchLabIcoSphere,
     archlab_mesh_sphere_tool.ArchLabUvSphere,
     archlab_mesh_sphere_tool.ArchLabSphereGeneratorPanel,
+    archlab_utils_regeneration.ArchLabApplyToSelected,
+    archlab_utils_material_data.ArchLabDedupeMaterials,
+    archlab_utils_scatter.ArchLabScatter,
+    archlab_utils_build.ArchLabApplySpec,
+    archlab_utils_export.ArchLabExportObj,
+    archlab_utils_export.ArchLabExportGlb,
+    archlab_utils_export.ArchLabExportPrint,
+    archlab_utils_profile.ArchLabExportProfile,
+    archlab_utils_profile.ArchLabClearProfile,
+    archlab_utils_profile.ArchLabSceneReport,
+    archlab_utils_profile.ArchLabExportSceneReport,
+    archlab_utils_profile.ArchLabProfilePanel,
 ]
 
 
@@ -248,8 +291,62 @@ class ArchLabCreatePanel(Panel):
             column.operator("mesh.archlab_uvsphere", text="UV Sphere", icon="MESH_UVSPHERE")
             column.operator("mesh.archlab_icosphere", text="Ico Sphere", icon="MESH_ICOSPHERE")
 
+            column = layout.column(align=True)
+            column.label(text='Scene:')
+            column.operator("material.archlab_dedupe_materials", text="Merge Materials", icon="MATERIAL")
+            column.operator("object.archlab_scatter", text="Scatter Instances", icon="OUTLINER_OB_GROUP_INSTANCE")
+            column.operator("scene.archlab_apply_spec", text="Apply Scene Spec", icon="FILE_REFRESH")
+
+
+# ------------------------------------------------------------------
+# Define addon preferences
+# ------------------------------------------------------------------
+class ArchLabPreferences(AddonPreferences):
+    bl_idname = __name__
+
+    regeneration_latency = FloatProperty(
+        name='Regeneration latency',
+        min=0.0, soft_max=0.5,
+        default=1.0 / 60.0, precision=3, unit='TIME_ABSOLUTE',
+        description='Delay between a property change and the mesh rebuild, '
+                    'changes made in that time are rebuilt once',
+    )
+    frame_cache_memory = IntProperty(
+        name='Frame cache (MB)',
+        min=0, soft_max=4096,
+        default=256,
+        description='Memory cap of meshes cached for animated parameters, '
+                    '0 disables rebuilds on frame change',
+    )
+    profile_regeneration = BoolProperty(
+        name='Profile rebuilds',
+        default=False,
+        description='Record the time of every rebuild phase, shown in the '
+                    'ArchLab Profile panel and exported as Chrome trace',
+        update=archlab_utils_profile.update_profiling,
+    )
+    profile_capacity = IntProperty(
+        name='Profile events',
+        min=1, soft_max=1000000,
+        default=16384,
+        description='Number of recorded phases kept, older ones are dropped',
+        update=archlab_utils_profile.update_profiling,
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row()
+        row.prop(self, 'regeneration_latency')
+        row = layout.row()
+        row.prop(self, 'frame_cache_memory')
+        row = layout.row()
+        row.prop(self, 'profile_regeneration')
+        if self.profile_regeneration:
+            row.prop(self, 'profile_capacity')
+
 
 archlab_modules.extend([
+    ArchLabPreferences,
     ArchLabMeshCustomMenuAdd,
     ArchLabMeshFurnituresAdd,
     ArchLabMeshDecorationsAdd,
@@ -273,15 +370,25 @@ def register():
     for module_class in archlab_modules:
         bpy.utils.register_class(module_class)
     VIEW3D_MT_mesh_add.append(ArchLabMeshMenu_func)
+    TOPBAR_MT_file_export.append(archlab_utils_export.menu_export_func)
+    archlab_utils_regeneration.register_regeneration()
+    archlab_utils_framecache.register_frame_cache()
+    archlab_utils_build.register_build()
+    archlab_utils_profile.register_profile()
 
 
 # --------------------------------------------------------------
 # Unregister all operators and panels
 # --------------------------------------------------------------
 def unregister():
+    archlab_utils_profile.unregister_profile()
+    archlab_utils_build.unregister_build()
+    archlab_utils_framecache.unregister_frame_cache()
+    archlab_utils_regeneration.unregister_regeneration()
     for module_class in archlab_modules:
         bpy.utils.unregister_class(module_class)
     VIEW3D_MT_mesh_add.remove(ArchLabMeshMenu_func)
+    TOPBAR_MT_file_export.remove(archlab_utils_export.menu_export_func)
 
 
 # --------------------------------------------------------------
@@ -35,8 +35,13 @@ from bpy.props import (
     FloatProperty,
     CollectionProperty
 )
-from math import sin
 from .archlab_utils import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+room_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -44,8 +49,7 @@ from .archlab_utils import *
 # ------------------------------------------------------------------------------
 def create_room(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh for room
     roommesh = bpy.data.meshes.new("Room")
@@ -54,18 +58,18 @@ def create_room(self, context):
     context.collection.objects.link(roomobject)
     roomobject.ArchLabRoomGenerator.add()
 
-    roomobject.ArchLabRoomGenerator[0].room_height = self.room_height
-    roomobject.ArchLabRoomGenerator[0].room_floor = self.room_floor
-    roomobject.ArchLabRoomGenerator[0].room_ceiling = self.room_ceiling
-    roomobject.ArchLabRoomGenerator[0].room_wall_count = self.room_wall_count
-    for wall in self.room_walls:
-        wallprop = roomobject.ArchLabRoomGenerator[0].room_walls.add()
-        wallprop.wall_width = wall.wall_width
-        wallprop.wall_depth = wall.wall_depth
-        wallprop.wall_angle = wall.wall_angle
-
-    # we shape the mesh.
-    shape_room_mesh(roomobject, roommesh)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        roomobject.ArchLabRoomGenerator[0].room_height = self.room_height
+        roomobject.ArchLabRoomGenerator[0].room_floor = self.room_floor
+        roomobject.ArchLabRoomGenerator[0].room_ceiling = self.room_ceiling
+        roomobject.ArchLabRoomGenerator[0].room_wall_count = self.room_wall_count
+        for wall in self.room_walls:
+            wallprop = roomobject.ArchLabRoomGenerator[0].room_walls.add()
+            wallprop.wall_width = wall.wall_width
+            wallprop.wall_depth = wall.wall_depth
+            wallprop.wall_angle = wall.wall_angle
+        schedule_regeneration(roomobject, regenerate_room)
 
     # we select, and activate, main object for the room.
     roomobject.select_set(True)
@@ -90,167 +94,61 @@ def shape_room_mesh(myroom, tmp_mesh, update=False):
                 rp.room_walls.remove(prwc)
 
     # Create room mesh data
-    update_room_mesh_data(tmp_mesh, rp.room_height, rp.room_walls, rp.room_floor, rp.room_ceiling)
+    with profile_phase('read'):
+        mesh_args = get_room_mesh_args(rp)
+    update_room_mesh_data(tmp_mesh, *mesh_args)
     myroom.data = tmp_mesh
 
-    remove_doubles(myroom)
-    # set_normals(myroom)
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != myroom.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the room properties.
+# ------------------------------------------------------------------------------
+def get_room_mesh_args(rp):
+    # walls are passed as (width, depth, angle) tuples
+    walls = tuple((w.wall_width, w.wall_depth, w.wall_angle) for w in rp.room_walls)
+    return (rp.room_height, walls, rp.room_floor, rp.room_ceiling)
 
 
 # ------------------------------------------------------------------------------
-# Creates room mesh data.
+# Writes room mesh data built by the core, identical parameters in a batch are built once.
 # ------------------------------------------------------------------------------
 def update_room_mesh_data(mymesh, height, walls, has_floor, has_ceiling):
-    myvertices = None
-    myfaces = []
-
-    lwalls = len(walls)
-    lastwi = 0
-    lastdepth = 0
-    lastp = (0.0, 0.0, 0.0)
-    lastpnorm = (1.0, 0.0, 0.0)
-    for wall in walls:
-        pnorm = rotate_point3d_rad(lastpnorm, anglez=wall.wall_angle)
-        p1 = [
-            lastp[0] + pnorm[0] * wall.wall_width,
-            lastp[1] + pnorm[1] * wall.wall_width,
-            lastp[2] + pnorm[2] * wall.wall_width
-        ]
-        wdepth = wall.wall_depth / 2
-        wdp = (-pnorm[1] * wdepth, pnorm[0] * wdepth, 0.0)
-        if myvertices is None:  # First wall
-            myvertices = [
-                (-wdp[0], -wdp[1], 0.0),
-                (-wdp[0], -wdp[1], height),
-                ( wdp[0],  wdp[1], 0.0),
-                ( wdp[0],  wdp[1], height)
-            ]
-            myfaces.extend([
-                [0, 1, 3, 2]
-            ])
-            myfaces.extend([
-                [lastwi * 4 + 0, lastwi * 4 + 2, lastwi * 4 + 6, lastwi * 4 + 4],  # bottom
-                [lastwi * 4 + 0, lastwi * 4 + 4, lastwi * 4 + 5, lastwi * 4 + 1],  # outer
-                [lastwi * 4 + 1, lastwi * 4 + 5, lastwi * 4 + 7, lastwi * 4 + 3],  # top
-                [lastwi * 4 + 2, lastwi * 4 + 3, lastwi * 4 + 7, lastwi * 4 + 6]   # inner
-            ])
-        else:  # Wall not first
-            sinwa = sin(wall.wall_angle)
-            crosswdp = (wdp[0], wdp[1], 0.0)
-            if not sinwa == 0:  # angle = 0
-                h1 = lastpnorm * -wdepth
-                h2 = pnorm * lastdepth
-                crosswdp = (h1 + h2) / sinwa
-            myvertices.extend([
-                (lastp[0]-crosswdp[0], lastp[1]-crosswdp[1], 0.0),
-                (lastp[0]-crosswdp[0], lastp[1]-crosswdp[1], height),
-                (lastp[0]+crosswdp[0], lastp[1]+crosswdp[1], 0.0),
-                (lastp[0]+crosswdp[0], lastp[1]+crosswdp[1], height)
-            ])
-            myfaces.extend([
-                [lastwi * 4 + 0, lastwi * 4 + 2, lastwi * 4 + 6, lastwi * 4 + 4],  # bottom
-                [lastwi * 4 + 0, lastwi * 4 + 4, lastwi * 4 + 5, lastwi * 4 + 1],  # outer
-                [lastwi * 4 + 1, lastwi * 4 + 5, lastwi * 4 + 7, lastwi * 4 + 3],  # top
-                [lastwi * 4 + 2, lastwi * 4 + 3, lastwi * 4 + 7, lastwi * 4 + 6]   # inner
-            ])
-        if lwalls == lastwi + 1:  # Last wall
-            myvertices.extend([
-                (p1[0]-wdp[0], p1[1]-wdp[1], 0.0),
-                (p1[0]-wdp[0], p1[1]-wdp[1], height),
-                (p1[0]+wdp[0], p1[1]+wdp[1], 0.0),
-                (p1[0]+wdp[0], p1[1]+wdp[1], height)
-            ])
-            myfaces.extend([
-                [lastwi * 4 + 5, lastwi * 4 + 4, lastwi * 4 + 6, lastwi * 4 + 7]
-            ])
-        lastwi = lastwi + 1
-        lastpnorm = pnorm
-        lastp = p1
-        lastdepth = wdepth
-
-    if has_floor and lwalls > 1:
-        floorverts = []
-        for wno in range(lwalls):
-            floorverts.append(wno * 4 + 2)
-        floorverts.append(lwalls * 4 + 2)
-        myfaces.append(floorverts)
-
-    if has_ceiling and lwalls > 1:
-        ceilingverts = []
-        for wno in range(lwalls, 0, -1):
-            ceilingverts.append(wno * 4 + 3)
-        ceilingverts.append(0 * 4 + 3)
-        myfaces.append(ceilingverts)
-
-    mymesh.from_pydata(myvertices, [], myfaces)
-    mymesh.update(calc_edges=True)
+    packed = batched_mesh_data(build_packed_mesh_data, 'room', height, walls, has_floor, has_ceiling)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, room_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update room mesh.
+# Update room mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_room(self, context):
-    # When we update, the active object is the main object of the room.
-    o = context.view_layer.objects.active
-    oldmesh = o.data
-    oldname = o.data.name
-    # Now we deselect that room object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the room:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_room_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the room.
-    o.select_set(True)
-    context.view_layer.objects.active = o
-
-
-# -----------------------------------------------------
-# Verify if solidify exist
-# -----------------------------------------------------
-def is_solidify(myobject):
-    flag = False
-    try:
-        if myobject.modifiers is None:
-            return False
-
-        for mod in myobject.modifiers:
-            if mod.type == 'SOLIDIFY':
-                flag = True
-                break
-        return flag
-    except AttributeError:
-        return False
-
+    # The owner of the changed properties is the main object of the room,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_room)
 
-# -----------------------------------------------------
-# Move Solidify to Top
-# -----------------------------------------------------
-def movetotopsolidify(myobject):
-    mymod = None
-    try:
-        if myobject.modifiers is not None:
-            for mod in myobject.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mymod = mod
 
-            if mymod is not None:
-                while myobject.modifiers[0] != mymod:
-                    bpy.ops.object.modifier_move_up(modifier=mymod.name)
-    except AttributeError:
-        return
+# ------------------------------------------------------------------------------
+# Regenerate room mesh.
+# ------------------------------------------------------------------------------
+def regenerate_room(o):
+    oldmesh = o.data
+    oldname = o.data.name
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabRoomGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the room:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_room_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabRoomGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -344,10 +242,16 @@ class ArchLabRoomProperties(PropertyGroup):
     room_wall_count = room_wall_count_property(callback=update_room)
     room_wall_count = room_wall_count_property(callback=update_room)
     room_walls = room_walls_property(callback=update_room)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabWallProperties)
 bpy.utils.register_class(ArchLabRoomProperties)
 Object.ArchLabRoomGenerator = CollectionProperty(type=ArchLabRoomProperties)
+register_generator('ArchLabRoomGenerator', type='room', label='Room',
+                   regenerate=regenerate_room,
+                   shape=shape_room_mesh,
+                   mesh_args=get_room_mesh_args)
 
 
 # ------------------------------------------------------------------
@@ -411,6 +315,13 @@ class ArchLabRoomGeneratorPanel(Panel):
                 row.prop(room.room_walls[wt], 'wall_depth')
                 row = box.row()
                 row.prop(room.room_walls[wt], 'wall_angle')
+            row = layout.row()
+            row.prop(room, 'material_color')
+            row = layout.row()
+            row.prop(room, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabRoomGenerator'
 
 
 # ------------------------------------------------------------------
@@ -31,6 +31,12 @@ import bpy
 from bpy.types import Operator, PropertyGroup, Object, Panel
 from bpy.props import IntProperty, FloatProperty, CollectionProperty
 from .archlab_utils import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+stairs_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -38,8 +44,7 @@ from .archlab_utils import *
 # ------------------------------------------------------------------------------
 def create_stairs(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh for stairs
     stairsmesh = bpy.data.meshes.new("Stairs")
@@ -48,23 +53,23 @@ def create_stairs(self, context):
     context.collection.objects.link(stairsobject)
     stairsobject.ArchLabStairsGenerator.add()
 
-    stairsobject.ArchLabStairsGenerator[0].stairs_width = \
-        self.stairs_width
-    stairsobject.ArchLabStairsGenerator[0].stairs_unit_count = \
-        self.stairs_unit_count
-    stairsobject.ArchLabStairsGenerator[0].stairs_unit_run = \
-        self.stairs_unit_run
-    stairsobject.ArchLabStairsGenerator[0].stairs_unit_raise = \
-        self.stairs_unit_raise
-    stairsobject.ArchLabStairsGenerator[0].stairs_noising = \
-        self.stairs_noising
-    stairsobject.ArchLabStairsGenerator[0].stairs_noising_thickness = \
-        self.stairs_noising_thickness
-    stairsobject.ArchLabStairsGenerator[0].stairs_tread = \
-        self.stairs_tread
-
-    # we shape the mesh.
-    shape_stairs_mesh(stairsobject, stairsmesh)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        stairsobject.ArchLabStairsGenerator[0].stairs_width = \
+            self.stairs_width
+        stairsobject.ArchLabStairsGenerator[0].stairs_unit_count = \
+            self.stairs_unit_count
+        stairsobject.ArchLabStairsGenerator[0].stairs_unit_run = \
+            self.stairs_unit_run
+        stairsobject.ArchLabStairsGenerator[0].stairs_unit_raise = \
+            self.stairs_unit_raise
+        stairsobject.ArchLabStairsGenerator[0].stairs_noising = \
+            self.stairs_noising
+        stairsobject.ArchLabStairsGenerator[0].stairs_noising_thickness = \
+            self.stairs_noising_thickness
+        stairsobject.ArchLabStairsGenerator[0].stairs_tread = \
+            self.stairs_tread
+        schedule_regeneration(stairsobject, regenerate_stairs)
 
     # we select, and activate, main object for the stairs.
     stairsobject.select_set(True)
@@ -77,71 +82,59 @@ def create_stairs(self, context):
 def shape_stairs_mesh(mystairs, tmp_mesh, update=False):
     sp = mystairs.ArchLabStairsGenerator[0]  # "sp" means "stairs properties".
     # Create stairs mesh data
-    update_stairs_mesh_data(tmp_mesh, sp.stairs_width, sp.stairs_unit_count, sp.stairs_unit_run, sp.stairs_unit_raise)
+    with profile_phase('read'):
+        mesh_args = get_stairs_mesh_args(sp)
+    update_stairs_mesh_data(tmp_mesh, *mesh_args)
     mystairs.data = tmp_mesh
 
-    remove_doubles(mystairs)
-    set_normals(mystairs)
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != mystairs.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the stairs properties.
+# ------------------------------------------------------------------------------
+def get_stairs_mesh_args(sp):
+    return (sp.stairs_width, sp.stairs_unit_count, sp.stairs_unit_run, sp.stairs_unit_raise)
 
 
 # ------------------------------------------------------------------------------
-# Creates stairs mesh data.
+# Writes stairs mesh data built by the core, identical parameters in a batch are built once.
 # ------------------------------------------------------------------------------
 def update_stairs_mesh_data(mymesh, width, unit_count, unit_run, unit_raise):
-    myvertices = []
-    myfaces = []
-    lastp = (-width / 2.0, 0.0, 0.0)
-    myvertices.extend([
-        (-width / 2.00, lastp[1], lastp[2]),
-        (width / 2.0, lastp[1], lastp[2]),
-    ])
-    for ut in range(unit_count):
-        p1 = (-width / 2.0, lastp[1] + unit_run, lastp[2] + unit_raise)
-        myvertices.extend([
-            (-width / 2.0, lastp[1], p1[2]),
-            (width / 2.0, lastp[1], p1[2]),
-            (-width / 2.0, p1[1], p1[2]),
-            (width / 2.0, p1[1], p1[2]),
-        ])
-        myfaces.extend([
-            (ut*4 + 0, ut*4 + 1, ut*4 + 3, ut*4 + 2),
-            (ut*4 + 2, ut*4 + 3, ut*4 + 5, ut*4 + 4)
-        ])
-        lastp = p1
-
-    mymesh.from_pydata(myvertices, [], myfaces)
-    mymesh.update(calc_edges=True)
+    packed = batched_mesh_data(build_packed_mesh_data, 'stairs', width, unit_count, unit_run, unit_raise)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, stairs_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update stairs mesh.
+# Update stairs mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_stairs(self, context):
-    # When we update, the active object is the main object of the stairs.
-    o = context.view_layer.objects.active
+    # The owner of the changed properties is the main object of the stairs,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_stairs)
+
+
+# ------------------------------------------------------------------------------
+# Regenerate stairs mesh.
+# ------------------------------------------------------------------------------
+def regenerate_stairs(o):
     oldmesh = o.data
     oldname = o.data.name
-    # Now we deselect that stairs object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the stairs:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_stairs_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the stairs.
-    o.select_set(True)
-    context.view_layer.objects.active = o
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabStairsGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the stairs:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_stairs_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabStairsGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -239,10 +232,16 @@ class ArchLabStairsProperties(PropertyGroup):
         stairs_noising_thickness_property(callback=update_stairs)
     stairs_tread = \
         stairs_tread_property(callback=update_stairs)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabStairsProperties)
 Object.ArchLabStairsGenerator = \
     CollectionProperty(type=ArchLabStairsProperties)
+register_generator('ArchLabStairsGenerator', type='stairs', label='Stairs',
+                   regenerate=regenerate_stairs,
+                   shape=shape_stairs_mesh,
+                   mesh_args=get_stairs_mesh_args)
 
 
 # ------------------------------------------------------------------
@@ -290,6 +289,13 @@ class ArchLabStairsGeneratorPanel(Panel):
         else:
             stairs = o.ArchLabStairsGenerator[0]
             draw_props(layout, stairs)
+            row = layout.row()
+            row.prop(stairs, 'material_color')
+            row = layout.row()
+            row.prop(stairs, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabStairsGenerator'
 
 
 # ------------------------------------------------------------------
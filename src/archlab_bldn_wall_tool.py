@@ -31,6 +31,12 @@ import bpy
 from bpy.types import Operator, PropertyGroup, Object, Panel
 from bpy.props import FloatProperty, CollectionProperty
 from .archlab_utils import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+wall_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -38,8 +44,7 @@ from .archlab_utils import *
 # ------------------------------------------------------------------------------
 def create_wall(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh for wall
     wallmesh = bpy.data.meshes.new("Wall")
@@ -48,12 +53,12 @@ def create_wall(self, context):
     context.collection.objects.link(wallobject)
     wallobject.ArchLabWallGenerator.add()
 
-    wallobject.ArchLabWallGenerator[0].wall_height = self.wall_height
-    wallobject.ArchLabWallGenerator[0].wall_width = self.wall_width
-    wallobject.ArchLabWallGenerator[0].wall_depth = self.wall_depth
-
-    # we shape the mesh.
-    shape_wall_mesh(wallobject, wallmesh)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        wallobject.ArchLabWallGenerator[0].wall_height = self.wall_height
+        wallobject.ArchLabWallGenerator[0].wall_width = self.wall_width
+        wallobject.ArchLabWallGenerator[0].wall_depth = self.wall_depth
+        schedule_regeneration(wallobject, regenerate_wall)
 
     # we select, and activate, main object for the wall.
     wallobject.select_set(True)
@@ -61,115 +66,78 @@ def create_wall(self, context):
 
 
 # ------------------------------------------------------------------------------
-# Shapes mesh and creates modifier solidify (the modifier, only the first time).
+# Shapes mesh and reconciles modifier solidify.
 # ------------------------------------------------------------------------------
 def shape_wall_mesh(mywall, tmp_mesh, update=False):
     pp = mywall.ArchLabWallGenerator[0]  # "pp" means "wall properties".
     # Create wall mesh data
-    update_wall_mesh_data(tmp_mesh, pp.wall_width, pp.wall_height)
+    with profile_phase('read'):
+        mesh_args = get_wall_mesh_args(pp)
+    update_wall_mesh_data(tmp_mesh, *mesh_args)
     mywall.data = tmp_mesh
 
-    remove_doubles(mywall)
-    set_normals(mywall)
+    reconcile_wall_modifiers(mywall)
 
+
+# ------------------------------------------------------------------------------
+# Reconciles wall modifiers, also used when the mesh comes from a cache.
+# ------------------------------------------------------------------------------
+def reconcile_wall_modifiers(mywall):
+    pp = mywall.ArchLabWallGenerator[0]  # "pp" means "wall properties".
+    # Reconcile ArchLib modifiers (only changes are applied)
+    mymodifiers = []
     if pp.wall_depth > 0.0:
-        if update is False or is_solidify(mywall) is False:
-            set_modifier_solidify(mywall, pp.wall_depth)
-        else:
-            for mod in mywall.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mod.thickness = pp.wall_depth
-        # Move to Top SOLIDIFY
-        movetotopsolidify(mywall)
+        mymodifiers.append(solidify_modifier(pp.wall_depth))
+    reconcile_modifiers(mywall, mymodifiers)
 
-    else:  # clear not used SOLIDIFY
-        for mod in mywall.modifiers:
-            if mod.type == 'SOLIDIFY':
-                mywall.modifiers.remove(mod)
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != mywall.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the wall properties.
+# ------------------------------------------------------------------------------
+def get_wall_mesh_args(pp):
+    return (pp.wall_width, pp.wall_height)
 
 
 # ------------------------------------------------------------------------------
-# Creates wall mesh data.
+# Writes wall mesh data built by the core, identical parameters in a batch are built once.
 # ------------------------------------------------------------------------------
 def update_wall_mesh_data(mymesh, width, height):
-    sizew = width
-    sizez = height
-    posw = width
-    posz = height
+    packed = batched_mesh_data(build_packed_mesh_data, 'wall', width, height)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, wall_shading)
 
-    myvertices = [(0.0, 0.0, 0.0), (0.0, 0.0, posz),]
-    myvertices.extend([(posw, 0.0, 0.0), (posw, 0.0, posz)])
-    myfaces = [(0, 1, 3, 2)]
 
-    mymesh.from_pydata(myvertices, [], myfaces)
-    mymesh.update(calc_edges=True)
+# ------------------------------------------------------------------------------
+# Update wall mesh, the rebuild is deferred and coalesced.
+# ------------------------------------------------------------------------------
+def update_wall(self, context):
+    # The owner of the changed properties is the main object of the wall,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_wall)
 
 
 # ------------------------------------------------------------------------------
-# Update wall mesh.
+# Regenerate wall mesh.
 # ------------------------------------------------------------------------------
-def update_wall(self, context):
-    # When we update, the active object is the main object of the wall.
-    o = context.view_layer.objects.active
+def regenerate_wall(o):
     oldmesh = o.data
     oldname = o.data.name
-    # Now we deselect that wall object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the wall:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_wall_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the wall.
-    o.select_set(True)
-    context.view_layer.objects.active = o
-
-
-# -----------------------------------------------------
-# Verify if solidify exist
-# -----------------------------------------------------
-def is_solidify(myobject):
-    flag = False
-    try:
-        if myobject.modifiers is None:
-            return False
-
-        for mod in myobject.modifiers:
-            if mod.type == 'SOLIDIFY':
-                flag = True
-                break
-        return flag
-    except AttributeError:
-        return False
-
-
-# -----------------------------------------------------
-# Move Solidify to Top
-# -----------------------------------------------------
-def movetotopsolidify(myobject):
-    mymod = None
-    try:
-        if myobject.modifiers is not None:
-            for mod in myobject.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mymod = mod
-
-            if mymod is not None:
-                while myobject.modifiers[0] != mymod:
-                    bpy.ops.object.modifier_move_up(modifier=mymod.name)
-    except AttributeError:
-        return
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabWallGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the wall:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_wall_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabWallGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -209,9 +177,16 @@ class ArchLabWallProperties(PropertyGroup):
     wall_height = wall_height_property(callback=update_wall)
     wall_width = wall_width_property(callback=update_wall)
     wall_depth = wall_depth_property(callback=update_wall)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabWallProperties)
 Object.ArchLabWallGenerator = CollectionProperty(type=ArchLabWallProperties)
+register_generator('ArchLabWallGenerator', type='wall', label='Wall',
+                   regenerate=regenerate_wall,
+                   shape=shape_wall_mesh,
+                   mesh_args=get_wall_mesh_args,
+                   reconcile=reconcile_wall_modifiers)
 
 
 # ------------------------------------------------------------------
@@ -264,6 +239,13 @@ class ArchLabWallGeneratorPanel(Panel):
             row.prop(wall, 'wall_height')
             row = layout.row()
             row.prop(wall, 'wall_depth')
+            row = layout.row()
+            row.prop(wall, 'material_color')
+            row = layout.row()
+            row.prop(wall, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabWallGenerator'
 
 
 # ------------------------------------------------------------------
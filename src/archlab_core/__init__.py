@@ -0,0 +1,48 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+# ----------------------------------------------------------
+# Geometry core of ArchLab, without bpy and mathutils imports.
+# Mesh data is kept as (vertices, edges, faces) lists, the tool modules
+# only write it into Blender datablocks. Outside of Blender add the
+# addon folder to sys.path and import archlab_core.
+# ----------------------------------------------------------
+from .geometry import *
+from .library import *
+from .mesh_ops import *
+from .generators import *
+from .profile import (
+    enable_profiling, disable_profiling, is_profiling, clear_profile,
+    profile_phase, get_last_profile, write_chrome_trace,
+    sort_scene_report, format_scene_report, write_scene_report_csv
+)
+from .pool import build_mesh_data_parallel, get_available_cpus
+from .export_obj import write_obj
+from .export_gltf import write_glb
+from .export_print import write_ply, write_stl, write_mesh_files
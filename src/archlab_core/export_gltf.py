@@ -0,0 +1,268 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+import json
+import struct
+from collections import OrderedDict
+import numpy as np
+from .geometry import decompose_matrix
+from .generators import build_packed_mesh_data
+from .mesh_ops import *
+
+# glTF constants
+GLTF_FLOAT = 5126
+GLTF_SHORT = 5122
+GLTF_BYTE = 5120
+GLTF_UNSIGNED_SHORT = 5123
+GLTF_UNSIGNED_INT = 5125
+GLTF_ARRAY_BUFFER = 34962
+GLTF_ELEMENT_ARRAY_BUFFER = 34963
+GLTF_LINES = 1
+GLTF_TRIANGLES = 4
+
+# Accessor types by component count
+gltf_accessor_types = {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3', 4: 'VEC4'}
+
+# Blender is Z up, glTF is Y up: (x, y, z) -> (x, z, -y)
+gltf_axis_matrix = np.array(((1.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, -1.0, 0.0)))
+
+
+# --------------------------------------------------------------------
+# Adds array as buffer view and accessor, returns the accessor index
+# values - array (N, columns), columns may be padding up to 4 bytes
+# components - count of used columns, all columns by default
+# --------------------------------------------------------------------
+def add_gltf_accessor(gltf, blobs, values, component_type, target=None,
+                      components=None, normalized=False, bounds=False):
+    values = np.ascontiguousarray(values)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    if components is None:
+        components = values.shape[1]
+    buffer = gltf['buffers'][0]
+    blob = values.tobytes()
+    view = {'buffer': 0, 'byteOffset': buffer['byteLength'], 'byteLength': len(blob)}
+    if target is not None:
+        view['target'] = target
+    if target == GLTF_ARRAY_BUFFER and values.shape[1] != components:
+        view['byteStride'] = values.strides[0]
+    blobs.append(blob)
+    if len(blob) % 4:
+        blobs.append(b'\0' * (4 - len(blob) % 4))
+    buffer['byteLength'] += len(blob) + (-len(blob) % 4)
+    gltf['bufferViews'].append(view)
+
+    accessor = {
+        'bufferView': len(gltf['bufferViews']) - 1,
+        'componentType': component_type,
+        'count': len(values),
+        'type': gltf_accessor_types[components],
+    }
+    if normalized:
+        accessor['normalized'] = True
+    if bounds:
+        accessor['min'] = values[:, :components].min(axis=0).tolist()
+        accessor['max'] = values[:, :components].max(axis=0).tolist()
+    gltf['accessors'].append(accessor)
+    return len(gltf['accessors']) - 1
+
+
+# --------------------------------------------------------------------
+# Converts vectors (N, 3) from Blender to glTF axes
+# --------------------------------------------------------------------
+def to_gltf_axes(vectors):
+    return np.asarray(vectors, dtype=np.float64) @ gltf_axis_matrix.T
+
+
+# --------------------------------------------------------------------
+# Converts 4x4 object matrix (rows) from Blender to glTF axes, the
+# mesh is converted too so the matrix is C * M * C^-1
+# --------------------------------------------------------------------
+def to_gltf_matrix(matrix):
+    axes = np.identity(4)
+    axes[:3, :3] = gltf_axis_matrix
+    return (axes @ np.asarray(matrix, dtype=np.float64) @ axes.T).tolist()
+
+
+# --------------------------------------------------------------------
+# Gets mesh arrays of the task, ready for the glTF primitive (Y up)
+# Returns (positions, normals, indices, mode), flat normals split the
+# vertices per face
+# --------------------------------------------------------------------
+def get_gltf_mesh_arrays(task, normals):
+    (coords, edges, loop_totals, loop_indices) = build_packed_mesh_data(*task)
+    if len(loop_totals) == 0:
+        return to_gltf_axes(coords), None, edges.ravel(), GLTF_LINES
+    face_normals = calc_packed_face_normals(coords, loop_totals, loop_indices)
+    triangles = triangulate_packed_loops(loop_totals)
+    if normals == 'SMOOTH':
+        vertex_normals = calc_packed_vertex_normals(coords, loop_totals, loop_indices, face_normals)
+        return (to_gltf_axes(coords), to_gltf_axes(vertex_normals),
+                loop_indices[triangles].ravel(), GLTF_TRIANGLES)
+    positions = coords[loop_indices]
+    loop_normals = np.repeat(normalize_vectors(face_normals), loop_totals, axis=0)
+    return to_gltf_axes(positions), to_gltf_axes(loop_normals), triangles.ravel(), GLTF_TRIANGLES
+
+
+# --------------------------------------------------------------------
+# Adds glTF mesh of the task, returns (mesh index, dequantization)
+# With quantization positions are stored as SHORT, normals as BYTE
+# (KHR_mesh_quantization), dequantization is (scale, offset) applied to
+# the node transform, positions = stored * scale + offset
+# --------------------------------------------------------------------
+def add_gltf_mesh(gltf, blobs, name, task, normals, quantize):
+    (positions, mesh_normals, indices, mode) = get_gltf_mesh_arrays(task, normals)
+    dequantization = (1.0, (0.0, 0.0, 0.0))
+    attributes = {}
+    if quantize and len(positions):
+        low = positions.min(axis=0).astype(np.float64)
+        high = positions.max(axis=0).astype(np.float64)
+        offset = (low + high) / 2.0
+        scale = max(float((high - low).max()) / 2.0 / 32767.0, 1e-12)
+        # rows padded to 4 bytes (vertex attribute alignment)
+        stored = np.zeros((len(positions), 4), dtype=np.int16)
+        stored[:, :3] = np.round((positions - offset) / scale)
+        attributes['POSITION'] = add_gltf_accessor(
+            gltf, blobs, stored, GLTF_SHORT, GLTF_ARRAY_BUFFER, components=3, bounds=True)
+        dequantization = (scale, tuple(offset.tolist()))
+        if mesh_normals is not None:
+            stored = np.zeros((len(mesh_normals), 4), dtype=np.int8)
+            stored[:, :3] = np.round(mesh_normals * 127.0)
+            attributes['NORMAL'] = add_gltf_accessor(
+                gltf, blobs, stored, GLTF_BYTE, GLTF_ARRAY_BUFFER, components=3, normalized=True)
+    else:
+        attributes['POSITION'] = add_gltf_accessor(
+            gltf, blobs, positions.astype(np.float32), GLTF_FLOAT, GLTF_ARRAY_BUFFER, bounds=True)
+        if mesh_normals is not None:
+            attributes['NORMAL'] = add_gltf_accessor(
+                gltf, blobs, mesh_normals.astype(np.float32), GLTF_FLOAT, GLTF_ARRAY_BUFFER)
+
+    primitive = {'attributes': attributes, 'mode': mode}
+    if len(indices):
+        if len(positions) < 65536:
+            primitive['indices'] = add_gltf_accessor(
+                gltf, blobs, indices.astype(np.uint16), GLTF_UNSIGNED_SHORT, GLTF_ELEMENT_ARRAY_BUFFER)
+        else:
+            primitive['indices'] = add_gltf_accessor(
+                gltf, blobs, indices.astype(np.uint32), GLTF_UNSIGNED_INT, GLTF_ELEMENT_ARRAY_BUFFER)
+    gltf['meshes'].append({'name': name, 'primitives': [primitive]})
+    return len(gltf['meshes']) - 1, dequantization
+
+
+# --------------------------------------------------------------------
+# Gets node transform (translation, rotation, scale) of the object
+# matrix in glTF axes, the mesh dequantization is applied first
+# --------------------------------------------------------------------
+def get_gltf_transform(matrix, dequantization):
+    (scale, offset) = dequantization
+    if matrix is None:
+        matrix = ((1.0, 0.0, 0.0, 0.0), (0.0, 1.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, 0.0, 0.0, 1.0))
+    matrix = to_gltf_matrix(matrix)
+    (location, rotation, objscale) = decompose_matrix(matrix)
+    # location moves by the object matrix applied to the offset
+    location = tuple(location[r] + sum(matrix[r][c] * offset[c] for c in range(3)) for r in range(3))
+    return location, rotation, tuple(s * scale for s in objscale)
+
+
+# --------------------------------------------------------------------
+# Writes binary glTF (.glb) file of ArchLab objects, straight from the
+# core mesh builders (no Blender objects needed), converted to Y up
+# objects - iterable of (name, task, matrix), task is (typename, *args)
+#           as given to build_mesh_data, matrix is 4x4 (rows) or None
+# normals - 'FLAT' (per face) or 'SMOOTH' (per vertex)
+# quantize - store positions and normals as integers (KHR_mesh_quantization)
+# instancing - objects with equal tasks become one node with instance
+#              transforms (EXT_mesh_gpu_instancing), otherwise nodes
+#              share the mesh
+# --------------------------------------------------------------------
+def write_glb(filepath, objects, normals='FLAT', quantize=False, instancing=True):
+    groups = OrderedDict()
+    for (name, task, matrix) in objects:
+        groups.setdefault(task, []).append((name, matrix))
+
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'ArchLab'},
+        'scene': 0,
+        'scenes': [{'nodes': []}],
+        'nodes': [],
+        'meshes': [],
+        'accessors': [],
+        'bufferViews': [],
+        'buffers': [{'byteLength': 0}],
+    }
+    extensions = []
+    if quantize:
+        extensions.append('KHR_mesh_quantization')
+    blobs = []
+    for (task, items) in groups.items():
+        (mesh, dequantization) = add_gltf_mesh(gltf, blobs, items[0][0], task, normals, quantize)
+        transforms = [get_gltf_transform(matrix, dequantization) for (name, matrix) in items]
+        if instancing and len(items) > 1:
+            (locations, rotations, scales) = zip(*transforms)
+            attributes = {
+                'TRANSLATION': add_gltf_accessor(gltf, blobs, np.array(locations, dtype=np.float32), GLTF_FLOAT),
+                'ROTATION': add_gltf_accessor(gltf, blobs, np.array(rotations, dtype=np.float32), GLTF_FLOAT),
+                'SCALE': add_gltf_accessor(gltf, blobs, np.array(scales, dtype=np.float32), GLTF_FLOAT),
+            }
+            gltf['nodes'].append({
+                'name': "%s instances" % task[0],
+                'mesh': mesh,
+                'extensions': {'EXT_mesh_gpu_instancing': {'attributes': attributes}},
+            })
+            gltf['scenes'][0]['nodes'].append(len(gltf['nodes']) - 1)
+            if 'EXT_mesh_gpu_instancing' not in extensions:
+                extensions.append('EXT_mesh_gpu_instancing')
+            continue
+        for ((name, matrix), (location, rotation, scale)) in zip(items, transforms):
+            gltf['nodes'].append({
+                'name': name,
+                'mesh': mesh,
+                'translation': list(location),
+                'rotation': list(rotation),
+                'scale': list(scale),
+            })
+            gltf['scenes'][0]['nodes'].append(len(gltf['nodes']) - 1)
+
+    if extensions:
+        gltf['extensionsUsed'] = extensions
+    if quantize:
+        gltf['extensionsRequired'] = ['KHR_mesh_quantization']
+    binary_length = gltf['buffers'][0]['byteLength']
+
+    # header, JSON chunk (padded with spaces) and one BIN chunk
+    header = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-len(header) % 4)
+    with open(filepath, 'wb') as f:
+        f.write(struct.pack('<4sII', b'glTF', 2, 12 + 8 + len(header) + 8 + binary_length))
+        f.write(struct.pack('<I4s', len(header), b'JSON'))
+        f.write(header)
+        f.write(struct.pack('<I4s', binary_length, b'BIN\0'))
+        for blob in blobs:
+            f.write(blob)
@@ -0,0 +1,155 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+from collections import OrderedDict
+import numpy as np
+from .generators import build_packed_mesh_data
+from .mesh_ops import *
+
+# Records formatted at once (one write call per chunk)
+obj_chunk_size = 65536
+
+# Meshes kept for repeated parameter sets during the export
+obj_mesh_cache_size = 64
+
+# Face vertex formats by written (uvs, normals)
+obj_face_formats = {
+    (False, False): " %d",
+    (False, True): " %d//%d",
+    (True, False): " %d/%d",
+    (True, True): " %d/%d/%d",
+}
+
+
+# --------------------------------------------------------------------
+# Gets mesh data prepared for the export, identical tasks share it
+# Returns (packed, face normals, vertex normals, uvs), only the
+# requested parts are calculated
+# --------------------------------------------------------------------
+def get_obj_mesh(cache, task, normals, uvs):
+    mesh = cache.get(task)
+    if mesh is not None:
+        cache.move_to_end(task)
+        return mesh
+    packed = build_packed_mesh_data(*task)
+    (coords, edges, loop_totals, loop_indices) = packed
+    face_normals = calc_packed_face_normals(coords, loop_totals, loop_indices)
+    vertex_normals = None
+    if normals == 'SMOOTH':
+        vertex_normals = calc_packed_vertex_normals(coords, loop_totals, loop_indices, face_normals)
+    mesh_uvs = None
+    if uvs:
+        mesh_uvs = calc_packed_box_uvs(coords, loop_totals, loop_indices, face_normals)
+    mesh = (packed, normalize_vectors(face_normals), vertex_normals, mesh_uvs)
+    cache[task] = mesh
+    if len(cache) > obj_mesh_cache_size:
+        cache.popitem(last=False)
+    return mesh
+
+
+# --------------------------------------------------------------------
+# Writes records (one per row) in chunks
+# record - format of one record, e.g. "v %.6f %.6f %.6f\n"
+# --------------------------------------------------------------------
+def write_obj_records(f, record, values):
+    for start in range(0, len(values), obj_chunk_size):
+        chunk = values[start:start + obj_chunk_size]
+        f.write((record * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+# --------------------------------------------------------------------
+# Writes face records in chunks, faces of equal size are written with
+# one format (generated faces come in long runs of quads or triangles)
+# columns - per loop index columns (vertex, [uv], [normal]), 1 based
+# --------------------------------------------------------------------
+def write_obj_faces(f, loop_totals, columns, vertex_format):
+    if len(loop_totals) == 0:
+        return
+    runs = np.flatnonzero(np.diff(loop_totals)) + 1
+    run_starts = np.concatenate(([0], runs))
+    run_ends = np.concatenate((runs, [len(loop_totals)]))
+    loop_start = 0
+    for (run_start, run_end) in zip(run_starts.tolist(), run_ends.tolist()):
+        size = int(loop_totals[run_start])
+        face_count = obj_chunk_size // size + 1
+        record = "f" + vertex_format * size + "\n"
+        for start in range(run_start, run_end, face_count):
+            count = min(face_count, run_end - start)
+            loop_end = loop_start + count * size
+            chunk = columns[loop_start:loop_end]
+            f.write((record * count) % tuple(chunk.ravel().tolist()))
+            loop_start = loop_end
+
+
+# --------------------------------------------------------------------
+# Writes Wavefront OBJ file of ArchLab objects, straight from the core
+# mesh builders (no Blender objects needed)
+# objects - iterable of (name, task, matrix), task is (typename, *args)
+#           as given to build_mesh_data, matrix is 4x4 (rows) or None
+# normals - 'FLAT' (per face), 'SMOOTH' (per vertex) or None
+# uvs - write box projected UVs
+# Objects are streamed, memory stays constant per object, meshes of
+# repeated parameter sets are built once while they stay in the cache
+# --------------------------------------------------------------------
+def write_obj(filepath, objects, normals='FLAT', uvs=False):
+    cache = OrderedDict()
+    vertex_format = obj_face_formats[(bool(uvs), normals is not None)]
+    (voffset, vtoffset, vnoffset) = (1, 1, 1)
+    with open(filepath, 'w', buffering=1 << 20) as f:
+        f.write("# ArchLab\n")
+        for (name, task, matrix) in objects:
+            (packed, face_normals, vertex_normals, mesh_uvs) = get_obj_mesh(cache, task, normals, uvs)
+            (coords, edges, loop_totals, loop_indices) = packed
+            points = coords
+            mesh_normals = vertex_normals if normals == 'SMOOTH' else face_normals
+            if matrix is not None:
+                points = transform_packed_points(coords, matrix)
+                if normals is not None:
+                    mesh_normals = transform_packed_normals(mesh_normals, matrix)
+
+            f.write("o %s\n" % name)
+            write_obj_records(f, "v %.6f %.6f %.6f\n", points)
+            columns = [loop_indices + voffset]
+            if uvs:
+                write_obj_records(f, "vt %.6f %.6f\n", mesh_uvs)
+                columns.append(np.arange(vtoffset, vtoffset + len(loop_indices)))
+            if normals is not None:
+                write_obj_records(f, "vn %.4f %.4f %.4f\n", mesh_normals)
+                if normals == 'SMOOTH':
+                    columns.append(loop_indices + vnoffset)
+                else:
+                    columns.append(np.repeat(np.arange(vnoffset, vnoffset + len(loop_totals)), loop_totals))
+            write_obj_faces(f, loop_totals, np.stack(columns, axis=1), vertex_format)
+            # loose edges (meshes without faces) are written as lines
+            write_obj_records(f, "l %d %d\n", edges + voffset)
+
+            voffset += len(points)
+            vtoffset += len(loop_indices) if uvs else 0
+            vnoffset += len(mesh_normals) if normals is not None else 0
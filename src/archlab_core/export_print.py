@@ -0,0 +1,200 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Binary PLY and STL writers for fabrication and 3D printing.
+# Arrays are written through the buffer protocol (no text formatting
+# and no per item conversion), faces are triangulated while written.
+# ----------------------------------------------------------
+import struct
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+import numpy as np
+from .generators import build_packed_mesh_data
+from .mesh_ops import *
+
+# Triangles written at once, bounds the memory of large meshes
+print_chunk_size = 1 << 20
+
+# STL triangle record (50 bytes, little endian)
+stl_triangle_dtype = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attribute', '<u2'),
+])
+
+# File extensions by format
+print_file_extensions = {'PLY': '.ply', 'STL': '.stl'}
+
+# PLY list count types (name, dtype, largest count), smallest fitting is used
+ply_count_types = (
+    ('uchar', 'u1', 0xff),
+    ('ushort', '<u2', 0xffff),
+    ('uint', '<u4', 0xffffffff),
+)
+
+
+# --------------------------------------------------------------------
+# Gets points of packed mesh data as little endian float32 (N, 3)
+# Untransformed coordinates are used as they are (no copy)
+# --------------------------------------------------------------------
+def get_print_points(coords, matrix):
+    if matrix is None:
+        return np.ascontiguousarray(coords, dtype='<f4')
+    return transform_packed_points(coords, matrix).astype('<f4')
+
+
+# --------------------------------------------------------------------
+# Writes packed mesh data as binary little endian PLY
+# triangulate - write triangles only, otherwise faces keep their size
+# --------------------------------------------------------------------
+def write_packed_ply(filepath, packed, matrix=None, triangulate=True):
+    (coords, edges, loop_totals, loop_indices) = packed
+    points = get_print_points(coords, matrix)
+    if triangulate:
+        triangles = triangulate_packed_loops(loop_totals)
+        face_count = len(triangles)
+        largest = 3
+    else:
+        face_count = len(loop_totals)
+        largest = int(loop_totals.max()) if face_count else 0
+    (count_name, count_type) = next((name, dtype) for (name, dtype, maximum) in ply_count_types
+                                    if largest <= maximum)
+
+    header = (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        "comment ArchLab\n"
+        "element vertex %i\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        "element face %i\n"
+        "property list %s int vertex_indices\n"
+        "end_header\n"
+    ) % (len(points), face_count, count_name)
+    with open(filepath, 'wb') as f:
+        f.write(header.encode('ascii'))
+        f.write(points)
+        if triangulate:
+            record = np.dtype([('count', count_type), ('vertices', '<i4', (3,))])
+            for start in range(0, face_count, print_chunk_size):
+                chunk = triangles[start:start + print_chunk_size]
+                faces = np.empty(len(chunk), dtype=record)
+                faces['count'] = 3
+                faces['vertices'] = loop_indices[chunk]
+                f.write(faces)
+            return
+        # runs of equal sized faces share one record layout
+        runs = np.flatnonzero(np.diff(loop_totals)) + 1
+        run_starts = np.concatenate(([0], runs)).tolist() if face_count else []
+        run_ends = np.concatenate((runs, [face_count])).tolist() if face_count else []
+        loop_start = 0
+        for (run_start, run_end) in zip(run_starts, run_ends):
+            size = int(loop_totals[run_start])
+            record = np.dtype([('count', count_type), ('vertices', '<i4', (size,))])
+            faces = np.empty(run_end - run_start, dtype=record)
+            faces['count'] = size
+            loop_end = loop_start + len(faces) * size
+            faces['vertices'] = loop_indices[loop_start:loop_end].reshape(-1, size)
+            f.write(faces)
+            loop_start = loop_end
+
+
+# --------------------------------------------------------------------
+# Writes packed mesh data as binary STL, faces are triangulated and
+# facet normals are calculated from the written (transformed) points
+# --------------------------------------------------------------------
+def write_packed_stl(filepath, packed, matrix=None):
+    (coords, edges, loop_totals, loop_indices) = packed
+    points = get_print_points(coords, matrix)
+    triangles = triangulate_packed_loops(loop_totals)
+    with open(filepath, 'wb') as f:
+        f.write(b'ArchLab binary STL'.ljust(80, b' '))
+        f.write(struct.pack('<I', len(triangles)))
+        for start in range(0, len(triangles), print_chunk_size):
+            chunk = points[loop_indices[triangles[start:start + print_chunk_size]]]
+            records = np.zeros(len(chunk), dtype=stl_triangle_dtype)
+            records['vertices'] = chunk
+            records['normal'] = normalize_vectors(
+                np.cross(chunk[:, 1] - chunk[:, 0], chunk[:, 2] - chunk[:, 0]))
+            f.write(records)
+
+
+# --------------------------------------------------------------------
+# Writes binary PLY file of the core mesh builder task
+# task - (typename, *args) as given to build_mesh_data
+# --------------------------------------------------------------------
+def write_ply(filepath, task, matrix=None, triangulate=True):
+    write_packed_ply(filepath, build_packed_mesh_data(*task), matrix, triangulate)
+
+
+# --------------------------------------------------------------------
+# Writes binary STL file of the core mesh builder task
+# task - (typename, *args) as given to build_mesh_data
+# --------------------------------------------------------------------
+def write_stl(filepath, task, matrix=None):
+    write_packed_stl(filepath, build_packed_mesh_data(*task), matrix)
+
+
+# --------------------------------------------------------------------
+# Builds mesh data of the task once and writes all files of the group
+# items - list of (filepath, matrix)
+# --------------------------------------------------------------------
+def write_mesh_file_group(task, items, file_format):
+    packed = build_packed_mesh_data(*task)
+    for (filepath, matrix) in items:
+        if file_format == 'PLY':
+            write_packed_ply(filepath, packed, matrix)
+        else:
+            write_packed_stl(filepath, packed, matrix)
+
+
+# --------------------------------------------------------------------
+# Writes every object into its own file (<directory>/<name>.ply|.stl)
+# objects - iterable of (name, task, matrix), as in write_obj
+# file_format - 'PLY' or 'STL'
+# threads - files written at once, equal tasks are built only once
+# Returns written file paths
+# --------------------------------------------------------------------
+def write_mesh_files(directory, objects, file_format='STL', threads=4):
+    groups = OrderedDict()
+    for (name, task, matrix) in objects:
+        filepath = path.join(directory, name + print_file_extensions[file_format])
+        groups.setdefault(task, []).append((filepath, matrix))
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(write_mesh_file_group, task, items, file_format)
+                   for (task, items) in groups.items()]
+        for future in futures:
+            # raises errors of the writes
+            future.result()
+    return [filepath for items in groups.values() for (filepath, matrix) in items]
@@ -0,0 +1,608 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+from math import sin
+import numpy as np
+from .geometry import *
+from .library import *
+from .mesh_ops import *
+from .profile import profile_phase
+
+# Mesh library entries of the library based generators
+glass_library_mesh = 'Glass01'
+bench_library_mesh = 'BenchN'
+
+# Meshes keeping the generated face orientation (no normals recalculation)
+unoriented_meshes = {'room'}
+
+
+# ------------------------------------------------------------------------------
+# Creates room mesh data.
+# ------------------------------------------------------------------------------
+def generate_room_mesh_data(height, walls, has_floor, has_ceiling):
+    myvertices = None
+    myfaces = []
+
+    lwalls = len(walls)
+    lastwi = 0
+    lastdepth = 0
+    lastp = (0.0, 0.0, 0.0)
+    lastpnorm = (1.0, 0.0, 0.0)
+    for (wall_width, wall_depth, wall_angle) in walls:
+        pnorm = rotate_point3d_rad(lastpnorm, anglez=wall_angle)
+        p1 = [
+            lastp[0] + pnorm[0] * wall_width,
+            lastp[1] + pnorm[1] * wall_width,
+            lastp[2] + pnorm[2] * wall_width
+        ]
+        wdepth = wall_depth / 2
+        wdp = (-pnorm[1] * wdepth, pnorm[0] * wdepth, 0.0)
+        if myvertices is None:  # First wall
+            myvertices = [
+                (-wdp[0], -wdp[1], 0.0),
+                (-wdp[0], -wdp[1], height),
+                ( wdp[0],  wdp[1], 0.0),
+                ( wdp[0],  wdp[1], height)
+            ]
+            myfaces.extend([
+                [0, 1, 3, 2]
+            ])
+            myfaces.extend([
+                [lastwi * 4 + 0, lastwi * 4 + 2, lastwi * 4 + 6, lastwi * 4 + 4],  # bottom
+                [lastwi * 4 + 0, lastwi * 4 + 4, lastwi * 4 + 5, lastwi * 4 + 1],  # outer
+                [lastwi * 4 + 1, lastwi * 4 + 5, lastwi * 4 + 7, lastwi * 4 + 3],  # top
+                [lastwi * 4 + 2, lastwi * 4 + 3, lastwi * 4 + 7, lastwi * 4 + 6]   # inner
+            ])
+        else:  # Wall not first
+            sinwa = sin(wall_angle)
+            crosswdp = (wdp[0], wdp[1], 0.0)
+            if not sinwa == 0:  # angle = 0
+                crosswdp = tuple(
+                    (h1 * -wdepth + h2 * lastdepth) / sinwa
+                    for (h1, h2) in zip(lastpnorm, pnorm)
+                )
+            myvertices.extend([
+                (lastp[0]-crosswdp[0], lastp[1]-crosswdp[1], 0.0),
+                (lastp[0]-crosswdp[0], lastp[1]-crosswdp[1], height),
+                (lastp[0]+crosswdp[0], lastp[1]+crosswdp[1], 0.0),
+                (lastp[0]+crosswdp[0], lastp[1]+crosswdp[1], height)
+            ])
+            myfaces.extend([
+                [lastwi * 4 + 0, lastwi * 4 + 2, lastwi * 4 + 6, lastwi * 4 + 4],  # bottom
+                [lastwi * 4 + 0, lastwi * 4 + 4, lastwi * 4 + 5, lastwi * 4 + 1],  # outer
+                [lastwi * 4 + 1, lastwi * 4 + 5, lastwi * 4 + 7, lastwi * 4 + 3],  # top
+                [lastwi * 4 + 2, lastwi * 4 + 3, lastwi * 4 + 7, lastwi * 4 + 6]   # inner
+            ])
+        if lwalls == lastwi + 1:  # Last wall
+            myvertices.extend([
+                (p1[0]-wdp[0], p1[1]-wdp[1], 0.0),
+                (p1[0]-wdp[0], p1[1]-wdp[1], height),
+                (p1[0]+wdp[0], p1[1]+wdp[1], 0.0),
+                (p1[0]+wdp[0], p1[1]+wdp[1], height)
+            ])
+            myfaces.extend([
+                [lastwi * 4 + 5, lastwi * 4 + 4, lastwi * 4 + 6, lastwi * 4 + 7]
+            ])
+        lastwi = lastwi + 1
+        lastpnorm = pnorm
+        lastp = p1
+        lastdepth = wdepth
+
+    if has_floor and lwalls > 1:
+        floorverts = []
+        for wno in range(lwalls):
+            floorverts.append(wno * 4 + 2)
+        floorverts.append(lwalls * 4 + 2)
+        myfaces.append(floorverts)
+
+    if has_ceiling and lwalls > 1:
+        ceilingverts = []
+        for wno in range(lwalls, 0, -1):
+            ceilingverts.append(wno * 4 + 3)
+        ceilingverts.append(0 * 4 + 3)
+        myfaces.append(ceilingverts)
+
+    return myvertices, [], myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates stairs mesh data.
+# ------------------------------------------------------------------------------
+def generate_stairs_mesh_data(width, unit_count, unit_run, unit_raise):
+    myvertices = []
+    myfaces = []
+    lastp = (-width / 2.0, 0.0, 0.0)
+    myvertices.extend([
+        (-width / 2.00, lastp[1], lastp[2]),
+        (width / 2.0, lastp[1], lastp[2]),
+    ])
+    for ut in range(unit_count):
+        p1 = (-width / 2.0, lastp[1] + unit_run, lastp[2] + unit_raise)
+        myvertices.extend([
+            (-width / 2.0, lastp[1], p1[2]),
+            (width / 2.0, lastp[1], p1[2]),
+            (-width / 2.0, p1[1], p1[2]),
+            (width / 2.0, p1[1], p1[2]),
+        ])
+        myfaces.extend([
+            (ut*4 + 0, ut*4 + 1, ut*4 + 3, ut*4 + 2),
+            (ut*4 + 2, ut*4 + 3, ut*4 + 5, ut*4 + 4)
+        ])
+        lastp = p1
+
+    return myvertices, [], myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates wall mesh data.
+# ------------------------------------------------------------------------------
+def generate_wall_mesh_data(width, height):
+    sizew = width
+    sizez = height
+    posw = width
+    posz = height
+
+    myvertices = [(0.0, 0.0, 0.0), (0.0, 0.0, posz),]
+    myvertices.extend([(posw, 0.0, 0.0), (posw, 0.0, posz)])
+    myfaces = [(0, 1, 3, 2)]
+
+    return myvertices, [], myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates shelve mesh data.
+# ------------------------------------------------------------------------------
+def generate_shelve_mesh_data(width, height, depth, thickness):
+    basethick = thickness / 2
+    posx = width / 2
+    posy = depth / 2
+    posz = height + basethick
+
+    myvertices = [
+        (-posx, -posy, basethick), (posx, -posy, basethick),
+        (-posx, posy, basethick), (posx, posy, basethick),
+        (-posx, -posy, posz), (posx, -posy, posz),
+        (-posx, posy, posz), (posx, posy, posz)]
+
+    thickdiff = (thickness / 2) + 0.001
+    myvertices.extend([
+        (-posx + thickdiff, -posy + thickdiff, basethick + thickdiff),
+        (posx - thickdiff, -posy + thickdiff, basethick + thickdiff),
+        (-posx + thickdiff, -posy + thickdiff, posz - thickdiff),
+        (posx - thickdiff, -posy + thickdiff, posz - thickdiff)
+    ])
+
+    myfaces = [
+        (0, 1, 3, 2),
+        (0, 4, 6, 2),
+        (1, 5, 7, 3),
+        (2, 3, 7, 6),
+        (4, 5, 7, 6),
+
+        (8, 9, 11, 10)
+    ]
+
+    return myvertices, [], myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates glass mesh data.
+# ------------------------------------------------------------------------------
+def generate_glass_mesh_data(diameter, height, segments):
+    (myvertices, myedges, myfaces) = generate_mesh_from_library(
+        glass_library_mesh,
+        size=(diameter, diameter, height),
+        segments=segments
+    )
+
+    return myvertices, myedges, myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates plate mesh data.
+# ------------------------------------------------------------------------------
+def generate_plate_mesh_data(diameter, height, segments, type):
+    if type is None:
+        mytype = 'Plate01'
+    else:
+        mytype = type
+
+    (myvertices, myedges, myfaces) = generate_mesh_from_library(
+        mytype,
+        size=(diameter, diameter, height),
+        segments=segments
+    )
+
+    return myvertices, myedges, myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates bench mesh data.
+# ------------------------------------------------------------------------------
+def generate_bench_mesh_data(width, height, depth):
+    (myvertices, myedges, myfaces) = generate_mesh_from_library(
+        bench_library_mesh,
+        size=(width, depth, height)
+    )
+
+    return myvertices, myedges, myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates circle mesh data.
+# ------------------------------------------------------------------------------
+def generate_circle_mesh_data(radius, vertices, fill_type, trunc_val):
+    if fill_type == 'NONE':
+        (myvertices, myedges, myfaces) = \
+            generate_circle_nofill_mesh_data(radius, vertices)
+    if fill_type == 'NGON':
+        (myvertices, myedges, myfaces) = \
+            generate_circle_ngonfill_mesh_data(radius, vertices, trunc_val)
+    if fill_type == 'TRIF':
+        (myvertices, myedges, myfaces) = \
+            generate_circle_tfanfill_mesh_data(radius, vertices)
+
+    return myvertices, myedges, myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates sphere mesh data.
+# ------------------------------------------------------------------------------
+def generate_sphere_mesh_data(radius, type, segments, rings, subdivisions):
+    if type == 'UV':
+        (myvertices, myedges, myfaces) = \
+            generate_sphere_uv_mesh_data(radius, segments, rings)
+    if type == 'ICO':
+        (myvertices, myedges, myfaces) = \
+            generate_sphere_ico_mesh_data(radius, subdivisions)
+
+    return myvertices, myedges, myfaces
+
+
+
+# ------------------------------------------------------------------------------
+# Creates circle filled with ngon mesh data.
+# ------------------------------------------------------------------------------
+def generate_circle_ngonfill_mesh_data(radius, vertices, trunc_val):
+    deltaAngle = 360 / vertices
+    myvertices = []
+    myfaces = [list(range(vertices))]
+    for t in range(vertices):
+        v1 = rotate_point2d(radius, 0.0, t * deltaAngle)
+        myvertices.append((v1[0], v1[1], 0.0))
+    if trunc_val > 0.0:
+        (myvertices, myfaces) = truncate_circle_mesh(myvertices, myfaces, trunc_val)
+    return myvertices, [], myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates circle witout filling mesh data.
+# ------------------------------------------------------------------------------
+def generate_circle_nofill_mesh_data(radius, vertices):
+    deltaAngle = 360 / vertices
+    myvertices = []
+    myedges = []
+    for t in range(vertices):
+        v1 = rotate_point2d(radius, 0.0, t * deltaAngle)
+        myvertices.append((v1[0], v1[1], 0.0))
+        myedges.append((t, ((t+1) % vertices)))
+    return myvertices, myedges, []
+
+
+# ------------------------------------------------------------------------------
+# Creates circle filled with triangle fan mesh data.
+# ------------------------------------------------------------------------------
+def generate_circle_tfanfill_mesh_data(radius, vertices):
+    deltaAngle = 360 / vertices
+    myvertices = []
+    myfaces = []
+    myvertices.append((0.0, 0.0, 0.0))
+    for t in range(vertices):
+        v1 = rotate_point2d(radius, 0.0, t * deltaAngle)
+        myvertices.append((v1[0], v1[1], 0.0))
+        myfaces.append((0, t+1, ((t+1) % vertices) + 1))
+    return myvertices, [], myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates cube mesh data.
+# ------------------------------------------------------------------------------
+def generate_cube_mesh_data(width, height, depth):
+    posx = width / 2
+    posy = depth / 2
+    posz = height / 2
+    myvertices = [(-posx, -posy, -posz), (posx, -posy, -posz),
+                  (-posx, posy, -posz), (posx, posy, -posz),
+                  (-posx, -posy, posz), (posx, -posy, posz),
+                  (-posx, posy, posz), (posx, posy, posz)]
+    myfaces = [(0, 1, 3, 2),
+               (0, 1, 5, 4),
+               (0, 4, 6, 2),
+               (1, 5, 7, 3),
+               (2, 3, 7, 6),
+               (4, 5, 7, 6)]
+    return myvertices, [], myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates plane mesh data.
+# ------------------------------------------------------------------------------
+def generate_plane_mesh_data(width, height):
+    posx = width / 2
+    posy = height / 2
+    myvertices = [(-posx, -posy, 0.0), (posx, -posy, 0.0),
+                  (-posx, posy, 0.0), (posx, posy, 0.0)]
+    myfaces = [(0, 1, 3, 2)]
+    return myvertices, [], myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates ico sphere mesh data.
+# ------------------------------------------------------------------------------
+def generate_sphere_ico_mesh_data(radius, subdivisions):
+    myvertices = []
+    myfaces = []
+    segments = 5
+    topv = range(1, segments + 1)
+    botv = range(segments + 1, segments * 2 + 1)
+    sDeltaAngle = 360 / segments
+    p1 = (0.2764 * radius, 0.8506 * radius, 0.4472 * radius)
+    p2 = (0.7236 * radius, 0.5257 * radius, -0.4472 * radius)
+    myvertices.append((0.0000, 0.0000, radius))
+    lastv = topv[-1]
+    for ts in topv:
+        v1 = rotate_point3d(p1, anglez=(ts * sDeltaAngle))
+        myvertices.append(v1)
+        myfaces.append((0, lastv, ts))
+        myfaces.append((lastv, ts, ts + segments))
+        lastv = ts
+    lastv = botv[-1]
+    for ts in botv:
+        v1 = rotate_point3d(p2, anglez=(ts * sDeltaAngle))
+        myvertices.append(v1)
+        myfaces.append((lastv, ts, lastv - segments))
+        myfaces.append((11, lastv, ts))
+        lastv = ts
+    myvertices.append((0.0000, 0.0000, -radius))
+    if subdivisions <= 1:
+        return myvertices, [], myfaces
+    # finer levels are subdivided on arrays, as subdivide_icosphere_mesh
+    coords = np.array(myvertices, dtype=np.float64)
+    faces = np.array(myfaces, dtype=np.int64)
+    for ts in range(1, subdivisions):
+        (coords, faces) = subdivide_packed_icosphere(coords, faces, radius)
+    return coords, [], faces
+
+
+# ------------------------------------------------------------------------------
+# Subdivides ico sphere given as arrays, vertices (N, 3), faces (F, 3)
+# Vertices and faces are ordered as by subdivide_icosphere_mesh
+# ------------------------------------------------------------------------------
+def subdivide_packed_icosphere(coords, faces, radius):
+    vertnum = len(coords)
+    # face edges in the subdivide_icosphere_mesh order, (f2, f0), (f0, f1), (f1, f2)
+    starts = faces[:, [2, 0, 1]].ravel()
+    ends = faces.ravel()
+    keys = np.minimum(starts, ends) * vertnum + np.maximum(starts, ends)
+    (first, inverse) = np.unique(keys, return_index=True, return_inverse=True)[1:]
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    midpoints = (vertnum + rank[inverse.ravel()]).reshape(-1, 3)
+    del keys, inverse, rank
+
+    (s, e) = (coords[starts[first[order]]], coords[ends[first[order]]])
+    newcoords = e + (s - e) * 0.5
+    lengths = np.sqrt((newcoords * newcoords).sum(axis=1))
+    newcoords = newcoords * radius / lengths[:, None]
+    myfaces = np.stack([
+        midpoints,
+        np.stack([midpoints[:, 0], midpoints[:, 1], faces[:, 0]], axis=1),
+        np.stack([midpoints[:, 1], midpoints[:, 2], faces[:, 1]], axis=1),
+        np.stack([midpoints[:, 2], midpoints[:, 0], faces[:, 2]], axis=1),
+    ], axis=1).reshape(-1, 3)
+    return np.concatenate([coords, newcoords]), myfaces
+
+
+# ------------------------------------------------------------------------------
+# Creates uv sphere mesh data.
+# ------------------------------------------------------------------------------
+def generate_sphere_uv_mesh_data(radius, segments, rings):
+    myvertices = []
+    myfaces = []
+    segv = range(segments)
+    sDeltaAngle = 360 / segments
+    rDeltaAngle = 180 / rings
+    p = (0.0, 0.0, radius)
+    lastr = 0
+    for tr in range(rings + 1):
+        lastv = segv[-1]
+        for ts in segv:
+            p1 = rotate_point3d(p, anglex=(tr * rDeltaAngle), anglez=(ts * sDeltaAngle))
+            myvertices.append(p1)
+            if tr > 0:
+                myfaces.append((
+                    lastr * segments + lastv,
+                    lastr * segments + ts,
+                    tr * segments + ts,
+                    tr * segments + lastv
+                ))
+                lastv = ts
+        lastr = tr
+    return myvertices, [], myfaces
+
+
+# --------------------------------------------------------------------
+# Creates mesh based on meshes library data
+# size - vector defines size in 3 axes
+# segments - amount of segments to create circular mesh
+# --------------------------------------------------------------------
+def generate_mesh_from_library(meshname, size=(1.0, 1.0, 1.0), segments=32):
+    meshdata = load_mesh_data_from_library(meshname)
+    if meshdata is not None:
+        mlsize = meshdata['RealSize']
+        mlvertices = meshdata['Vertices']
+        myedges = meshdata['Edges']
+        myfaces = meshdata['Faces']
+        myvertices = []
+        for mlv in mlvertices:
+            myvertices.append((
+                mlv[0] * size[0] / mlsize[0],
+                mlv[1] * size[1] / mlsize[1],
+                mlv[2] * size[2] / mlsize[2]
+            ))
+        if meshdata['ConstructMethod'] == 'SoR_D':
+            myvertices, myedges, myfaces = generate_sord_mesh(myvertices, myedges, segments)
+            return myvertices, myedges, myfaces
+        if meshdata['ConstructMethod'] == 'SoR_C':
+            return [], [], []
+        if meshdata['ConstructMethod'] == 'Math':
+            return [], [], []
+        return myvertices, myedges, myfaces
+    return None
+
+
+# --------------------------------------------------------------------
+# Creates Solid of Revolution mesh based on meshes library data
+# sordvertices - mesh profile vertices
+# sordedges - mesh profile edges
+# segments - amount of segments to create circular mesh base
+# --------------------------------------------------------------------
+def generate_sord_profile_mesh(sordvertices, sordedges, segments):
+    return sordvertices, sordedges, []
+
+
+# --------------------------------------------------------------------
+# Creates Solid of Revolution mesh based on meshes library data
+# sordvertices - mesh profile vertices
+# sordedges - mesh profile edges
+# segments - amount of segments to create circular mesh base
+# --------------------------------------------------------------------
+def generate_sord_mesh(sordvertices, sordedges, segments, close_top=True, close_bottom=True):
+    myvertices = []
+    myedges = []
+    myfaces = []
+    segv = range(segments)
+    segh = len(sordvertices)
+    sDeltaAngle = 360 / segments
+    for ts in segv:
+        for tv in sordvertices:
+            p1 = rotate_point3d(tv, anglez=(ts * sDeltaAngle))
+            myvertices.append(p1)
+    lasts = segv[-1]
+    for ts in segv:
+        for te in sordedges:
+            myfaces.append((
+                te[0] + (lasts * segh),
+                te[1] + (lasts * segh),
+                te[1] + (ts * segh),
+                te[0] + (ts * segh),
+            ))
+        lasts = ts
+    if close_top or close_bottom:
+        ends = set()
+        for te in sordedges:
+            if te[0] not in ends:
+                ends.add(te[0])
+            else:
+                ends.remove(te[0])
+            if te[1] not in ends:
+                ends.add(te[1])
+            else:
+                ends.remove(te[1])
+        topv = ends.pop()
+        bottomv = ends.pop()
+        if myvertices[topv][2] < myvertices[bottomv][2]:
+            (topv, bottomv) = (bottomv, topv)
+        topf = []
+        bottomf = []
+        for ts in segv:
+            topf.append(ts * segh + topv)
+            bottomf.append(ts * segh + bottomv)
+        if close_top:
+            myfaces.append(topf)
+        if close_bottom:
+            myfaces.append(bottomf)
+    return myvertices, myedges, myfaces
+
+
+# --------------------------------------------------------------------
+# Mesh data generators by ArchLab object type
+# --------------------------------------------------------------------
+mesh_generators = {
+    'room': generate_room_mesh_data,
+    'stairs': generate_stairs_mesh_data,
+    'wall': generate_wall_mesh_data,
+    'shelve': generate_shelve_mesh_data,
+    'glass': generate_glass_mesh_data,
+    'plate': generate_plate_mesh_data,
+    'bench': generate_bench_mesh_data,
+    'circle': generate_circle_mesh_data,
+    'cube': generate_cube_mesh_data,
+    'plane': generate_plane_mesh_data,
+    'sphere': generate_sphere_mesh_data,
+}
+
+
+# --------------------------------------------------------------------
+# Builds final mesh data of the ArchLab object type as packed float64 and
+# int64 arrays, generated data is welded and normals are made consistent
+# on arrays (no Python objects per vertex after generation)
+# --------------------------------------------------------------------
+def build_mesh_arrays(typename, *args):
+    with profile_phase('generate'):
+        mesh_data = mesh_generators[typename](*args)
+    with profile_phase('pack'):
+        packed = pack_mesh_data(*mesh_data, float_type=np.float64, int_type=np.int64)
+    del mesh_data
+    with profile_phase('weld'):
+        (coords, edges, loop_totals, loop_indices) = weld_packed_mesh_data(*packed)
+    del packed
+    if typename not in unoriented_meshes:
+        with profile_phase('normals'):
+            loop_indices = make_packed_normals_consistent(coords, loop_totals, loop_indices)
+    return coords, edges, loop_totals, loop_indices
+
+
+# --------------------------------------------------------------------
+# Builds final mesh data of the ArchLab object type
+# Generated data is welded and normals are made consistent
+# --------------------------------------------------------------------
+def build_mesh_data(typename, *args):
+    return unpack_mesh_data(*build_mesh_arrays(typename, *args))
+
+
+# --------------------------------------------------------------------
+# Builds final mesh data of the ArchLab object type as flat arrays
+# (see pack_mesh_data), used for bulk writes and process handoff
+# --------------------------------------------------------------------
+def build_packed_mesh_data(typename, *args):
+    (coords, edges, loop_totals, loop_indices) = build_mesh_arrays(typename, *args)
+    return (coords.astype(np.float32), edges.astype(np.int32),
+            loop_totals.astype(np.int32), loop_indices.astype(np.int32))
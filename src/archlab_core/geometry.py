@@ -0,0 +1,190 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+from math import sin, cos, radians, sqrt
+
+
+# --------------------------------------------------------------------
+# Rotates a point in 2D space with specified angle
+# --------------------------------------------------------------------
+def rotate_point2d(posx, posy, angle):
+    rada1 = radians(angle)
+    cosa1 = cos(rada1)
+    sina1 = sin(rada1)
+    return (cosa1 * posx - sina1 * posy, sina1 * posx + cosa1 * posy)
+
+
+# --------------------------------------------------------------------
+# Rotates a point in 3D space with specified angle in deg
+# --------------------------------------------------------------------
+def rotate_point3d(pos, anglex=0.0, angley=0.0, anglez=0.0):
+    return rotate_point3d_rad(
+        pos,
+        anglex=radians(anglex),
+        angley=radians(angley),
+        anglez=radians(anglez)
+    )
+
+
+# --------------------------------------------------------------------
+# Rotates a point in 3D space with specified angle in radians
+# Euler XYZ order, rotation around X axis is applied first
+# --------------------------------------------------------------------
+def rotate_point3d_rad(pos, anglex=0.0, angley=0.0, anglez=0.0):
+    (posx, posy, posz) = pos
+    if anglex != 0.0:
+        (cosa, sina) = (cos(anglex), sin(anglex))
+        (posy, posz) = (cosa * posy - sina * posz, sina * posy + cosa * posz)
+    if angley != 0.0:
+        (cosa, sina) = (cos(angley), sin(angley))
+        (posx, posz) = (cosa * posx + sina * posz, cosa * posz - sina * posx)
+    if anglez != 0.0:
+        (cosa, sina) = (cos(anglez), sin(anglez))
+        (posx, posy) = (cosa * posx - sina * posy, sina * posx + cosa * posy)
+    return (posx, posy, posz)
+
+
+# --------------------------------------------------------------------
+# Moves a point from the end point towards the start point
+# --------------------------------------------------------------------
+def slide_point3d(startpoint, endpoint, scale):
+    return tuple(e + (s - e) * scale for (s, e) in zip(startpoint, endpoint))
+
+
+# --------------------------------------------------------------------
+# Gets 4x4 object matrix (rows) of location, rotation in radians
+# (Euler XYZ, as rotate_point3d_rad) and scale
+# --------------------------------------------------------------------
+def get_transform_matrix(location=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0),
+                         scale=(1.0, 1.0, 1.0)):
+    (anglex, angley, anglez) = rotation
+    columns = []
+    for t in range(3):
+        axis = [0.0, 0.0, 0.0]
+        axis[t] = scale[t]
+        columns.append(rotate_point3d_rad(axis, anglex, angley, anglez))
+    return tuple(
+        tuple(columns[c][r] for c in range(3)) + (location[r],) for r in range(3)
+    ) + ((0.0, 0.0, 0.0, 1.0),)
+
+
+# --------------------------------------------------------------------
+# Splits 4x4 object matrix (rows) into location, rotation quaternion
+# (x, y, z, w) and scale, shear is not supported
+# --------------------------------------------------------------------
+def decompose_matrix(matrix):
+    location = tuple(matrix[r][3] for r in range(3))
+    columns = [[matrix[r][c] for r in range(3)] for c in range(3)]
+    scale = [sqrt(sum(v * v for v in column)) for column in columns]
+    determinant = (
+        columns[0][0] * (columns[1][1] * columns[2][2] - columns[2][1] * columns[1][2]) -
+        columns[1][0] * (columns[0][1] * columns[2][2] - columns[2][1] * columns[0][2]) +
+        columns[2][0] * (columns[0][1] * columns[1][2] - columns[1][1] * columns[0][2])
+    )
+    if determinant < 0.0:
+        scale[0] = -scale[0]
+    # rotation matrix element m[r][c]
+    m = [[columns[c][r] / scale[c] if scale[c] != 0.0 else 0.0 for c in range(3)] for r in range(3)]
+    trace = m[0][0] + m[1][1] + m[2][2]
+    if trace > 0.0:
+        k = 0.5 / sqrt(trace + 1.0)
+        rotation = ((m[2][1] - m[1][2]) * k, (m[0][2] - m[2][0]) * k,
+                    (m[1][0] - m[0][1]) * k, 0.25 / k)
+    elif m[0][0] > m[1][1] and m[0][0] > m[2][2]:
+        k = 2.0 * sqrt(max(0.0, 1.0 + m[0][0] - m[1][1] - m[2][2]))
+        rotation = (0.25 * k, (m[0][1] + m[1][0]) / k,
+                    (m[0][2] + m[2][0]) / k, (m[2][1] - m[1][2]) / k)
+    elif m[1][1] > m[2][2]:
+        k = 2.0 * sqrt(max(0.0, 1.0 + m[1][1] - m[0][0] - m[2][2]))
+        rotation = ((m[0][1] + m[1][0]) / k, 0.25 * k,
+                    (m[1][2] + m[2][1]) / k, (m[0][2] - m[2][0]) / k)
+    else:
+        k = 2.0 * sqrt(max(0.0, 1.0 + m[2][2] - m[0][0] - m[1][1]))
+        rotation = ((m[0][2] + m[2][0]) / k, (m[1][2] + m[2][1]) / k,
+                    0.25 * k, (m[1][0] - m[0][1]) / k)
+    return location, resize_vector(rotation), tuple(scale)
+
+
+# --------------------------------------------------------------------
+# Scales a vector to the specified length
+# --------------------------------------------------------------------
+def resize_vector(vector, length=1.0):
+    veclen = sqrt(sum(c * c for c in vector))
+    if veclen == 0.0:
+        return tuple(vector)
+    return tuple(c * length / veclen for c in vector)
+
+
+# -----------------------------------------------------
+# Truncate circle ngon mesh
+# -----------------------------------------------------
+def truncate_circle_mesh(verts, faces, trunc_val):
+    myverts = []
+    vertnum = len(verts)
+    tscal = 0.5 * trunc_val
+    for t in range(vertnum):
+        pprev = verts[(t+vertnum-1) % vertnum]
+        p1 = verts[t]
+        pnext = verts[(t+1) % vertnum]
+        v1 = slide_point3d(pprev, p1, tscal)
+        v2 = slide_point3d(pnext, p1, tscal)
+        myverts.append((v1))
+        myverts.append((v2))
+    myfaces = [list(range(len(myverts)))]
+    return myverts, myfaces
+
+
+# -----------------------------------------------------
+# Subdivide ico sphere mesh
+# Faces sharing an edge share its midpoint, no doubles are made
+# -----------------------------------------------------
+def subdivide_icosphere_mesh(verts, faces, radius):
+    myverts = verts
+    myfaces = []
+    vertnum = len(verts)
+    # edge (as int key of the sorted vertex pair): midpoint vertex index
+    midpoints = {}
+    for f in faces:
+        laste = f[-1]
+        newface = []
+        for ts in range(len(f)):
+            key = min(laste, f[ts]) * vertnum + max(laste, f[ts])
+            midpoint = midpoints.get(key)
+            if midpoint is None:
+                v1 = slide_point3d(verts[laste], verts[f[ts]], 0.5)
+                v1 = resize_vector(v1, radius)
+                midpoint = midpoints[key] = len(myverts)
+                myverts.append(v1)
+            newface.append(midpoint)
+            laste = f[ts]
+        myfaces.append((newface[0], newface[1], newface[2]))
+        myfaces.append((newface[0], newface[1], f[0]))
+        myfaces.append((newface[1], newface[2], f[1]))
+        myfaces.append((newface[2], newface[0], f[2]))
+    return myverts, myfaces
@@ -0,0 +1,82 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+import hashlib
+import json
+from os import path
+
+# Parsed mesh library files (path -> data), the library is read only once
+meshlibrary_cache = {}
+
+# Versions of mesh library entries, mesh name: (entry data, version)
+meshlibrary_versions = {}
+
+
+# --------------------------------------------------------------------
+# Gets mesh data from json file
+# --------------------------------------------------------------------
+def load_mesh_data_from_library(meshname):
+    meshlibrary = load_meshlibrary_data()
+    return meshlibrary['Meshes'][meshname]
+
+
+# --------------------------------------------------------------------
+# Gets version of the mesh library entry, changes with the entry data
+# --------------------------------------------------------------------
+def get_meshlibrary_entry_version(meshname):
+    meshdata = load_mesh_data_from_library(meshname)
+    (versiondata, version) = meshlibrary_versions.get(meshname, (None, None))
+    if versiondata is not meshdata:
+        # the entry is serialized once per loaded library, not per rebuild
+        data = json.dumps(meshdata, sort_keys=True)
+        version = hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+        meshlibrary_versions[meshname] = (meshdata, version)
+    return version
+
+
+# --------------------------------------------------------------------
+# Loads meshes json file
+# --------------------------------------------------------------------
+def load_meshlibrary_data(library_path=None):
+    if library_path is None:
+        library_path = get_meshlibrary_path()
+    json_data = meshlibrary_cache.get(library_path)
+    if json_data is None:
+        with open(library_path, 'r') as f:
+            json_data = json.load(f)
+        meshlibrary_cache[library_path] = json_data
+    return json_data
+
+
+# --------------------------------------------------------------------
+# Gets mesh library file path, stored in the addon data folder
+# --------------------------------------------------------------------
+def get_meshlibrary_path():
+    addon_directory = path.dirname(path.dirname(path.realpath(__file__)))
+    return path.join(addon_directory, "data", "meshes.json")
@@ -0,0 +1,553 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+from array import array
+import numpy as np
+
+
+# --------------------------------------------------------------------
+# Merges vertices closer than distance (remove doubles)
+# Vertices rounding to the same point of a grid of distance spacing are
+# merged into the first one, the first vertices of the grid points are
+# merged when closer than distance (see get_weld_targets), so doubles
+# split by the rounding are merged too. Vertex order of the kept
+# vertices is kept, collapsed faces and edges are removed
+# --------------------------------------------------------------------
+def weld_mesh_data(vertices, edges, faces, distance=0.0001):
+    if len(vertices) == 0:
+        return vertices, edges, faces
+    packed = pack_mesh_data(vertices, edges, faces, float_type=np.float64, int_type=np.int64)
+    return unpack_mesh_data(*weld_packed_mesh_data(*packed, distance=distance))
+
+
+# --------------------------------------------------------------------
+# Cell offsets checked for close vertices, each pair of neighbor cells
+# is visited once (the cell itself and half of the 26 neighbors)
+# --------------------------------------------------------------------
+weld_cell_offsets = [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)
+                     if (x, y, z) >= (0, 0, 0)]
+
+
+# --------------------------------------------------------------------
+# Gets linear keys of grid cells (N, 3) for strides of the grid axes,
+# equal cells give equal keys and neighbor keys only differ by the
+# key of the offset. Keys wrap on very large grids, colliding cells
+# only add candidates
+# --------------------------------------------------------------------
+def get_cell_keys(cells, strides):
+    return (cells * strides).sum(axis=-1)
+
+
+# --------------------------------------------------------------------
+# Gets pairs of vertices (a, b) closer than distance, as two arrays
+# Vertices are bucketed in cells of the distance size, only vertices
+# of the same and of neighbor cells are compared
+# --------------------------------------------------------------------
+def find_close_vertices(coords, distance):
+    cells = np.floor(coords / distance).astype(np.int64)
+    # cells start at 1 so neighbor cells stay inside the strides
+    cells -= cells.min(axis=0) - 1
+    sizes = [int(size) + 3 for size in cells.max(axis=0)]
+    strides = np.array([(sizes[1] * sizes[2]) % 2 ** 64, sizes[2], 1], dtype=np.uint64).astype(np.int64)
+    keys = get_cell_keys(cells, strides)
+    order = np.argsort(keys, kind='stable')
+    samecells = (cells[order[1:]] == cells[order[:-1]]).all(axis=1)
+    if (~samecells & (keys[order[1:]] == keys[order[:-1]])).any():
+        # colliding cells are sorted apart, equal keys stay together
+        order = np.lexsort((cells[:, 2], cells[:, 1], cells[:, 0], keys))
+        samecells = (cells[order[1:]] == cells[order[:-1]]).all(axis=1)
+    # vertices of a cell are a run of the sorted order
+    starts = np.flatnonzero(np.r_[True, ~samecells])
+    del samecells
+    counts = np.diff(np.r_[starts, len(order)])
+    cellkeys = keys[order[starts]]
+    del keys, cells
+    (first, second) = ([], [])
+    for offset in weld_cell_offsets:
+        # occupied neighbor cells are looked up per cell, not per vertex,
+        # all cells of the key are taken (colliding cells only add pairs)
+        if offset == (0, 0, 0):
+            groups = np.flatnonzero(counts > 1)
+            neighbors = groups
+        else:
+            targetkeys = cellkeys + get_cell_keys(np.array(offset), strides)
+            lefts = np.searchsorted(cellkeys, targetkeys, side='left')
+            found = np.searchsorted(cellkeys, targetkeys, side='right') - lefts
+            del targetkeys
+            groups = np.repeat(np.arange(len(cellkeys)), found)
+            neighbors = lefts[groups] + np.arange(len(groups)) - np.repeat(np.cumsum(found) - found, found)
+            del lefts, found
+        if len(groups) == 0:
+            continue
+        # every vertex of the cell is paired with every vertex of the neighbor
+        (groupcounts, neighborcounts) = (counts[groups], counts[neighbors])
+        sizes = groupcounts * neighborcounts
+        pairs = np.repeat(np.arange(len(groups)), sizes)
+        items = np.arange(len(pairs)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        a = order[starts[groups][pairs] + items // neighborcounts[pairs]]
+        b = order[starts[neighbors][pairs] + items % neighborcounts[pairs]]
+        del pairs, items
+        offsets = coords[a] - coords[b]
+        close = (a != b) & ((offsets * offsets).sum(axis=1) <= distance * distance)
+        del offsets
+        first.append(a[close])
+        second.append(b[close])
+    if not first:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(first), np.concatenate(second)
+
+
+# --------------------------------------------------------------------
+# Gets weld target of every vertex (itself when kept)
+# Vertices are visited in order, every vertex is merged into the first
+# kept vertex closer than distance, or kept when there is none. Merging
+# is not chained, vertices spaced just under distance keep every other one
+# --------------------------------------------------------------------
+def get_weld_targets(coords, distance):
+    vertnum = len(coords)
+    targets = np.arange(vertnum)
+    (a, b) = find_close_vertices(coords, distance)
+    if len(a) == 0:
+        return targets
+    # close pairs sorted by the later vertex, then by the earlier one
+    keys = np.unique(np.maximum(a, b) * vertnum + np.minimum(a, b))
+    del a, b
+    (later, earlier) = (keys // vertnum, keys % vertnum)
+    del keys
+    firsts = np.r_[True, later[1:] != later[:-1]]
+    (merged, lowest) = (later[firsts], earlier[firsts])
+    roots = np.ones(vertnum, dtype=bool)
+    roots[merged] = False
+    # the lowest close vertex is kept when it has no close vertex before it
+    simple = roots[lowest]
+    targets[merged[simple]] = lowest[simple]
+
+    # chains of close vertices are resolved in order
+    rest = merged[~simple]
+    if len(rest):
+        kept = bytearray(roots.astype(np.uint8).tobytes())
+        starts = np.searchsorted(later, rest, side='left').tolist()
+        ends = np.searchsorted(later, rest, side='right').tolist()
+        earlier = earlier.tolist()
+        resttargets = []
+        for (i, start, end) in zip(rest.tolist(), starts, ends):
+            target = i
+            for n in range(start, end):
+                if kept[earlier[n]]:
+                    target = earlier[n]
+                    break
+            if target == i:
+                kept[i] = 1
+            resttargets.append(target)
+        targets[rest] = resttargets
+    return targets
+
+
+# --------------------------------------------------------------------
+# Merges vertices of packed mesh data closer than distance, as
+# weld_mesh_data, on arrays only
+# --------------------------------------------------------------------
+def weld_packed_mesh_data(coords, edges, loop_totals, loop_indices, distance=0.0001):
+    if len(coords) == 0:
+        return coords, edges, loop_totals, loop_indices
+    # vertices rounding to one grid point are grouped, the first one is kept
+    keys = np.round(coords / distance).astype(np.int64)
+    (first, inverse) = np.unique(keys, axis=0, return_index=True, return_inverse=True)[1:]
+    del keys
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    groups = rank[inverse.ravel()]
+    del inverse, rank
+    # groups split by the rounding are merged when closer than distance
+    mycoords = coords[first[order]]
+    targets = get_weld_targets(mycoords, distance)
+    kept = targets == np.arange(len(mycoords))
+    remap = (np.cumsum(kept) - 1)[targets][groups]
+    del targets, groups
+    mycoords = mycoords[kept]
+    vertnum = len(mycoords)
+
+    # repeated vertices of a face are dropped, the first occurrence is kept
+    myindices = remap[loop_indices]
+    if (loop_totals == 3).all():
+        # triangles with a repeated vertex collapse, compared directly
+        triangles = myindices.reshape(-1, 3)
+        keptfaces = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & \
+            (triangles[:, 2] != triangles[:, 0])
+        mytotals = loop_totals[keptfaces]
+        myindices = triangles[keptfaces].ravel()
+    else:
+        facenum = len(loop_totals)
+        loop_faces = np.repeat(np.arange(facenum), loop_totals)
+        firstloops = np.unique(loop_faces * vertnum + myindices, return_index=True)[1]
+        kept = np.zeros(len(myindices), dtype=bool)
+        kept[firstloops] = True
+        del firstloops
+        totals = np.bincount(loop_faces[kept], minlength=facenum)
+        keptfaces = totals >= 3
+        kept &= keptfaces[loop_faces]
+        del loop_faces
+        mytotals = totals[keptfaces].astype(loop_totals.dtype)
+        myindices = myindices[kept]
+
+    # collapsed and repeated edges are dropped, the first one is kept
+    myedges = remap[edges.reshape(-1, 2)].reshape(-1, 2)
+    myedges = myedges[myedges[:, 0] != myedges[:, 1]]
+    edgekeys = myedges.min(axis=1) * vertnum + myedges.max(axis=1)
+    myedges = myedges[np.sort(np.unique(edgekeys, return_index=True)[1])]
+    return mycoords, myedges, mytotals, myindices
+
+
+# --------------------------------------------------------------------
+# Calculates face normal (Newell's method), works with ngons
+# --------------------------------------------------------------------
+def calc_face_normal(vertices, face):
+    (nx, ny, nz) = (0.0, 0.0, 0.0)
+    for t in range(len(face)):
+        (x1, y1, z1) = vertices[face[t - 1]]
+        (x2, y2, z2) = vertices[face[t]]
+        nx += (y1 - y2) * (z1 + z2)
+        ny += (z1 - z2) * (x1 + x2)
+        nz += (x1 - x2) * (y1 + y2)
+    return (nx, ny, nz)
+
+
+# --------------------------------------------------------------------
+# Gets Python array of the indices (32 bit when they fit), indexed
+# faster than NumPy arrays from Python loops
+# --------------------------------------------------------------------
+def get_index_array(indices):
+    if len(indices) == 0 or indices.max() < 2 ** 31:
+        return array('i', indices.astype(np.int32).tobytes())
+    return array('q', indices.astype(np.int64).tobytes())
+
+
+# --------------------------------------------------------------------
+# Gets face adjacency of the face loops as CSR arrays (loop starts,
+# neighbor faces, neighbor swaps), neighbors of the loop are faces
+# sharing its edge (the edge from the previous face vertex), swap is
+# True when the neighbor runs the edge in the same direction (one of
+# the faces must be reversed)
+# --------------------------------------------------------------------
+def calc_face_adjacency(vertnum, loop_totals, loop_indices):
+    facenum = len(loop_totals)
+    # loop and face numbers fit 32 bits in all but huge meshes
+    index_type = np.int32 if len(loop_indices) < 2 ** 31 else np.int64
+    loop_faces = np.repeat(np.arange(facenum, dtype=index_type), loop_totals)
+    loop_ends = np.cumsum(loop_totals)
+    prev = np.arange(len(loop_indices), dtype=index_type) - 1
+    prev[loop_ends - loop_totals] = loop_ends - 1
+    # loop runs the edge from the previous face vertex
+    b = np.asarray(loop_indices, dtype=np.int64)
+    a = b[prev]
+    del prev
+    forward = a < b
+    keys = np.minimum(a, b) * vertnum + np.maximum(a, b)
+    del a, b
+
+    # loops sharing an edge are neighbors in the sorted order
+    order = np.argsort(keys, kind='stable').astype(index_type)
+    sorted_keys = keys[order]
+    del keys
+    group_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(sorted_keys)])
+    del sorted_keys
+    pairs = group_starts[group_sizes == 2]
+    (first, second) = ([order[pairs], order[pairs + 1]], [order[pairs + 1], order[pairs]])
+    # edges of more faces (not manifold) link every pair of their faces
+    for (start, size) in zip(group_starts[group_sizes > 2].tolist(), group_sizes[group_sizes > 2].tolist()):
+        loops = order[start:start + size]
+        first.append(np.repeat(loops, size))
+        second.append(np.tile(loops, size))
+    del order, group_starts, group_sizes, pairs
+    first = np.concatenate(first)
+    second = np.concatenate(second)
+
+    linked = loop_faces[first] != loop_faces[second]
+    first = first[linked]
+    second = second[linked]
+    del linked
+    # neighbors in loop order, then in face order
+    order = np.lexsort((loop_faces[second], first))
+    first = first[order]
+    second = second[order]
+    del order
+    starts = np.searchsorted(first, np.arange(len(loop_indices) + 1, dtype=index_type))
+    neighbors = loop_faces[second]
+    swaps = forward[first] == forward[second]
+    return starts, neighbors, swaps
+
+
+# --------------------------------------------------------------------
+# Makes face normals consistent, faces point outside of every part
+# inside - True = faces point inside
+# Flat parts (e.g. planes) keep the orientation of the first face
+# --------------------------------------------------------------------
+def make_normals_consistent(vertices, faces, inside=False):
+    if len(faces) == 0:
+        return [list(f) for f in faces]
+    (coords, edges, loop_totals, loop_indices) = \
+        pack_mesh_data(vertices, [], faces, float_type=np.float64, int_type=np.int64)
+    loop_indices = make_packed_normals_consistent(coords, loop_totals, loop_indices, inside)
+    return unpack_mesh_data(coords, edges, loop_totals, loop_indices)[2]
+
+
+# --------------------------------------------------------------------
+# Makes face normals of packed mesh data consistent, as
+# make_normals_consistent, returns the new loop indices
+# Adjacency and part centers are computed on arrays, only the walk over
+# the faces runs in Python (on compact arrays, no per edge objects)
+# --------------------------------------------------------------------
+def make_packed_normals_consistent(coords, loop_totals, loop_indices, inside=False):
+    facenum = len(loop_totals)
+    if facenum == 0:
+        return loop_indices
+    vertnum = len(coords)
+    (starts, neighbors, swaps) = calc_face_adjacency(vertnum, loop_totals, loop_indices)
+    starts = get_index_array(starts)
+    neighbors = get_index_array(neighbors)
+    swaps = swaps.astype(np.uint8).tobytes()
+
+    # faces sharing an edge must run it in opposite directions
+    reversed_faces = bytearray(facenum)
+    visited = bytearray(facenum)
+    parts = array('q', bytes(8 * facenum))
+    visits = array('q', bytes(8 * facenum))
+    face_ends = np.cumsum(loop_totals)
+    face_starts = get_index_array(face_ends - loop_totals)
+    face_ends = get_index_array(face_ends)
+    (partnum, visitnum) = (0, 0)
+    for seed in range(facenum):
+        if visited[seed]:
+            continue
+        visited[seed] = 1
+        parts[seed] = partnum
+        visits[seed] = visitnum
+        visitnum += 1
+        stack = [seed]
+        while stack:
+            f = stack.pop()
+            (start, end) = (face_starts[f], face_ends[f])
+            # edges are visited in the face order, reversed faces backwards
+            loops = range(start, end)
+            if reversed_faces[f]:
+                loops = [start] + list(range(end - 1, start, -1))
+            for loop in loops:
+                for n in range(starts[loop], starts[loop + 1]):
+                    fi = neighbors[n]
+                    if visited[fi]:
+                        continue
+                    reversed_faces[fi] = reversed_faces[f] ^ swaps[n]
+                    visited[fi] = 1
+                    parts[fi] = partnum
+                    visits[fi] = visitnum
+                    visitnum += 1
+                    stack.append(fi)
+        partnum += 1
+    del starts, neighbors, swaps, visited, face_starts, face_ends
+    parts = np.frombuffer(parts, dtype=np.int64)
+    visits = np.frombuffer(visits, dtype=np.int64)
+    reversed_faces = np.frombuffer(reversed_faces, dtype=np.uint8).astype(bool)
+
+    # the face farthest from the part center must point away from it
+    loop_totals = loop_totals.astype(np.int64)
+    loop_starts = np.cumsum(loop_totals) - loop_totals
+    partverts = np.unique(np.repeat(parts, loop_totals) * vertnum + loop_indices)
+    (partvert_parts, partvert_verts) = (partverts // vertnum, partverts % vertnum)
+    del partverts
+    counts = np.bincount(partvert_parts, minlength=partnum)
+    centers = np.stack([np.bincount(partvert_parts, weights=coords[partvert_verts, c], minlength=partnum)
+                        for c in range(3)], axis=1) / counts[:, None]
+    del partvert_parts, partvert_verts
+    # face centers are summed per axis, no (loops, 3) temporary
+    offsets = np.stack([np.add.reduceat(coords[loop_indices, c], loop_starts) for c in range(3)], axis=1)
+    offsets = offsets / loop_totals[:, None] - centers[parts]
+    distances = (offsets * offsets).sum(axis=1)
+    # the first visited face is taken from equally distant faces
+    order = np.lexsort((visits, -distances, parts))
+    farthest = order[np.r_[True, parts[order][1:] != parts[order][:-1]]]
+    del order, distances, visits
+    reversed_parts = np.zeros(partnum, dtype=bool)
+    for (part, fi) in enumerate(farthest.tolist()):
+        start = loop_starts[fi]
+        face = coords[loop_indices[start:start + loop_totals[fi]]].tolist()
+        normal = calc_face_normal(face, range(len(face)))
+        side = sum(n * d for (n, d) in zip(normal, offsets[fi].tolist()))
+        if reversed_faces[fi]:
+            side = -side
+        reversed_parts[part] = side != 0.0 and (side < 0.0) != inside
+    reversed_faces ^= reversed_parts[parts]
+    if not reversed_faces.any():
+        return loop_indices
+
+    # loops of reversed faces are read backwards
+    loop_faces = np.repeat(np.arange(facenum), loop_totals)
+    reversed_loops = reversed_faces[loop_faces]
+    source = np.arange(len(loop_indices))
+    reversed_faces = loop_faces[reversed_loops]
+    source[reversed_loops] = 2 * loop_starts[reversed_faces] + loop_totals[reversed_faces] - 1 - \
+        source[reversed_loops]
+    return loop_indices[source]
+
+
+# --------------------------------------------------------------------
+# Splits faces into triangles (fan from the first face vertex)
+# --------------------------------------------------------------------
+def triangulate_faces(faces):
+    mytriangles = []
+    for f in faces:
+        for t in range(1, len(f) - 1):
+            mytriangles.append((f[0], f[t], f[t + 1]))
+    return mytriangles
+
+
+# --------------------------------------------------------------------
+# Packs mesh data into flat arrays, ready for bulk mesh writes
+# Returns (coords float32 (N, 3), edges int32 (E, 2),
+#          loop_totals int32 (F), loop_indices int32 (L))
+# Faces can also be given as array (F, n) of faces with n vertices
+# --------------------------------------------------------------------
+def pack_mesh_data(vertices, edges, faces, float_type=np.float32, int_type=np.int32):
+    coords = np.asarray(vertices, dtype=float_type).reshape(-1, 3)
+    myedges = np.asarray(edges, dtype=int_type).reshape(-1, 2)
+    if isinstance(faces, np.ndarray):
+        loop_totals = np.full(len(faces), faces.shape[1] if faces.ndim == 2 else 0, dtype=int_type)
+        loop_indices = faces.astype(int_type).ravel()
+        return coords, myedges, loop_totals, loop_indices
+    loop_totals = np.fromiter((len(f) for f in faces), dtype=int_type, count=len(faces))
+    loop_indices = np.fromiter((i for f in faces for i in f), dtype=int_type,
+                               count=int(loop_totals.sum()))
+    return coords, myedges, loop_totals, loop_indices
+
+
+# --------------------------------------------------------------------
+# Unpacks packed mesh data into (vertices, edges, faces) lists
+# --------------------------------------------------------------------
+def unpack_mesh_data(coords, edges, loop_totals, loop_indices):
+    myvertices = [tuple(v) for v in coords.tolist()]
+    myedges = [tuple(e) for e in edges.tolist()]
+    indices = loop_indices.tolist()
+    ends = np.cumsum(loop_totals).tolist()
+    myfaces = [indices[end - total:end] for (total, end) in zip(loop_totals.tolist(), ends)]
+    return myvertices, myedges, myfaces
+
+
+# --------------------------------------------------------------------
+# Calculates face normals of packed mesh data (Newell's method)
+# Normals are not normalized, their length is twice the face area
+# --------------------------------------------------------------------
+def calc_packed_face_normals(coords, loop_totals, loop_indices):
+    if len(loop_totals) == 0:
+        return np.zeros((0, 3), dtype=np.float64)
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int64)
+    np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+    # every loop runs to the next loop of its face, the last one to the first
+    next_loops = np.arange(1, len(loop_indices) + 1)
+    next_loops[loop_starts + loop_totals - 1] = loop_starts
+    p1 = coords[loop_indices].astype(np.float64)
+    p2 = p1[next_loops]
+    terms = np.stack([
+        (p1[:, 1] - p2[:, 1]) * (p1[:, 2] + p2[:, 2]),
+        (p1[:, 2] - p2[:, 2]) * (p1[:, 0] + p2[:, 0]),
+        (p1[:, 0] - p2[:, 0]) * (p1[:, 1] + p2[:, 1]),
+    ], axis=1)
+    return np.add.reduceat(terms, loop_starts, axis=0)
+
+
+# --------------------------------------------------------------------
+# Scales vectors (rows) to unit length, zero vectors are kept
+# --------------------------------------------------------------------
+def normalize_vectors(vectors):
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0.0)
+
+
+# --------------------------------------------------------------------
+# Calculates vertex normals of packed mesh data, weighted by face area
+# --------------------------------------------------------------------
+def calc_packed_vertex_normals(coords, loop_totals, loop_indices, face_normals=None):
+    if face_normals is None:
+        face_normals = calc_packed_face_normals(coords, loop_totals, loop_indices)
+    loop_normals = np.repeat(face_normals, loop_totals, axis=0)
+    # bincount gives integers when there are no loops (meshes without faces)
+    normals = np.stack([
+        np.bincount(loop_indices, weights=loop_normals[:, c], minlength=len(coords))
+        for c in range(3)
+    ], axis=1).astype(np.float64)
+    return normalize_vectors(normals)
+
+
+# --------------------------------------------------------------------
+# Calculates box projected UVs of packed mesh data, one per loop
+# Every face is projected along the main axis of its normal
+# --------------------------------------------------------------------
+def calc_packed_box_uvs(coords, loop_totals, loop_indices, face_normals=None):
+    if face_normals is None:
+        face_normals = calc_packed_face_normals(coords, loop_totals, loop_indices)
+    axes = np.repeat(np.argmax(np.abs(face_normals), axis=1), loop_totals)
+    points = coords[loop_indices]
+    ucolumns = np.array([1, 0, 0])[axes]
+    vcolumns = np.array([2, 2, 1])[axes]
+    rows = np.arange(len(points))
+    return np.stack([points[rows, ucolumns], points[rows, vcolumns]], axis=1)
+
+
+# --------------------------------------------------------------------
+# Transforms points (rows) with the 4x4 matrix (rows)
+# --------------------------------------------------------------------
+def transform_packed_points(points, matrix):
+    m = np.asarray(matrix, dtype=np.float64)
+    return points @ m[:3, :3].T + m[:3, 3]
+
+
+# --------------------------------------------------------------------
+# Transforms normals (rows) with the 4x4 matrix (rows), the inverse
+# transpose keeps them perpendicular under non uniform scale
+# --------------------------------------------------------------------
+def transform_packed_normals(normals, matrix):
+    m = np.asarray(matrix, dtype=np.float64)[:3, :3]
+    return normalize_vectors(normals @ np.linalg.inv(m))
+
+
+# --------------------------------------------------------------------
+# Splits packed faces into triangles (fan from the first face loop)
+# Returns loop indices of the triangle corners (T, 3)
+# --------------------------------------------------------------------
+def triangulate_packed_loops(loop_totals):
+    loop_totals = np.asarray(loop_totals, dtype=np.int64)
+    tri_totals = np.maximum(loop_totals - 2, 0)
+    if tri_totals.sum() == 0:
+        return np.zeros((0, 3), dtype=np.int64)
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int64)
+    np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+    tri_starts = np.cumsum(tri_totals) - tri_totals
+    firsts = np.repeat(loop_starts, tri_totals)
+    steps = np.arange(tri_totals.sum()) - np.repeat(tri_starts, tri_totals)
+    return np.stack([firsts, firsts + steps + 1, firsts + steps + 2], axis=1)
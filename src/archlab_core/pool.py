@@ -0,0 +1,172 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+import importlib
+import importlib.util
+import multiprocessing
+import os
+import sys
+from contextlib import contextmanager
+from glob import glob
+from os import path
+import numpy as np
+from .generators import build_packed_mesh_data
+
+# Fewer tasks are built in the calling process (pool startup costs more)
+pool_min_tasks = 64
+
+
+# --------------------------------------------------------------------
+# Gets python interpreter for the worker processes
+# Older Blender versions report the blender binary as sys.executable
+# --------------------------------------------------------------------
+def get_python_executable():
+    executable = sys.executable
+    if not path.basename(executable).lower().startswith('python'):
+        candidates = sorted(glob(path.join(sys.prefix, 'bin', 'python3*')))
+        if candidates:
+            executable = candidates[0]
+    return executable
+
+
+# --------------------------------------------------------------------
+# Checks for shared memory blocks, they need Python 3.8 (Blender 2.93),
+# without them meshes are built in the calling process
+# --------------------------------------------------------------------
+def has_shared_memory():
+    return importlib.util.find_spec('multiprocessing.shared_memory') is not None
+
+
+# --------------------------------------------------------------------
+# Gets count of CPUs the process may run on, more workers only add
+# their startup cost
+# --------------------------------------------------------------------
+def get_available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+
+# --------------------------------------------------------------------
+# Gets this module imported as top level archlab_core, workers import
+# it without the addon package (and without bpy)
+# --------------------------------------------------------------------
+def get_worker_module():
+    core_parent = path.dirname(path.dirname(path.realpath(__file__)))
+    if core_parent not in sys.path:
+        sys.path.append(core_parent)
+    return importlib.import_module('archlab_core.pool')
+
+
+# --------------------------------------------------------------------
+# Hides the main script from spawned workers, so they do not run the
+# Blender script (importing bpy) that started the pool
+# --------------------------------------------------------------------
+@contextmanager
+def detached_main_script():
+    main = sys.modules.get('__main__')
+    mainfile = getattr(main, '__file__', None)
+    if mainfile is not None:
+        del main.__file__
+    try:
+        yield
+    finally:
+        if mainfile is not None:
+            main.__file__ = mainfile
+
+
+# --------------------------------------------------------------------
+# Builds packed mesh data into a new shared memory block (worker side)
+# task - (typename, *args) as given to build_mesh_data
+# Returns (task, (block name, array shapes)), the caller unlinks the block
+# --------------------------------------------------------------------
+def build_shared_mesh_data(task):
+    from multiprocessing import shared_memory
+    packed = build_packed_mesh_data(*task)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, sum(a.nbytes for a in packed)))
+    offset = 0
+    for a in packed:
+        np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf, offset=offset)[...] = a
+        offset += a.nbytes
+    handle = (shm.name, tuple(a.shape for a in packed))
+    shm.close()
+    return task, handle
+
+
+# --------------------------------------------------------------------
+# Reads packed mesh data from the shared memory block and unlinks it
+# --------------------------------------------------------------------
+def read_shared_mesh_data(handle):
+    from multiprocessing import shared_memory
+    (name, shapes) = handle
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        packed = []
+        offset = 0
+        for (shape, dtype) in zip(shapes, (np.float32, np.int32, np.int32, np.int32)):
+            a = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            packed.append(a.copy())
+            offset += a.nbytes
+            del a
+    finally:
+        shm.close()
+        shm.unlink()
+    return tuple(packed)
+
+
+# --------------------------------------------------------------------
+# Builds packed mesh data of independent tasks in worker processes
+# tasks - iterable of (typename, *args), duplicates are built once
+# processes - worker count, the CPU count by default, at most the
+# available CPUs
+# Returns dict task: packed mesh data (see pack_mesh_data)
+# --------------------------------------------------------------------
+def build_mesh_data_parallel(tasks, processes=None):
+    tasks = list(dict.fromkeys(tasks))
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(tasks), get_available_cpus())
+    if processes <= 1 or len(tasks) < pool_min_tasks or not has_shared_memory():
+        return {task: build_packed_mesh_data(*task) for task in tasks}
+
+    worker = get_worker_module()
+    mpcontext = multiprocessing.get_context('spawn')
+    mpcontext.set_executable(get_python_executable())
+    chunksize = max(1, len(tasks) // (processes * 8))
+    mesh_data = {}
+    with detached_main_script():
+        pool = mpcontext.Pool(processes)
+    try:
+        for (task, handle) in pool.imap_unordered(worker.build_shared_mesh_data, tasks, chunksize):
+            mesh_data[task] = read_shared_mesh_data(handle)
+    finally:
+        pool.terminate()
+        pool.join()
+    return mesh_data
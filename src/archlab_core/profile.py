@@ -0,0 +1,228 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Opt-in profiling of the mesh rebuild phases. Disabled profiling
+# records nothing, every phase only returns a shared empty context.
+# Events are kept in a ring buffer as (phase, target, start, seconds),
+# the target is the object name given by the outermost phase.
+# ----------------------------------------------------------
+import csv
+import json
+import os
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+# Default number of events kept in the ring buffer
+profile_capacity = 16384
+
+# Ring buffer of recorded events, None when profiling is disabled
+profile_events = None
+
+# Phase durations of the last rebuild, target: {phase: seconds}
+profile_last = {}
+
+# Target of the running outermost phase
+profile_target = None
+
+# Context returned while profiling is disabled
+disabled_phase = nullcontext()
+
+# Columns of the scene performance report, row key: title
+scene_report_columns = (
+    ('name', 'Object'),
+    ('type', 'Type'),
+    ('vertices', 'Vertices'),
+    ('faces', 'Faces'),
+    ('evaluated_vertices', 'Evaluated vertices'),
+    ('evaluated_faces', 'Evaluated faces'),
+    ('modifier_ms', 'Modifiers ms'),
+    ('regenerate_ms', 'Rebuild ms'),
+    ('modifiers', 'Modifier stack'),
+)
+
+
+# --------------------------------------------------------------------
+# Enables profiling, recorded events are kept
+# --------------------------------------------------------------------
+def enable_profiling(capacity=profile_capacity):
+    global profile_events
+    events = profile_events or ()
+    profile_events = deque(events, maxlen=max(1, capacity))
+
+
+# --------------------------------------------------------------------
+# Disables profiling and drops recorded events
+# --------------------------------------------------------------------
+def disable_profiling():
+    global profile_events
+    profile_events = None
+    profile_last.clear()
+
+
+# --------------------------------------------------------------------
+# Checks if profiling is enabled
+# --------------------------------------------------------------------
+def is_profiling():
+    return profile_events is not None
+
+
+# --------------------------------------------------------------------
+# Drops recorded events, profiling stays enabled
+# --------------------------------------------------------------------
+def clear_profile():
+    if profile_events is not None:
+        profile_events.clear()
+    profile_last.clear()
+
+
+# --------------------------------------------------------------------
+# Times the block as the phase, when profiling is enabled
+# target - object name, given by the outermost phase (e.g. regenerate),
+#          nested phases are recorded for the same target
+# --------------------------------------------------------------------
+def profile_phase(phase, target=None):
+    if profile_events is None:
+        return disabled_phase
+    return recorded_phase(phase, target)
+
+
+# --------------------------------------------------------------------
+# Records the phase into the ring buffer and the last rebuild of the
+# target, see profile_phase
+# --------------------------------------------------------------------
+@contextmanager
+def recorded_phase(phase, target):
+    global profile_target
+    outer_target = profile_target
+    if target is not None:
+        profile_target = target
+        profile_last[target] = {}
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        seconds = perf_counter() - start
+        target = profile_target
+        profile_target = outer_target
+        if profile_events is not None:
+            profile_events.append((phase, target, start, seconds))
+            last = profile_last.get(target)
+            if last is not None:
+                last[phase] = last.get(phase, 0.0) + seconds
+
+
+# --------------------------------------------------------------------
+# Gets phase durations of the last rebuild of the target, {} when
+# not recorded
+# --------------------------------------------------------------------
+def get_last_profile(target):
+    return profile_last.get(target, {})
+
+
+# --------------------------------------------------------------------
+# Writes recorded events in Chrome trace format (chrome://tracing,
+# Perfetto), nested phases are shown as nested slices
+# --------------------------------------------------------------------
+def write_chrome_trace(filepath, events=None):
+    if events is None:
+        events = profile_events or ()
+    pid = os.getpid()
+    trace = []
+    for (phase, target, start, seconds) in events:
+        event = {
+            'name': phase,
+            'cat': 'archlab',
+            'ph': 'X',
+            'ts': start * 1000000.0,
+            'dur': seconds * 1000000.0,
+            'pid': pid,
+            'tid': 1,
+        }
+        if target is not None:
+            event['args'] = {'object': target}
+        trace.append(event)
+    with open(filepath, 'w') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+    return len(trace)
+
+
+# --------------------------------------------------------------------
+# Sorts scene report rows by cost, modifier evaluation first, then the
+# last rebuild, not measured values count as zero
+# --------------------------------------------------------------------
+def sort_scene_report(rows):
+    rows.sort(key=lambda row: (-(row.get('modifier_ms') or 0.0), -(row.get('regenerate_ms') or 0.0)))
+    return rows
+
+
+# --------------------------------------------------------------------
+# Gets report row as list of strings, in the scene_report_columns order
+# --------------------------------------------------------------------
+def get_scene_report_cells(row):
+    cells = []
+    for (key, title) in scene_report_columns:
+        value = row.get(key)
+        if value is None:
+            cells.append('')
+        elif isinstance(value, float):
+            cells.append('%.3f' % value)
+        else:
+            cells.append(str(value))
+    return cells
+
+
+# --------------------------------------------------------------------
+# Formats scene report rows as text table, one line per row
+# --------------------------------------------------------------------
+def format_scene_report(rows):
+    lines = [[title for (key, title) in scene_report_columns]]
+    lines.extend(get_scene_report_cells(row) for row in rows)
+    # the last column (modifier stack) is not padded
+    widths = [max(len(line[c]) for line in lines) for c in range(len(scene_report_columns) - 1)]
+    text = []
+    for line in lines:
+        cells = [cell.ljust(width) if c < 2 else cell.rjust(width)
+                 for (c, (cell, width)) in enumerate(zip(line, widths))]
+        text.append('  '.join(cells + [line[-1]]).rstrip())
+    return '\n'.join(text) + '\n'
+
+
+# --------------------------------------------------------------------
+# Writes scene report rows as CSV file, returns the row count
+# --------------------------------------------------------------------
+def write_scene_report_csv(filepath, rows):
+    with open(filepath, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([title for (key, title) in scene_report_columns])
+        for row in rows:
+            writer.writerow(get_scene_report_cells(row))
+    return len(rows)
@@ -31,8 +31,12 @@ import bpy
 from bpy.types import Operator, PropertyGroup, Object, Panel
 from bpy.props import IntProperty, FloatProperty, CollectionProperty
 from .archlab_utils import *
+from .archlab_utils_regeneration import *
 from .archlab_utils_material_data import *
-from .archlab_utils_mesh_generator import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+glass_shading = 'SMOOTH'
 
 
 # ------------------------------------------------------------------------------
@@ -40,8 +44,7 @@ from .archlab_utils_mesh_generator import *
 # ------------------------------------------------------------------------------
 def create_glass(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh
     glassmesh = bpy.data.meshes.new("Glass")
@@ -50,80 +53,105 @@ def create_glass(self, context):
     context.collection.objects.link(glassobject)
     glassobject.ArchLabGlassGenerator.add()
 
-    glassobject.ArchLabGlassGenerator[0].glass_diameter = self.glass_diameter
-    glassobject.ArchLabGlassGenerator[0].glass_height = self.glass_height
-    glassobject.ArchLabGlassGenerator[0].glass_segments = self.glass_segments
-
-    # we shape the mesh.
-    shape_glass_mesh(glassobject, glassmesh)
-    set_smooth(glassobject)
-    set_modifier_subsurf(glassobject)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        glassobject.ArchLabGlassGenerator[0].glass_diameter = self.glass_diameter
+        glassobject.ArchLabGlassGenerator[0].glass_height = self.glass_height
+        glassobject.ArchLabGlassGenerator[0].glass_segments = self.glass_segments
+        schedule_regeneration(glassobject, regenerate_glass)
 
     # assign a material
-    mat = meshlib_glass_material()
-    set_material(glassobject, mat.name)
+    setup_glass_object(glassobject, context.collection)
 
     # we select, and activate, main object for the glass.
     glassobject.select_set(True)
     context.view_layer.objects.active = glassobject
 
 
+# ------------------------------------------------------------------------------
+# Sets up glass object, once after creation (no context needed).
+# ------------------------------------------------------------------------------
+def setup_glass_object(myglass, collection):
+    mat = meshlib_glass_material()
+    set_material(myglass, mat.name)
+
+
 # ------------------------------------------------------------------------------
 # Shapes mesh the glass mesh
 # ------------------------------------------------------------------------------
 def shape_glass_mesh(myglass, tmp_mesh, update=False):
     gp = myglass.ArchLabGlassGenerator[0]  # "gp" means "glass properties".
     # Create glass mesh data
-    update_glass_mesh_data(tmp_mesh, gp.glass_diameter, gp.glass_height, gp.glass_segments)
+    with profile_phase('read'):
+        mesh_args = get_glass_mesh_args(gp)
+    update_glass_mesh_data(tmp_mesh, *mesh_args)
     myglass.data = tmp_mesh
 
-    remove_doubles(myglass)
-    set_normals(myglass)
+    reconcile_glass_modifiers(myglass)
+
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != myglass.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Reconciles glass modifiers, also used when the mesh comes from a cache.
+# ------------------------------------------------------------------------------
+def reconcile_glass_modifiers(myglass):
+    # Reconcile ArchLib modifiers (only changes are applied)
+    reconcile_modifiers(myglass, [subsurf_modifier()])
 
 
 # ------------------------------------------------------------------------------
-# Creates glass mesh data.
+# Gets arguments of the core mesh builder from the glass properties.
 # ------------------------------------------------------------------------------
-def update_glass_mesh_data(mymesh, diameter, height, segments):
-    (myvertices, myedges, myfaces) = generate_mesh_from_library(
-        'Glass01',
-        size=(diameter, diameter, height),
-        segments=segments
-    )
+def get_glass_mesh_args(gp):
+    return (gp.glass_diameter, gp.glass_height, gp.glass_segments)
+
 
-    mymesh.from_pydata(myvertices, myedges, myfaces)
-    mymesh.update(calc_edges=True)
+# ------------------------------------------------------------------------------
+# Writes glass mesh data built by the core, identical parameters in a batch are built once.
+# ------------------------------------------------------------------------------
+def update_glass_mesh_data(mymesh, diameter, height, segments):
+    packed = batched_mesh_data(build_packed_mesh_data, 'glass', diameter, height, segments)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, glass_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update glass mesh.
+# Update glass mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_glass(self, context):
-    # When we update, the active object is the main object of the glass.
-    o = context.view_layer.objects.active
+    # The owner of the changed properties is the main object of the glass,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_glass)
+
+
+# ------------------------------------------------------------------------------
+# Gets mesh library entry used by the glass, part of the mesh fingerprint.
+# ------------------------------------------------------------------------------
+def get_glass_library_mesh(props):
+    return glass_library_mesh
+
+
+# ------------------------------------------------------------------------------
+# Regenerate glass mesh.
+# ------------------------------------------------------------------------------
+def regenerate_glass(o):
     oldmesh = o.data
     oldname = o.data.name
-    # Now we deselect that glass object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the glass:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_glass_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the glass.
-    o.select_set(True)
-    context.view_layer.objects.active = o
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabGlassGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the glass:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_glass_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabGlassGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -163,9 +191,18 @@ class ArchLabGlassProperties(PropertyGroup):
     glass_diameter = glass_diameter_property(callback=update_glass)
     glass_height = glass_quality_property(callback=update_glass)
     glass_segments = glass_segments_property(callback=update_glass)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabGlassProperties)
 Object.ArchLabGlassGenerator = CollectionProperty(type=ArchLabGlassProperties)
+register_generator('ArchLabGlassGenerator', type='glass', label='Glass',
+                   regenerate=regenerate_glass,
+                   shape=shape_glass_mesh,
+                   mesh_args=get_glass_mesh_args,
+                   setup=setup_glass_object,
+                   library_mesh=get_glass_library_mesh,
+                   reconcile=reconcile_glass_modifiers)
 
 
 # ------------------------------------------------------------------
@@ -218,6 +255,13 @@ class ArchLabGlassGeneratorPanel(Panel):
             row.prop(glass, 'glass_height')
             row = layout.row()
             row.prop(glass, 'glass_segments')
+            row = layout.row()
+            row.prop(glass, 'material_color')
+            row = layout.row()
+            row.prop(glass, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabGlassGenerator'
 
 
 # ------------------------------------------------------------------
@@ -36,8 +36,12 @@ from bpy.props import (
     CollectionProperty
 )
 from .archlab_utils import *
+from .archlab_utils_regeneration import *
 from .archlab_utils_material_data import *
-from .archlab_utils_mesh_generator import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+plate_shading = 'SMOOTH'
 
 
 # ------------------------------------------------------------------------------
@@ -45,8 +49,7 @@ from .archlab_utils_mesh_generator import *
 # ------------------------------------------------------------------------------
 def create_plate(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh
     platemesh = bpy.data.meshes.new("Plate")
@@ -55,106 +58,125 @@ def create_plate(self, context):
     context.collection.objects.link(plateobject)
     plateobject.ArchLabPlateGenerator.add()
 
-    plateobject.ArchLabPlateGenerator[0].plate_diameter = self.plate_diameter
-    plateobject.ArchLabPlateGenerator[0].plate_height = self.plate_height
-    plateobject.ArchLabPlateGenerator[0].plate_segments = self.plate_segments
-    plateobject.ArchLabPlateGenerator[0].plate_type = self.plate_type
-
-    # we shape the mesh.
-    shape_plate_mesh(plateobject, platemesh)
-    set_smooth(plateobject)
-    set_modifier_subsurf(plateobject)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        # the kind goes first, its presets must not override the sizes
+        plateobject.ArchLabPlateGenerator[0].plate_type = self.plate_type
+        plateobject.ArchLabPlateGenerator[0].plate_diameter = self.plate_diameter
+        plateobject.ArchLabPlateGenerator[0].plate_height = self.plate_height
+        plateobject.ArchLabPlateGenerator[0].plate_segments = self.plate_segments
+        schedule_regeneration(plateobject, regenerate_plate)
 
     # assign a material
-    mat = meshlib_ceramic_material()
-    set_material(plateobject, mat.name)
+    setup_plate_object(plateobject, context.collection)
 
     # we select, and activate, main object for the plate.
     plateobject.select_set(True)
     context.view_layer.objects.active = plateobject
 
 
+# ------------------------------------------------------------------------------
+# Sets up plate object, once after creation (no context needed).
+# ------------------------------------------------------------------------------
+def setup_plate_object(myplate, collection):
+    mat = meshlib_ceramic_material()
+    set_material(myplate, mat.name)
+
+
 # ------------------------------------------------------------------------------
 # Shapes mesh the plate mesh
 # ------------------------------------------------------------------------------
 def shape_plate_mesh(myplate, tmp_mesh, update=False):
     pp = myplate.ArchLabPlateGenerator[0]  # "pp" means "plate properties".
     # Create plate mesh data
-    update_plate_mesh_data(tmp_mesh, pp.plate_diameter, pp.plate_height, pp.plate_segments, pp.plate_type)
+    with profile_phase('read'):
+        mesh_args = get_plate_mesh_args(pp)
+    update_plate_mesh_data(tmp_mesh, *mesh_args)
     myplate.data = tmp_mesh
 
-    remove_doubles(myplate)
-    set_normals(myplate)
+    reconcile_plate_modifiers(myplate)
+
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != myplate.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Reconciles plate modifiers, also used when the mesh comes from a cache.
+# ------------------------------------------------------------------------------
+def reconcile_plate_modifiers(myplate):
+    # Reconcile ArchLib modifiers (only changes are applied)
+    reconcile_modifiers(myplate, [subsurf_modifier()])
 
 
 # ------------------------------------------------------------------------------
-# Creates plate mesh data.
+# Gets arguments of the core mesh builder from the plate properties.
 # ------------------------------------------------------------------------------
-def update_plate_mesh_data(mymesh, diameter, height, segments, type):
-    if type is None:
-        mytype = 'Plate01'
-    else:
-        mytype = type
-
-    (myvertices, myedges, myfaces) = generate_mesh_from_library(
-        type,
-        size=(diameter, diameter, height),
-        segments=segments
-    )
+def get_plate_mesh_args(pp):
+    return (pp.plate_diameter, pp.plate_height, pp.plate_segments, pp.plate_type)
+
 
-    mymesh.from_pydata(myvertices, myedges, myfaces)
-    mymesh.update(calc_edges=True)
+# ------------------------------------------------------------------------------
+# Writes plate mesh data built by the core, identical parameters in a batch are built once.
+# ------------------------------------------------------------------------------
+def update_plate_mesh_data(mymesh, diameter, height, segments, type):
+    packed = batched_mesh_data(build_packed_mesh_data, 'plate', diameter, height, segments, type)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, plate_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update plate mesh.
+# Update plate mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_plate(self, context):
-    # When we update, the active object is the main object of the plate.
-    o = context.view_layer.objects.active
+    # The owner of the changed properties is the main object of the plate,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_plate)
+
+
+# ------------------------------------------------------------------------------
+# Gets mesh library entry used by the plate, part of the mesh fingerprint.
+# ------------------------------------------------------------------------------
+def get_plate_library_mesh(props):
+    return props.plate_type
+
+
+# ------------------------------------------------------------------------------
+# Regenerate plate mesh.
+# ------------------------------------------------------------------------------
+def regenerate_plate(o):
     oldmesh = o.data
     oldname = o.data.name
-    # Now we deselect that plate object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the plate:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_plate_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the plate.
-    o.select_set(True)
-    context.view_layer.objects.active = o
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabPlateGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the plate:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_plate_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabPlateGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # ------------------------------------------------------------------------------
 # Update plate mesh and sizes based on new kind.
 # ------------------------------------------------------------------------------
 def update_plate_kind(self, context):
-    update_plate_size(self, context)
-    update_plate(self, context)
+    # sizes and kind are rebuilt once
+    with suspended_regeneration():
+        update_plate_size(self, context)
+        update_plate(self, context)
 
 
 # ------------------------------------------------------------------------------
 # Update plate sizes based on new kind.
 # ------------------------------------------------------------------------------
 def update_plate_size(self, context):
-    cob = context.object
-    cao = context.active_operator
-    if cob is not None and 'ArchLabPlateGenerator' in cob:
-        props = cob.ArchLabPlateGenerator[0]
-    elif cao is not None:
-        props = cao
+    # self is the changed plate properties, or the operator
+    props = self
     if props is not None:
         if props.plate_type == 'Plate01':
             props.plate_diameter = 0.21
@@ -222,9 +244,18 @@ class ArchLabPlateProperties(PropertyGroup):
     plate_diameter = plate_diameter_property(callback=update_plate)
     plate_height = plate_height_property(callback=update_plate)
     plate_segments = plate_segments_property(callback=update_plate)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabPlateProperties)
 Object.ArchLabPlateGenerator = CollectionProperty(type=ArchLabPlateProperties)
+register_generator('ArchLabPlateGenerator', type='plate', label='Plate',
+                   regenerate=regenerate_plate,
+                   shape=shape_plate_mesh,
+                   mesh_args=get_plate_mesh_args,
+                   setup=setup_plate_object,
+                   library_mesh=get_plate_library_mesh,
+                   reconcile=reconcile_plate_modifiers)
 
 
 # ------------------------------------------------------------------
@@ -279,6 +310,13 @@ class ArchLabPlateGeneratorPanel(Panel):
             row.prop(plate, 'plate_height')
             row = layout.row()
             row.prop(plate, 'plate_segments')
+            row = layout.row()
+            row.prop(plate, 'material_color')
+            row = layout.row()
+            row.prop(plate, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabPlateGenerator'
 
 
 # ------------------------------------------------------------------
@@ -31,7 +31,12 @@ import bpy
 from bpy.types import Operator, PropertyGroup, Object, Panel
 from bpy.props import FloatProperty, CollectionProperty
 from .archlab_utils import *
-from .archlab_utils_mesh_generator import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+bench_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -39,8 +44,7 @@ from .archlab_utils_mesh_generator import *
 # ------------------------------------------------------------------------------
 def create_bench(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh for bench
     benchmesh = bpy.data.meshes.new("Bench")
@@ -49,12 +53,12 @@ def create_bench(self, context):
     context.collection.objects.link(benchobject)
     benchobject.ArchLabBenchGenerator.add()
 
-    benchobject.ArchLabBenchGenerator[0].bench_height = self.bench_height
-    benchobject.ArchLabBenchGenerator[0].bench_width = self.bench_width
-    benchobject.ArchLabBenchGenerator[0].bench_depth = self.bench_depth
-
-    # we shape the mesh.
-    shape_bench_mesh(benchobject, benchmesh)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        benchobject.ArchLabBenchGenerator[0].bench_height = self.bench_height
+        benchobject.ArchLabBenchGenerator[0].bench_width = self.bench_width
+        benchobject.ArchLabBenchGenerator[0].bench_depth = self.bench_depth
+        schedule_regeneration(benchobject, regenerate_bench)
 
     # we select, and activate, main object for the bench.
     benchobject.select_set(True)
@@ -67,55 +71,66 @@ def create_bench(self, context):
 def shape_bench_mesh(mybench, tmp_mesh, update=False):
     sp = mybench.ArchLabBenchGenerator[0]  # "sp" means "bench properties".
     # Create bench mesh data
-    update_bench_mesh_data(tmp_mesh, sp.bench_width, sp.bench_height, sp.bench_depth)
+    with profile_phase('read'):
+        mesh_args = get_bench_mesh_args(sp)
+    update_bench_mesh_data(tmp_mesh, *mesh_args)
     mybench.data = tmp_mesh
 
-    remove_doubles(mybench)
-    set_normals(mybench)
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != mybench.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the bench properties.
+# ------------------------------------------------------------------------------
+def get_bench_mesh_args(sp):
+    return (sp.bench_width, sp.bench_height, sp.bench_depth)
 
 
 # ------------------------------------------------------------------------------
-# Creates bench mesh data.
+# Writes bench mesh data built by the core, identical parameters in a batch are built once.
 # ------------------------------------------------------------------------------
 def update_bench_mesh_data(mymesh, width, height, depth):
-    (myvertices, myedges, myfaces) = generate_mesh_from_library(
-        'BenchN',
-        size=(width, depth, height)
-    )
-
-    mymesh.from_pydata(myvertices, myedges, myfaces)
-    mymesh.update(calc_edges=True)
+    packed = batched_mesh_data(build_packed_mesh_data, 'bench', width, height, depth)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, bench_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update bench mesh.
+# Update bench mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_bench(self, context):
-    # When we update, the active object is the main object of the bench.
-    o = context.view_layer.objects.active
+    # The owner of the changed properties is the main object of the bench,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_bench)
+
+
+# ------------------------------------------------------------------------------
+# Gets mesh library entry used by the bench, part of the mesh fingerprint.
+# ------------------------------------------------------------------------------
+def get_bench_library_mesh(props):
+    return bench_library_mesh
+
+
+# ------------------------------------------------------------------------------
+# Regenerate bench mesh.
+# ------------------------------------------------------------------------------
+def regenerate_bench(o):
     oldmesh = o.data
     oldname = o.data.name
-    # Now we deselect that bench object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the bench:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_bench_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the bench.
-    o.select_set(True)
-    context.view_layer.objects.active = o
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabBenchGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the bench:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_bench_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabBenchGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -155,9 +170,16 @@ class ArchLabBenchProperties(PropertyGroup):
     bench_height = bench_height_property(callback=update_bench)
     bench_width = bench_width_property(callback=update_bench)
     bench_depth = bench_depth_property(callback=update_bench)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabBenchProperties)
 Object.ArchLabBenchGenerator = CollectionProperty(type=ArchLabBenchProperties)
+register_generator('ArchLabBenchGenerator', type='bench', label='Bench',
+                   regenerate=regenerate_bench,
+                   shape=shape_bench_mesh,
+                   mesh_args=get_bench_mesh_args,
+                   library_mesh=get_bench_library_mesh)
 
 
 # ------------------------------------------------------------------
@@ -210,6 +232,13 @@ class ArchLabBenchGeneratorPanel(Panel):
             row.prop(bench, 'bench_height')
             row = layout.row()
             row.prop(bench, 'bench_depth')
+            row = layout.row()
+            row.prop(bench, 'material_color')
+            row = layout.row()
+            row.prop(bench, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabBenchGenerator'
 
 
 # ------------------------------------------------------------------
@@ -31,6 +31,12 @@ import bpy
 from bpy.types import Operator, PropertyGroup, Object, Panel
 from bpy.props import BoolProperty, FloatProperty, CollectionProperty
 from .archlab_utils import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+shelve_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -38,8 +44,7 @@ from .archlab_utils import *
 # ------------------------------------------------------------------------------
 def create_shelve(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create shelve object and mesh
     shelvemesh = bpy.data.meshes.new("Shelve")
@@ -48,30 +53,22 @@ def create_shelve(self, context):
     context.collection.objects.link(shelveobject)
     shelveobject.ArchLabShelveGenerator.add()
 
-    shelveobject.ArchLabShelveGenerator[0].shelve_height = \
-        self.shelve_height
-    shelveobject.ArchLabShelveGenerator[0].shelve_width = \
-        self.shelve_width
-    shelveobject.ArchLabShelveGenerator[0].shelve_depth = \
-        self.shelve_depth
-    shelveobject.ArchLabShelveGenerator[0].shelve_thickness = \
-        self.shelve_thickness
-    shelveobject.ArchLabShelveGenerator[0].shelve_armature = \
-        self.shelve_armature
-    
-    # we shape the mesh.
-    shape_shelve_mesh(shelveobject, shelvemesh)
-
-    if self.shelve_armature:
-        # we create main object and mesh for shelve
-        shelvearmature = bpy.data.armatures.new("Shelve Armature")
-        shelvearmatureobject = bpy.data.objects.new("Shelve Armature", shelvearmature)
-        shelvearmatureobject.location = context.scene.cursor.location
-        shelvearmatureobject.parent = shelveobject
-        context.collection.objects.link(shelvearmatureobject)
-
-        # we shape the armature.
-        shape_shelve_armature(shelveobject, shelvearmatureobject, shelvearmature)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        shelveobject.ArchLabShelveGenerator[0].shelve_height = \
+            self.shelve_height
+        shelveobject.ArchLabShelveGenerator[0].shelve_width = \
+            self.shelve_width
+        shelveobject.ArchLabShelveGenerator[0].shelve_depth = \
+            self.shelve_depth
+        shelveobject.ArchLabShelveGenerator[0].shelve_thickness = \
+            self.shelve_thickness
+        shelveobject.ArchLabShelveGenerator[0].shelve_armature = \
+            self.shelve_armature
+        schedule_regeneration(shelveobject, regenerate_shelve)
+
+    # we create the armature, when requested.
+    setup_shelve_object(shelveobject, context.collection)
 
     # we select, and activate, main object for the shelve.
     shelveobject.select_set(True)
@@ -79,128 +76,157 @@ def create_shelve(self, context):
 
 
 # ------------------------------------------------------------------------------
-# Shapes mesh and creates modifier solidify (the modifier, only the first time)
+# Sets up shelve object, once after creation (no context needed).
+# ------------------------------------------------------------------------------
+def setup_shelve_object(myshelve, collection):
+    if myshelve.ArchLabShelveGenerator[0].shelve_armature:
+        # we create armature object, the armature data is shared by shelves
+        shelvearmature = get_shelve_armature_data()
+        shelvearmatureobject = bpy.data.objects.new("Shelve Armature", shelvearmature)
+        shelvearmatureobject.parent = myshelve
+        collection.objects.link(shelvearmatureobject)
+
+        # we shape the armature.
+        shape_shelve_armature(myshelve, shelvearmatureobject, shelvearmature)
+
+
+# ------------------------------------------------------------------------------
+# Shapes mesh and reconciles modifier solidify.
 # ------------------------------------------------------------------------------
 def shape_shelve_mesh(myshelve, tmp_mesh, update=False):
     sp = myshelve.ArchLabShelveGenerator[0]  # "sp" means "shelve properties".
     # Create shelve mesh data
-    update_shelve_mesh_data(tmp_mesh, sp.shelve_width, sp.shelve_height, sp.shelve_depth, sp.shelve_thickness)
+    with profile_phase('read'):
+        mesh_args = get_shelve_mesh_args(sp)
+    update_shelve_mesh_data(tmp_mesh, *mesh_args)
     myshelve.data = tmp_mesh
 
-    remove_doubles(myshelve)
-    set_normals(myshelve)
+    reconcile_shelve_modifiers(myshelve)
+    # Door weights are stored in the new mesh
+    get_shelve_door_group(myshelve).add(index=[8, 9, 11, 10], weight=1, type='REPLACE')
 
-    # Create Door vertex group
-    if not is_vertex_group(myshelve, 'Shelve Door'):
-        doorvg = myshelve.vertex_groups.new()
-        doorvg.name = 'Shelve Door'
-        doorvg.add(index=[8, 9, 11, 10], weight=1, type='ADD')
 
-    if sp.shelve_thickness > 0.0:
-        if update is False or is_solidify(myshelve) is False:
-            set_modifier_solidify(myshelve, sp.shelve_thickness)
-        else:
-            for mod in myshelve.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mod.thickness = sp.shelve_thickness
-        # Move to Top SOLIDIFY
-        movetotopsolidify(myshelve)
+# ------------------------------------------------------------------------------
+# Reconciles shelve modifiers, also used when the mesh comes from a cache.
+# ------------------------------------------------------------------------------
+def reconcile_shelve_modifiers(myshelve):
+    sp = myshelve.ArchLabShelveGenerator[0]  # "sp" means "shelve properties".
+    # Door vertex group, shared and cached meshes carry only the weights
+    get_shelve_door_group(myshelve)
+    # Follow new sizes with the armature, no edit mode needed
+    myarmatureobj = get_shelve_armature(myshelve)
+    if myarmatureobj is not None:
+        update_shelve_armature_data(myarmatureobj, sp.shelve_width, sp.shelve_height, sp.shelve_depth, sp.shelve_thickness)
 
-    else:  # clear not used SOLIDIFY
-        for mod in myshelve.modifiers:
-            if mod.type == 'SOLIDIFY':
-                myshelve.modifiers.remove(mod)
+    # Reconcile ArchLib modifiers (only changes are applied)
+    reconcile_modifiers(myshelve, shelve_modifiers(sp, myarmatureobj))
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != myshelve.name:
-            o.select_set(False)
+
+# ------------------------------------------------------------------------------
+# Gets Door vertex group of the shelve, creates it when missing.
+# Before Blender 3.0 vertex groups belong to the object, not to the mesh.
+# ------------------------------------------------------------------------------
+def get_shelve_door_group(myshelve):
+    doorvg = myshelve.vertex_groups.get('Shelve Door')
+    if doorvg is None:
+        doorvg = myshelve.vertex_groups.new(name='Shelve Door')
+    return doorvg
 
 
 # ------------------------------------------------------------------------------
-# Shapes armature and creates modifier armature (the modifier, only the first time).
+# Shapes armature and reconciles modifier armature.
 # ------------------------------------------------------------------------------
 def shape_shelve_armature(myshelve, myarmatureobj, myarmature, update=False):
     sp = myshelve.ArchLabShelveGenerator[0]  # "sp" means "shelve properties".
-    # Create shelve armature data
-    update_shelve_armature_data(myarmatureobj, myarmature, sp.shelve_width, sp.shelve_height, sp.shelve_depth, sp.shelve_thickness)
+    # Create door bone, only once for the shared armature data
+    if 'Shelve Door' not in myarmature.bones:
+        create_shelve_armature_bones(myarmatureobj, myarmature)
+    set_shelve_armature_pose(myarmatureobj)
+    # Place shelve armature
+    update_shelve_armature_data(myarmatureobj, sp.shelve_width, sp.shelve_height, sp.shelve_depth, sp.shelve_thickness)
 
-    if sp.shelve_armature:
-        if update is False or is_armature(myshelve) is False:
-            set_modifier_armature(myshelve, myarmatureobj)
-        else:
-            for mod in myshelve.modifiers:
-                if mod.type == 'ARMATURE':
-                    mod.thickness = sp.shelve_thickness
-        # Move to Top ARMATURE
-        movetotoparmature(myshelve)
-
-    else:  # clear not used ARMATURE
-        for mod in myshelve.modifiers:
-            if mod.type == 'ARMATURE':
-                myshelve.modifiers.remove(mod)
+    # Reconcile ArchLib modifiers, armature goes first in the stack
+    reconcile_modifiers(myshelve, shelve_modifiers(sp, myarmatureobj))
 
 
 # ------------------------------------------------------------------------------
-# Creates shelve mesh data.
+# Lists ArchLib modifiers of the shelve, in the stack order.
 # ------------------------------------------------------------------------------
-def update_shelve_mesh_data(mymesh, width, height, depth, thickness):
-    basethick = thickness / 2
-    posx = width / 2
-    posy = depth / 2
-    posz = height + basethick
+def shelve_modifiers(sp, myarmatureobj):
+    mymodifiers = []
+    if sp.shelve_armature and myarmatureobj is not None:
+        mymodifiers.append(armature_modifier(myarmatureobj))
+    if sp.shelve_thickness > 0.0:
+        mymodifiers.append(solidify_modifier(sp.shelve_thickness))
+    return mymodifiers
 
-    myvertices = [
-        (-posx, -posy, basethick), (posx, -posy, basethick),
-        (-posx, posy, basethick), (posx, posy, basethick),
-        (-posx, -posy, posz), (posx, -posy, posz),
-        (-posx, posy, posz), (posx, posy, posz)]
 
-    thickdiff = (thickness / 2) + 0.001
-    myvertices.extend([
-        (-posx + thickdiff, -posy + thickdiff, basethick + thickdiff),
-        (posx - thickdiff, -posy + thickdiff, basethick + thickdiff),
-        (-posx + thickdiff, -posy + thickdiff, posz - thickdiff),
-        (posx - thickdiff, -posy + thickdiff, posz - thickdiff)
-    ])
+# ------------------------------------------------------------------------------
+# Gets armature object deforming the shelve, if any.
+# ------------------------------------------------------------------------------
+def get_shelve_armature(myshelve):
+    mod = myshelve.modifiers.get("Armature ArchLib")
+    if mod is not None and mod.type == 'ARMATURE':
+        return mod.object
+    return None
 
-    myfaces = [
-        (0, 1, 3, 2),
-        (0, 4, 6, 2),
-        (1, 5, 7, 3),
-        (2, 3, 7, 6),
-        (4, 5, 7, 6),
 
-        (8, 9, 11, 10)
-    ]
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the shelve properties.
+# ------------------------------------------------------------------------------
+def get_shelve_mesh_args(sp):
+    return (sp.shelve_width, sp.shelve_height, sp.shelve_depth, sp.shelve_thickness)
 
-    mymesh.from_pydata(myvertices, [], myfaces)
-    mymesh.update(calc_edges=True)
+
+# ------------------------------------------------------------------------------
+# Writes shelve mesh data built by the core, identical parameters in a batch are built once.
+# ------------------------------------------------------------------------------
+def update_shelve_mesh_data(mymesh, width, height, depth, thickness):
+    packed = batched_mesh_data(build_packed_mesh_data, 'shelve', width, height, depth, thickness)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, shelve_shading)
 
 
 # ------------------------------------------------------------------------------
-# Creates shelve armature data.
+# Gets armature data shared by shelves.
+# The door bone has unit length, shelve sizes are applied by object placement.
 # ------------------------------------------------------------------------------
-def update_shelve_armature_data(myarmatureobj, myarmature, width, height, depth, thickness):
-    basethick = thickness / 2
-    posx = width / 2
-    posy = depth / 2
-    posz = height / 2 + basethick
-    thickdiff = (thickness / 2) + 0.001
+def get_shelve_armature_data():
+    myarmature = bpy.data.armatures.get("Shelve Armature (ArchLib)")
+    if myarmature is None:
+        myarmature = bpy.data.armatures.new("Shelve Armature (ArchLib)")
+    return myarmature
+
 
+# ------------------------------------------------------------------------------
+# Creates shelve armature bones, requires edit mode.
+# Bones can only be added as edit bones, so this is the one operator call
+# left on the context-free build path. It runs once per file (the armature
+# data is shared) and works in background mode, as long as the armature
+# object is linked into the view layer.
+# ------------------------------------------------------------------------------
+def create_shelve_armature_bones(myarmatureobj, myarmature):
     prev_o = bpy.context.view_layer.objects.active
     bpy.context.view_layer.objects.active = myarmatureobj
     myarmatureobj.select_set(True)
-    bpy.ops.object.editmode_toggle()
+    bpy.ops.object.mode_set(mode='EDIT')
 
     doorbone = myarmature.edit_bones.new('Shelve Door')
-    doorbone.head = (posx - thickdiff, -posy + thickdiff, posz)
-    doorbone.tail = (-posx + thickdiff, -posy + thickdiff, posz)
+    doorbone.head = (0.0, 0.0, 0.0)
+    doorbone.tail = (-1.0, 0.0, 0.0)
 
-    bpy.ops.object.editmode_toggle()
+    bpy.ops.object.mode_set(mode='OBJECT')
+    myarmatureobj.select_set(False)
     bpy.context.view_layer.objects.active = prev_o
 
-    doorbone = myarmatureobj.pose.bones[0]
+
+# ------------------------------------------------------------------------------
+# Sets shelve armature pose locks.
+# ------------------------------------------------------------------------------
+def set_shelve_armature_pose(myarmatureobj):
+    if myarmatureobj.pose is None or len(myarmatureobj.pose.bones) == 0:
+        bpy.context.view_layer.update()
+    doorbone = myarmatureobj.pose.bones['Shelve Door']
     doorbone.rotation_mode = 'XYZ'
     doorbone.lock_location[0] = True
     doorbone.lock_location[1] = True
@@ -213,119 +239,56 @@ def update_shelve_armature_data(myarmatureobj, myarmature, width, height, depth,
 
 
 # ------------------------------------------------------------------------------
-# Update shelve mesh.
+# Updates shelve armature placement.
+# Moves the hinge and scales the unit door bone uniformly to the door width.
 # ------------------------------------------------------------------------------
-def update_shelve(self, context):
-    # When we update, the active object is the main object of the shelve.
-    o = context.view_layer.objects.active
-    oldmesh = o.data
-    oldname = o.data.name
-    # Now we deselect that shelve object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the shelve:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_shelve_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the shelve.
-    o.select_set(True)
-    context.view_layer.objects.active = o
-
-
-# -----------------------------------------------------
-# Verify if vertex group exist
-# -----------------------------------------------------
-def is_vertex_group(myobject, vgname):
-    flag = False
-    try:
-        if myobject.vertex_groups is None:
-            return False
-
-        for vg in myobject.vertex_groups:
-            if vg.name == vgname:
-                flag = True
-                break
-        return flag
-    except AttributeError:
-        return False
-
-
-# -----------------------------------------------------
-# Verify if armature exist
-# -----------------------------------------------------
-def is_armature(myobject):
-    flag = False
-    try:
-        if myobject.modifiers is None:
-            return False
-
-        for mod in myobject.modifiers:
-            if mod.type == 'ARMATURE':
-                flag = True
-                break
-        return flag
-    except AttributeError:
-        return False
-
-
-# -----------------------------------------------------
-# Move Armature to Top
-# -----------------------------------------------------
-def movetotoparmature(myobject):
-    mymod = None
-    try:
-        if myobject.modifiers is not None:
-            for mod in myobject.modifiers:
-                if mod.type == 'ARMATURE':
-                    mymod = mod
-
-            if mymod is not None:
-                while myobject.modifiers[0] != mymod:
-                    bpy.ops.object.modifier_move_up(modifier=mymod.name)
-    except AttributeError:
-        return
-
+def update_shelve_armature_data(myarmatureobj, width, height, depth, thickness):
+    basethick = thickness / 2
+    posx = width / 2
+    posy = depth / 2
+    posz = height / 2 + basethick
+    thickdiff = (thickness / 2) + 0.001
 
-# -----------------------------------------------------
-# Verify if solidify exist
-# -----------------------------------------------------
-def is_solidify(myobject):
-    flag = False
-    try:
-        if myobject.modifiers is None:
-            return False
+    location = (posx - thickdiff, -posy + thickdiff, posz)
+    length = max(width - 2 * thickdiff, 0.001)
+    scale = (length, length, length)
+    if not is_same_value(myarmatureobj.location, location):
+        myarmatureobj.location = location
+    if not is_same_value(myarmatureobj.scale, scale):
+        myarmatureobj.scale = scale
 
-        for mod in myobject.modifiers:
-            if mod.type == 'SOLIDIFY':
-                flag = True
-                break
-        return flag
-    except AttributeError:
-        return False
 
+# ------------------------------------------------------------------------------
+# Update shelve mesh, the rebuild is deferred and coalesced.
+# ------------------------------------------------------------------------------
+def update_shelve(self, context):
+    # The owner of the changed properties is the main object of the shelve,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_shelve)
 
-# -----------------------------------------------------
-# Move Solidify to Top
-# -----------------------------------------------------
-def movetotopsolidify(myobject):
-    mymod = None
-    try:
-        if myobject.modifiers is not None:
-            for mod in myobject.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mymod = mod
 
-            if mymod is not None:
-                while myobject.modifiers[0] != mymod:
-                    bpy.ops.object.modifier_move_up(modifier=mymod.name)
-    except AttributeError:
-        return
+# ------------------------------------------------------------------------------
+# Regenerate shelve mesh.
+# ------------------------------------------------------------------------------
+def regenerate_shelve(o):
+    oldmesh = o.data
+    oldname = o.data.name
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabShelveGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the shelve:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_shelve_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabShelveGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -384,9 +347,17 @@ class ArchLabShelveProperties(PropertyGroup):
     shelve_depth = shelve_depth_property(callback=update_shelve)
     shelve_thickness = shelve_thickness_property(callback=update_shelve)
     shelve_armature = shelve_armature_property(callback=update_shelve)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabShelveProperties)
 Object.ArchLabShelveGenerator = CollectionProperty(type=ArchLabShelveProperties)
+register_generator('ArchLabShelveGenerator', type='shelve', label='Shelve',
+                   regenerate=regenerate_shelve,
+                   shape=shape_shelve_mesh,
+                   mesh_args=get_shelve_mesh_args,
+                   setup=setup_shelve_object,
+                   reconcile=reconcile_shelve_modifiers)
 
 
 # ------------------------------------------------------------------
@@ -412,8 +383,6 @@ class ArchLabShelveGeneratorPanel(Panel):
             return False
         if act_op is not None and act_op.bl_idname.endswith('archlab_shelve'):
             return False
-        if o.ArchLabShelveGenerator[0].shelve_armature:
-            return False
         else:
             return True
 
@@ -443,6 +412,13 @@ class ArchLabShelveGeneratorPanel(Panel):
             row.prop(shelve, 'shelve_depth')
             row = layout.row()
             row.prop(shelve, 'shelve_thickness')
+            row = layout.row()
+            row.prop(shelve, 'material_color')
+            row = layout.row()
+            row.prop(shelve, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabShelveGenerator'
 
 
 # ------------------------------------------------------------------
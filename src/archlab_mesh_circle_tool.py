@@ -36,7 +36,12 @@ from bpy.props import (
     CollectionProperty
 )
 from .archlab_utils import *
-from .archlab_utils_mesh_generator import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+circle_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -44,8 +49,7 @@ from .archlab_utils_mesh_generator import *
 # ------------------------------------------------------------------------------
 def create_circle(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh for circle
     circlemesh = bpy.data.meshes.new("Circle")
@@ -54,19 +58,19 @@ def create_circle(self, context):
     context.collection.objects.link(circleobject)
     circleobject.ArchLabCircleGenerator.add()
 
-    circleobject.ArchLabCircleGenerator[0].circle_radius = \
-        self.circle_radius
-    circleobject.ArchLabCircleGenerator[0].circle_quality = \
-        self.circle_quality
-    circleobject.ArchLabCircleGenerator[0].circle_fill_type = \
-        self.circle_fill_type
-    circleobject.ArchLabCircleGenerator[0].circle_depth = \
-        self.circle_depth
-    circleobject.ArchLabCircleGenerator[0].circle_truncation = \
-        self.circle_truncation
-
-    # we shape the mesh.
-    shape_circle_mesh(circleobject, circlemesh)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        circleobject.ArchLabCircleGenerator[0].circle_radius = \
+            self.circle_radius
+        circleobject.ArchLabCircleGenerator[0].circle_quality = \
+            self.circle_quality
+        circleobject.ArchLabCircleGenerator[0].circle_fill_type = \
+            self.circle_fill_type
+        circleobject.ArchLabCircleGenerator[0].circle_depth = \
+            self.circle_depth
+        circleobject.ArchLabCircleGenerator[0].circle_truncation = \
+            self.circle_truncation
+        schedule_regeneration(circleobject, regenerate_circle)
 
     # we select, and activate, main object for the circle.
     circleobject.select_set(True)
@@ -74,116 +78,78 @@ def create_circle(self, context):
 
 
 # ------------------------------------------------------------------------------
-# Shapes mesh and creates modifier solidify (the modifier, only the first time).
+# Shapes mesh and reconciles modifier solidify.
 # ------------------------------------------------------------------------------
 def shape_circle_mesh(mycircle, tmp_mesh, update=False):
     pp = mycircle.ArchLabCircleGenerator[0]  # "pp" means "circle properties".
     # Create circle mesh data
-    update_circle_mesh_data(tmp_mesh, pp.circle_radius, pp.circle_quality, pp.circle_fill_type, pp.circle_truncation)
+    with profile_phase('read'):
+        mesh_args = get_circle_mesh_args(pp)
+    update_circle_mesh_data(tmp_mesh, *mesh_args)
     mycircle.data = tmp_mesh
 
-    remove_doubles(mycircle)
-    set_normals(mycircle)
+    reconcile_circle_modifiers(mycircle)
 
+
+# ------------------------------------------------------------------------------
+# Reconciles circle modifiers, also used when the mesh comes from a cache.
+# ------------------------------------------------------------------------------
+def reconcile_circle_modifiers(mycircle):
+    pp = mycircle.ArchLabCircleGenerator[0]  # "pp" means "circle properties".
+    # Reconcile ArchLib modifiers (only changes are applied)
+    mymodifiers = []
     if pp.circle_depth > 0.0:
-        if update is False or is_solidify(mycircle) is False:
-            set_modifier_solidify(mycircle, pp.circle_depth)
-        else:
-            for mod in mycircle.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mod.thickness = pp.circle_depth
-        # Move to Top SOLIDIFY
-        movetotopsolidify(mycircle)
+        mymodifiers.append(solidify_modifier(pp.circle_depth))
+    reconcile_modifiers(mycircle, mymodifiers)
 
-    else:  # clear not used SOLIDIFY
-        for mod in mycircle.modifiers:
-            if mod.type == 'SOLIDIFY':
-                mycircle.modifiers.remove(mod)
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != mycircle.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the circle properties.
+# ------------------------------------------------------------------------------
+def get_circle_mesh_args(pp):
+    return (pp.circle_radius, pp.circle_quality, pp.circle_fill_type, pp.circle_truncation)
 
 
 # ------------------------------------------------------------------------------
-# Creates circle mesh data.
+# Writes circle mesh data built by the core, identical parameters in a batch are built once.
 # ------------------------------------------------------------------------------
 def update_circle_mesh_data(mymesh, radius, vertices, fill_type, trunc_val):
-    if fill_type == 'NONE':
-        (myvertices, myedges, myfaces) = \
-            generate_circle_nofill_mesh_data(radius, vertices)
-    if fill_type == 'NGON':
-        (myvertices, myedges, myfaces) = \
-            generate_circle_ngonfill_mesh_data(radius, vertices, trunc_val)
-    if fill_type == 'TRIF':
-        (myvertices, myedges, myfaces) = \
-            generate_circle_tfanfill_mesh_data(radius, vertices)
-
-    mymesh.from_pydata(myvertices, myedges, myfaces)
-    mymesh.update(calc_edges=True)
+    packed = batched_mesh_data(build_packed_mesh_data, 'circle', radius, vertices, fill_type, trunc_val)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, circle_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update circle mesh.
+# Update circle mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_circle(self, context):
-    # When we update, the active object is the main object of the circle.
-    o = context.view_layer.objects.active
-    oldmesh = o.data
-    oldname = o.data.name
-    # Now we deselect that circle object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the circle:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_circle_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the circle.
-    o.select_set(True)
-    context.view_layer.objects.active = o
+    # The owner of the changed properties is the main object of the circle,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_circle)
 
 
-# -----------------------------------------------------
-# Verify if solidify exist
-# -----------------------------------------------------
-def is_solidify(myobject):
-    flag = False
-    try:
-        if myobject.modifiers is None:
-            return False
-
-        for mod in myobject.modifiers:
-            if mod.type == 'SOLIDIFY':
-                flag = True
-                break
-        return flag
-    except AttributeError:
-        return False
-
-
-# -----------------------------------------------------
-# Move Solidify to Top
-# -----------------------------------------------------
-def movetotopsolidify(myobject):
-    mymod = None
-    try:
-        if myobject.modifiers is not None:
-            for mod in myobject.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mymod = mod
-
-            if mymod is not None:
-                while myobject.modifiers[0] != mymod:
-                    bpy.ops.object.modifier_move_up(modifier=mymod.name)
-    except AttributeError:
-        return
+# ------------------------------------------------------------------------------
+# Regenerate circle mesh.
+# ------------------------------------------------------------------------------
+def regenerate_circle(o):
+    oldmesh = o.data
+    oldname = o.data.name
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabCircleGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the circle:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_circle_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabCircleGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -246,9 +212,16 @@ class ArchLabCircleProperties(PropertyGroup):
     circle_fill_type = circle_fill_type_property(callback=update_circle)
     circle_depth = circle_depth_property(callback=update_circle)
     circle_truncation = circle_truncation_property(callback=update_circle)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabCircleProperties)
 Object.ArchLabCircleGenerator = CollectionProperty(type=ArchLabCircleProperties)
+register_generator('ArchLabCircleGenerator', type='circle', label='Circle',
+                   regenerate=regenerate_circle,
+                   shape=shape_circle_mesh,
+                   mesh_args=get_circle_mesh_args,
+                   reconcile=reconcile_circle_modifiers)
 
 
 # ------------------------------------------------------------------
@@ -306,6 +279,13 @@ class ArchLabCircleGeneratorPanel(Panel):
             if circle.circle_fill_type == 'NGON':
                 row = layout.row()
                 row.prop(circle, 'circle_truncation')
+            row = layout.row()
+            row.prop(circle, 'material_color')
+            row = layout.row()
+            row.prop(circle, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabCircleGenerator'
 
 
 # ------------------------------------------------------------------
@@ -31,7 +31,12 @@ import bpy
 from bpy.types import Operator, PropertyGroup, Object, Panel
 from bpy.props import FloatProperty, CollectionProperty
 from .archlab_utils import *
-from .archlab_utils_mesh_generator import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+cube_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -39,8 +44,7 @@ from .archlab_utils_mesh_generator import *
 # ------------------------------------------------------------------------------
 def create_cube(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh for cube
     cubemesh = bpy.data.meshes.new("Cube")
@@ -49,12 +53,12 @@ def create_cube(self, context):
     context.collection.objects.link(cubeobject)
     cubeobject.ArchLabCubeGenerator.add()
 
-    cubeobject.ArchLabCubeGenerator[0].cube_height = self.cube_height
-    cubeobject.ArchLabCubeGenerator[0].cube_width = self.cube_width
-    cubeobject.ArchLabCubeGenerator[0].cube_depth = self.cube_depth
-
-    # we shape the mesh.
-    shape_cube_mesh(cubeobject, cubemesh)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        cubeobject.ArchLabCubeGenerator[0].cube_height = self.cube_height
+        cubeobject.ArchLabCubeGenerator[0].cube_width = self.cube_width
+        cubeobject.ArchLabCubeGenerator[0].cube_depth = self.cube_depth
+        schedule_regeneration(cubeobject, regenerate_cube)
 
     # we select, and activate, main object for the cube.
     cubeobject.select_set(True)
@@ -67,52 +71,59 @@ def create_cube(self, context):
 def shape_cube_mesh(mycube, tmp_mesh, update=False):
     cp = mycube.ArchLabCubeGenerator[0]  # "cp" means "cube properties".
     # Create cube mesh data
-    update_cube_mesh_data(tmp_mesh, cp.cube_width, cp.cube_height, cp.cube_depth)
+    with profile_phase('read'):
+        mesh_args = get_cube_mesh_args(cp)
+    update_cube_mesh_data(tmp_mesh, *mesh_args)
     mycube.data = tmp_mesh
 
-    remove_doubles(mycube)
-    set_normals(mycube)
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != mycube.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the cube properties.
+# ------------------------------------------------------------------------------
+def get_cube_mesh_args(cp):
+    return (cp.cube_width, cp.cube_height, cp.cube_depth)
 
 
 # ------------------------------------------------------------------------------
-# Creates cube mesh data.
+# Writes cube mesh data built by the core, identical parameters in a batch are built once.
 # ------------------------------------------------------------------------------
 def update_cube_mesh_data(mymesh, width, height, depth):
-    (myvertices, myedges, myfaces) = generate_cube_mesh_data(width, height, depth)
-
-    mymesh.from_pydata(myvertices, myedges, myfaces)
-    mymesh.update(calc_edges=True)
+    packed = batched_mesh_data(build_packed_mesh_data, 'cube', width, height, depth)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, cube_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update cube mesh.
+# Update cube mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_cube(self, context):
-    # When we update, the active object is the main object of the cube.
-    o = context.view_layer.objects.active
+    # The owner of the changed properties is the main object of the cube,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_cube)
+
+
+# ------------------------------------------------------------------------------
+# Regenerate cube mesh.
+# ------------------------------------------------------------------------------
+def regenerate_cube(o):
     oldmesh = o.data
     oldname = o.data.name
-    # Now we deselect that cube object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the cube:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_cube_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the cube.
-    o.select_set(True)
-    context.view_layer.objects.active = o
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabCubeGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the cube:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_cube_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabCubeGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -152,9 +163,15 @@ class ArchLabCubeProperties(PropertyGroup):
     cube_height = cube_height_property(callback=update_cube)
     cube_width = cube_width_property(callback=update_cube)
     cube_depth = cube_depth_property(callback=update_cube)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabCubeProperties)
 Object.ArchLabCubeGenerator = CollectionProperty(type=ArchLabCubeProperties)
+register_generator('ArchLabCubeGenerator', type='cube', label='Cube',
+                   regenerate=regenerate_cube,
+                   shape=shape_cube_mesh,
+                   mesh_args=get_cube_mesh_args)
 
 
 # ------------------------------------------------------------------
@@ -207,6 +224,13 @@ class ArchLabCubeGeneratorPanel(Panel):
             row.prop(cube, 'cube_height')
             row = layout.row()
             row.prop(cube, 'cube_depth')
+            row = layout.row()
+            row.prop(cube, 'material_color')
+            row = layout.row()
+            row.prop(cube, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabCubeGenerator'
 
 
 # ------------------------------------------------------------------
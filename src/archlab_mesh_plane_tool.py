@@ -31,7 +31,12 @@ import bpy
 from bpy.types import Operator, PropertyGroup, Object, Panel
 from bpy.props import FloatProperty, CollectionProperty
 from .archlab_utils import *
-from .archlab_utils_mesh_generator import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+plane_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -39,8 +44,7 @@ from .archlab_utils_mesh_generator import *
 # ------------------------------------------------------------------------------
 def create_plane(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh for plane
     planemesh = bpy.data.meshes.new("Plane")
@@ -49,12 +53,12 @@ def create_plane(self, context):
     context.collection.objects.link(planeobject)
     planeobject.ArchLabPlaneGenerator.add()
 
-    planeobject.ArchLabPlaneGenerator[0].plane_height = self.plane_height
-    planeobject.ArchLabPlaneGenerator[0].plane_width = self.plane_width
-    planeobject.ArchLabPlaneGenerator[0].plane_depth = self.plane_depth
-
-    # we shape the mesh.
-    shape_plane_mesh(planeobject, planemesh)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        planeobject.ArchLabPlaneGenerator[0].plane_height = self.plane_height
+        planeobject.ArchLabPlaneGenerator[0].plane_width = self.plane_width
+        planeobject.ArchLabPlaneGenerator[0].plane_depth = self.plane_depth
+        schedule_regeneration(planeobject, regenerate_plane)
 
     # we select, and activate, main object for the plane.
     planeobject.select_set(True)
@@ -62,108 +66,78 @@ def create_plane(self, context):
 
 
 # ------------------------------------------------------------------------------
-# Shapes mesh and creates modifier solidify (the modifier, only the first time).
+# Shapes mesh and reconciles modifier solidify.
 # ------------------------------------------------------------------------------
 def shape_plane_mesh(myplane, tmp_mesh, update=False):
     pp = myplane.ArchLabPlaneGenerator[0]  # "pp" means "plane properties".
     # Create plane mesh data
-    update_plane_mesh_data(tmp_mesh, pp.plane_width, pp.plane_height)
+    with profile_phase('read'):
+        mesh_args = get_plane_mesh_args(pp)
+    update_plane_mesh_data(tmp_mesh, *mesh_args)
     myplane.data = tmp_mesh
 
-    remove_doubles(myplane)
-    set_normals(myplane)
+    reconcile_plane_modifiers(myplane)
 
+
+# ------------------------------------------------------------------------------
+# Reconciles plane modifiers, also used when the mesh comes from a cache.
+# ------------------------------------------------------------------------------
+def reconcile_plane_modifiers(myplane):
+    pp = myplane.ArchLabPlaneGenerator[0]  # "pp" means "plane properties".
+    # Reconcile ArchLib modifiers (only changes are applied)
+    mymodifiers = []
     if pp.plane_depth > 0.0:
-        if update is False or is_solidify(myplane) is False:
-            set_modifier_solidify(myplane, pp.plane_depth)
-        else:
-            for mod in myplane.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mod.thickness = pp.plane_depth
-        # Move to Top SOLIDIFY
-        movetotopsolidify(myplane)
+        mymodifiers.append(solidify_modifier(pp.plane_depth))
+    reconcile_modifiers(myplane, mymodifiers)
 
-    else:  # clear not used SOLIDIFY
-        for mod in myplane.modifiers:
-            if mod.type == 'SOLIDIFY':
-                myplane.modifiers.remove(mod)
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != myplane.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the plane properties.
+# ------------------------------------------------------------------------------
+def get_plane_mesh_args(pp):
+    return (pp.plane_width, pp.plane_height)
 
 
 # ------------------------------------------------------------------------------
-# Creates plane mesh data.
+# Writes plane mesh data built by the core, identical parameters in a batch are built once.
 # ------------------------------------------------------------------------------
 def update_plane_mesh_data(mymesh, width, height):
-    (myvertices, myedges, myfaces) = generate_plane_mesh_data(width, height)
-
-    mymesh.from_pydata(myvertices, myedges, myfaces)
-    mymesh.update(calc_edges=True)
+    packed = batched_mesh_data(build_packed_mesh_data, 'plane', width, height)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, plane_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update plane mesh.
+# Update plane mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_plane(self, context):
-    # When we update, the active object is the main object of the plane.
-    o = context.view_layer.objects.active
-    oldmesh = o.data
-    oldname = o.data.name
-    # Now we deselect that plane object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the plane:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_plane_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the plane.
-    o.select_set(True)
-    context.view_layer.objects.active = o
-
+    # The owner of the changed properties is the main object of the plane,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_plane)
 
-# -----------------------------------------------------
-# Verify if solidify exist
-# -----------------------------------------------------
-def is_solidify(myobject):
-    flag = False
-    try:
-        if myobject.modifiers is None:
-            return False
-
-        for mod in myobject.modifiers:
-            if mod.type == 'SOLIDIFY':
-                flag = True
-                break
-        return flag
-    except AttributeError:
-        return False
-
-
-# -----------------------------------------------------
-# Move Solidify to Top
-# -----------------------------------------------------
-def movetotopsolidify(myobject):
-    mymod = None
-    try:
-        if myobject.modifiers is not None:
-            for mod in myobject.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mymod = mod
 
-            if mymod is not None:
-                while myobject.modifiers[0] != mymod:
-                    bpy.ops.object.modifier_move_up(modifier=mymod.name)
-    except AttributeError:
-        return
+# ------------------------------------------------------------------------------
+# Regenerate plane mesh.
+# ------------------------------------------------------------------------------
+def regenerate_plane(o):
+    oldmesh = o.data
+    oldname = o.data.name
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabPlaneGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the plane:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_plane_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabPlaneGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -203,9 +177,16 @@ class ArchLabPlaneProperties(PropertyGroup):
     plane_height = plane_height_property(callback=update_plane)
     plane_width = plane_width_property(callback=update_plane)
     plane_depth = plane_depth_property(callback=update_plane)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabPlaneProperties)
 Object.ArchLabPlaneGenerator = CollectionProperty(type=ArchLabPlaneProperties)
+register_generator('ArchLabPlaneGenerator', type='plane', label='Plane',
+                   regenerate=regenerate_plane,
+                   shape=shape_plane_mesh,
+                   mesh_args=get_plane_mesh_args,
+                   reconcile=reconcile_plane_modifiers)
 
 
 # ------------------------------------------------------------------
@@ -258,6 +239,13 @@ class ArchLabPlaneGeneratorPanel(Panel):
             row.prop(plane, 'plane_height')
             row = layout.row()
             row.prop(plane, 'plane_depth')
+            row = layout.row()
+            row.prop(plane, 'material_color')
+            row = layout.row()
+            row.prop(plane, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabPlaneGenerator'
 
 
 # ------------------------------------------------------------------
@@ -35,9 +35,13 @@ from bpy.props import (
     FloatProperty,
     CollectionProperty
 )
-from math import sqrt
 from .archlab_utils import *
-from .archlab_utils_mesh_generator import *
+from .archlab_utils_regeneration import *
+from .archlab_utils_material_data import *
+from .archlab_core import *
+
+# Shading policy of the generated mesh (see set_mesh_shading)
+sphere_shading = 'FLAT'
 
 
 # ------------------------------------------------------------------------------
@@ -45,8 +49,7 @@ from .archlab_utils_mesh_generator import *
 # ------------------------------------------------------------------------------
 def create_sphere(self, context):
     # deselect all objects
-    for o in bpy.data.objects:
-        o.select_set(False)
+    deselect_all(context)
 
     # we create main object and mesh for sphere
     spheremesh = bpy.data.meshes.new("Sphere")
@@ -55,19 +58,19 @@ def create_sphere(self, context):
     context.collection.objects.link(sphereobject)
     sphereobject.ArchLabSphereGenerator.add()
 
-    sphereobject.ArchLabSphereGenerator[0].sphere_radius = \
-        self.sphere_radius
-    sphereobject.ArchLabSphereGenerator[0].sphere_type = \
-        self.sphere_type
-    sphereobject.ArchLabSphereGenerator[0].sphere_segments = \
-        self.sphere_segments
-    sphereobject.ArchLabSphereGenerator[0].sphere_rings = \
-        self.sphere_rings
-    sphereobject.ArchLabSphereGenerator[0].sphere_subdivisions = \
-        self.sphere_subdivisions
-
-    # we shape the mesh.
-    shape_sphere_mesh(sphereobject, spheremesh)
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        sphereobject.ArchLabSphereGenerator[0].sphere_radius = \
+            self.sphere_radius
+        sphereobject.ArchLabSphereGenerator[0].sphere_type = \
+            self.sphere_type
+        sphereobject.ArchLabSphereGenerator[0].sphere_segments = \
+            self.sphere_segments
+        sphereobject.ArchLabSphereGenerator[0].sphere_rings = \
+            self.sphere_rings
+        sphereobject.ArchLabSphereGenerator[0].sphere_subdivisions = \
+            self.sphere_subdivisions
+        schedule_regeneration(sphereobject, regenerate_sphere)
 
     # we select, and activate, main object for the sphere.
     sphereobject.select_set(True)
@@ -80,57 +83,59 @@ def create_sphere(self, context):
 def shape_sphere_mesh(mysphere, tmp_mesh, update=False):
     sp = mysphere.ArchLabSphereGenerator[0]  # "sp" means "sphere properties".
     # Create sphere mesh data
-    update_sphere_mesh_data(tmp_mesh, sp.sphere_radius, sp.sphere_type, sp.sphere_segments, sp.sphere_rings, sp.sphere_subdivisions)
+    with profile_phase('read'):
+        mesh_args = get_sphere_mesh_args(sp)
+    update_sphere_mesh_data(tmp_mesh, *mesh_args)
     mysphere.data = tmp_mesh
 
-    remove_doubles(mysphere)
-    set_normals(mysphere)
 
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True and o.name != mysphere.name:
-            o.select_set(False)
+# ------------------------------------------------------------------------------
+# Gets arguments of the core mesh builder from the sphere properties.
+# ------------------------------------------------------------------------------
+def get_sphere_mesh_args(sp):
+    return (sp.sphere_radius, sp.sphere_type, sp.sphere_segments, sp.sphere_rings, sp.sphere_subdivisions)
 
 
 # ------------------------------------------------------------------------------
-# Creates sphere mesh data.
+# Writes sphere mesh data built by the core, identical parameters in a batch are built once.
 # ------------------------------------------------------------------------------
 def update_sphere_mesh_data(mymesh, radius, type, segments, rings, subdivisions):
-    if type == 'UV':
-        (myvertices, myedges, myfaces) = \
-            generate_sphere_uv_mesh_data(radius, segments, rings)
-    if type == 'ICO':
-        (myvertices, myedges, myfaces) = \
-            generate_sphere_ico_mesh_data(radius, subdivisions)
-
-    mymesh.from_pydata(myvertices, myedges, myfaces)
-    mymesh.update(calc_edges=True)
+    packed = batched_mesh_data(build_packed_mesh_data, 'sphere', radius, type, segments, rings, subdivisions)
+    write_packed_mesh_data(mymesh, packed)
+    set_mesh_shading(mymesh, sphere_shading)
 
 
 # ------------------------------------------------------------------------------
-# Update sphere mesh.
+# Update sphere mesh, the rebuild is deferred and coalesced.
 # ------------------------------------------------------------------------------
 def update_sphere(self, context):
-    # When we update, the active object is the main object of the sphere.
-    o = context.view_layer.objects.active
+    # The owner of the changed properties is the main object of the sphere,
+    # operator properties have no owner and nothing is rebuilt.
+    o = get_owner_object(self)
+    schedule_regeneration(o, regenerate_sphere)
+
+
+# ------------------------------------------------------------------------------
+# Regenerate sphere mesh.
+# ------------------------------------------------------------------------------
+def regenerate_sphere(o):
     oldmesh = o.data
     oldname = o.data.name
-    # Now we deselect that sphere object to not delete it.
-    o.select_set(False)
-    # and we create a new mesh for the sphere:
-    tmp_mesh = bpy.data.meshes.new("temp")
-    # deselect all objects
-    for obj in bpy.data.objects:
-        obj.select_set(False)
-    # Finally we shape the main mesh again,
-    shape_sphere_mesh(o, tmp_mesh, True)
-    o.data = tmp_mesh
-    # Remove data (mesh of active object),
-    bpy.data.meshes.remove(oldmesh)
-    tmp_mesh.name = oldname
-    # and select, and activate, the main object of the sphere.
-    o.select_set(True)
-    context.view_layer.objects.active = o
+    # Objects with equal parameters share one mesh (copy on write),
+    tmp_mesh = link_shared_mesh(o, 'ArchLabSphereGenerator')
+    if tmp_mesh is None:
+        # or we rebuild the own mesh (a new one when shared) for the sphere:
+        tmp_mesh = get_rebuild_mesh(o)
+        # Finally we shape the main mesh again,
+        shape_sphere_mesh(o, tmp_mesh, True)
+        o.data = tmp_mesh
+        share_mesh(o, 'ArchLabSphereGenerator')
+    # Remove data (old mesh of the object), unless still shared,
+    if oldmesh != tmp_mesh and oldmesh.users == 0:
+        remove_unused_mesh(oldmesh)
+    # and a mesh used only by this object takes the old name.
+    if tmp_mesh.users == 1:
+        tmp_mesh.name = oldname
 
 
 # -----------------------------------------------------
@@ -193,10 +198,16 @@ class ArchLabSphereProperties(PropertyGroup):
     sphere_segments = sphere_segments_property(callback=update_sphere)
     sphere_rings = sphere_rings_property(callback=update_sphere)
     sphere_subdivisions = sphere_subdivisions_property(callback=update_sphere)
+    material_color = material_color_property(callback=update_material_color)
+    material_roughness = material_roughness_property(callback=update_material_roughness)
 
 bpy.utils.register_class(ArchLabSphereProperties)
 Object.ArchLabSphereGenerator = \
     CollectionProperty(type=ArchLabSphereProperties)
+register_generator('ArchLabSphereGenerator', type='sphere', label='Sphere',
+                   regenerate=regenerate_sphere,
+                   shape=shape_sphere_mesh,
+                   mesh_args=get_sphere_mesh_args)
 
 
 # ------------------------------------------------------------------
@@ -257,6 +268,13 @@ class ArchLabSphereGeneratorPanel(Panel):
             if sphere.sphere_type == 'ICO':
                 row = layout.row()
                 row.prop(sphere, 'sphere_subdivisions')
+            row = layout.row()
+            row.prop(sphere, 'material_color')
+            row = layout.row()
+            row.prop(sphere, 'material_roughness')
+            if len(context.selected_objects) > 1:
+                row = layout.row()
+                row.operator("object.archlab_apply_to_selected").generator = 'ArchLabSphereGenerator'
 
 
 # ------------------------------------------------------------------
@@ -28,10 +28,14 @@
 # ----------------------------------------------------------
 
 import bpy
-from math import sin, cos, radians
-from mathutils import Vector, Matrix, Euler
+import bmesh
+import numpy as np
+from math import radians
 from os import path
-import json
+from .archlab_core.geometry import *
+from .archlab_core.library import *
+from .archlab_core.mesh_ops import pack_mesh_data
+from .archlab_core.profile import profile_phase
 
 debug_level = 3
 
@@ -49,49 +53,85 @@ def log_write(level, text_to_write):
 
 
 # --------------------------------------------------------------------
-# Set normals
-# True = faces to inside
+# Deselects objects, visits only the selected ones (not whole scene)
+# keep - object to leave selected
 # --------------------------------------------------------------------
-def set_normals(myobject, direction=False):
-    bpy.context.view_layer.objects.active = myobject
-    # go edit mode
-    bpy.ops.object.mode_set(mode='EDIT')
-    # select all faces
-    bpy.ops.mesh.select_all(action='SELECT')
-    # recalculate outside normals
-    bpy.ops.mesh.normals_make_consistent(inside=direction)
-    # go object mode again
-    bpy.ops.object.editmode_toggle()
+def deselect_all(context=None, keep=None):
+    if context is None:
+        context = bpy.context
+    with profile_phase('selection'):
+        for o in list(context.view_layer.objects.selected):
+            if o != keep:
+                o.select_set(False)
 
 
 # --------------------------------------------------------------------
-# Set shade smooth
+# Set mesh shading, works on mesh data (no context needed)
+# FLAT - flat faces
+# SMOOTH - smooth faces
+# AUTO - smooth faces, edges sharper than angle stay sharp
 # --------------------------------------------------------------------
-def set_smooth(myobject):
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True:
-            o.select_set(False)
+def set_mesh_shading(mymesh, policy='FLAT', angle=radians(30.0)):
+    with profile_phase('shading'):
+        apply_mesh_shading(mymesh, policy, angle)
 
-    myobject.select_set(True)
-    bpy.context.view_layer.objects.active = myobject
-    if bpy.context.view_layer.objects.active.name == myobject.name:
-        bpy.ops.object.shade_smooth()
+
+# --------------------------------------------------------------------
+# Applies mesh shading policy, see set_mesh_shading (not profiled)
+# --------------------------------------------------------------------
+def apply_mesh_shading(mymesh, policy, angle):
+    smooth = policy in ('SMOOTH', 'AUTO')
+    mymesh.polygons.foreach_set('use_smooth', [smooth] * len(mymesh.polygons))
+    if hasattr(mymesh, 'use_auto_smooth'):
+        mymesh.use_auto_smooth = policy == 'AUTO'
+        mymesh.auto_smooth_angle = angle
+    elif policy == 'AUTO':
+        mymesh.set_sharp_from_angle(angle=angle)
+
+
+# --------------------------------------------------------------------
+# Writes vertices, edges and faces into an empty mesh
+# --------------------------------------------------------------------
+def write_mesh_data(mymesh, vertices, edges, faces):
+    write_packed_mesh_data(mymesh, pack_mesh_data(vertices, edges, faces))
 
 
 # --------------------------------------------------------------------
-# Remove doubles
+# Removes geometry of the mesh, its name and materials are kept
 # --------------------------------------------------------------------
-def remove_doubles(myobject):
-    bpy.context.view_layer.objects.active = myobject
-    # go edit mode
-    bpy.ops.object.mode_set(mode='EDIT')
-    # select all faces
-    bpy.ops.mesh.select_all(action='SELECT')
-    # remove
-    bpy.ops.mesh.remove_doubles()
-    # go object mode again
-    bpy.ops.object.editmode_toggle()
+def clear_mesh(mymesh):
+    # clear_geometry exists since Blender 2.81
+    if hasattr(mymesh, 'clear_geometry'):
+        mymesh.clear_geometry()
+    else:
+        bm = bmesh.new()
+        bm.to_mesh(mymesh)
+        bm.free()
+
+
+# --------------------------------------------------------------------
+# Writes packed mesh data (see pack_mesh_data) into an empty mesh
+# Arrays go to bulk foreach_set as buffers (no per item calls)
+# --------------------------------------------------------------------
+def write_packed_mesh_data(mymesh, packed):
+    (coords, edges, loop_totals, loop_indices) = packed
+    with profile_phase('write'):
+        mymesh.vertices.add(len(coords))
+        mymesh.vertices.foreach_set("co", coords.ravel())
+        if len(edges):
+            mymesh.edges.add(len(edges))
+            mymesh.edges.foreach_set("vertices", edges.ravel())
+        if len(loop_totals):
+            loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+            np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+            mymesh.loops.add(len(loop_indices))
+            mymesh.loops.foreach_set("vertex_index", loop_indices)
+            mymesh.polygons.add(len(loop_totals))
+            mymesh.polygons.foreach_set("loop_start", loop_starts)
+            # since Blender 4.0 loop_total is derived from loop_start
+            if not bpy.types.MeshPolygon.bl_rna.properties['loop_total'].is_readonly:
+                mymesh.polygons.foreach_set("loop_total", loop_totals)
+        mymesh.update(calc_edges=True)
 
 
 # --------------------------------------------------------------------
@@ -114,175 +154,112 @@ def set_material(ob, matname, index=0):
 
 
 # --------------------------------------------------------------------
-# Adds armature modifier
-# --------------------------------------------------------------------
-def set_modifier_armature(myobject, armatureobject, modname="Armature ArchLib"):
-    modid = myobject.modifiers.find(modname)
-    if (modid == -1):
-        mod = myobject.modifiers.new(name=modname, type="ARMATURE")
-    else:
-        mod = myobject.modifiers[modname]
-    mod.object = armatureobject
-
-
-# --------------------------------------------------------------------
-# Adds array modifier
+# Defines armature modifier for reconcile_modifiers
 # --------------------------------------------------------------------
-def set_modifier_array(myobject, relativeoffset=(1.0, 0.0, 0.0), count=2, modname="Array ArchLib"):
-    modid = myobject.modifiers.find(modname)
-    if (modid == -1):
-        mod = myobject.modifiers.new(name=modname, type="ARRAY")
-    else:
-        mod = myobject.modifiers[modname]
-    mod.relative_offset_displace = relativeoffset
-    mod.count = count
+def armature_modifier(armatureobject, modname="Armature ArchLib"):
+    return (modname, "ARMATURE", {
+        "object": armatureobject,
+    })
 
 
 # --------------------------------------------------------------------
-# Adds solidify modifier
+# Defines array modifier for reconcile_modifiers
 # --------------------------------------------------------------------
-def set_modifier_solidify(myobject, width=0.01, modname="Solidify ArchLib"):
-    modid = myobject.modifiers.find(modname)
-    if (modid == -1):
-        mod = myobject.modifiers.new(name=modname, type="SOLIDIFY")
-    else:
-        mod = myobject.modifiers[modname]
-    mod.thickness = width
-    mod.offset = 0
-    mod.use_even_offset = True
-    mod.use_quality_normals = True
+def array_modifier(relativeoffset=(1.0, 0.0, 0.0), count=2, modname="Array ArchLib"):
+    return (modname, "ARRAY", {
+        "relative_offset_displace": relativeoffset,
+        "count": count,
+    })
 
 
 # --------------------------------------------------------------------
-# Adds subdivision modifier
+# Defines solidify modifier for reconcile_modifiers
 # --------------------------------------------------------------------
-def set_modifier_subsurf(myobject, levels=1, renderlevels=2, modname="Subsurf ArchLib"):
-    modid = myobject.modifiers.find(modname)
-    if (modid == -1):
-        mod = myobject.modifiers.new(name=modname, type="SUBSURF")
-    else:
-        mod = myobject.modifiers[modname]
-    mod.levels = levels
-    mod.render_levels = renderlevels
+def solidify_modifier(width=0.01, modname="Solidify ArchLib"):
+    return (modname, "SOLIDIFY", {
+        "thickness": width,
+        "offset": 0,
+        "use_even_offset": True,
+        "use_quality_normals": True,
+    })
 
 
 # --------------------------------------------------------------------
-# Rotates a point in 2D space with specified angle
+# Defines subdivision modifier for reconcile_modifiers
 # --------------------------------------------------------------------
-def rotate_point2d(posx, posy, angle):
-    v1 = Vector([posx, posy])
-    rada1 = radians(angle)
-    cosa1 = cos(rada1)
-    sina1 = sin(rada1)
-    mat1 = Matrix([[cosa1, -sina1],
-                   [sina1, cosa1]])
-    v2 = mat1 @ v1
-    return v2
+def subsurf_modifier(levels=1, renderlevels=2, modname="Subsurf ArchLib"):
+    return (modname, "SUBSURF", {
+        "levels": levels,
+        "render_levels": renderlevels,
+    })
 
 
 # --------------------------------------------------------------------
-# Rotates a point in 3D space with specified angle in deg
+# Reconciles ArchLib modifiers with the desired ordered list
+# modifiers - list of (name, type, settings), see *_modifier functions
+# Desired modifiers are placed on top of the stack, in list order,
+# ArchLib modifiers not listed are removed, other modifiers are kept.
+# Only changed values are written, so repeated calls are no-ops.
 # --------------------------------------------------------------------
-def rotate_point3d(pos, anglex=0.0, angley=0.0, anglez=0.0):
-    return rotate_point3d_rad(
-        pos,
-        anglex=radians(anglex),
-        angley=radians(angley),
-        anglez=radians(anglez)
-    )
+def reconcile_modifiers(myobject, modifiers):
+    with profile_phase('modifiers'):
+        reconcile_modifier_stack(myobject, modifiers)
 
 
 # --------------------------------------------------------------------
-# Rotates a point in 3D space with specified angle in radians
+# Reconciles ArchLib modifiers, see reconcile_modifiers (not profiled)
 # --------------------------------------------------------------------
-def rotate_point3d_rad(pos, anglex=0.0, angley=0.0, anglez=0.0):
-    genvector = Vector(pos)
-    myEuler = Euler((anglex, angley, anglez), 'XYZ')
-    genvector.rotate(myEuler)
-    return genvector
-
+def reconcile_modifier_stack(myobject, modifiers):
+    mymods = myobject.modifiers
+    modnames = [m[0] for m in modifiers]
+    for mod in [m for m in mymods if m.name.endswith(" ArchLib")]:
+        if mod.name not in modnames:
+            mymods.remove(mod)
 
-# --------------------------------------------------------------------
-# Rotates a point in 2D space with specified angle
-# --------------------------------------------------------------------
-def slide_point3d(startpoint, endpoint, scale):
-    v1 = Vector(startpoint)
-    v2 = Vector(endpoint)
-    return v2 + (v1 - v2) * scale
-
-
-# -----------------------------------------------------
-# Truncate circle ngon mesh
-# -----------------------------------------------------
-def truncate_circle_mesh(verts, faces, trunc_val):
-    myverts = []
-    vertnum = len(verts)
-    tscal = 0.5 * trunc_val
-    for t in range(vertnum):
-        pprev = verts[(t+vertnum-1) % vertnum]
-        p1 = verts[t]
-        pnext = verts[(t+1) % vertnum]
-        v1 = slide_point3d(pprev, p1, tscal)
-        v2 = slide_point3d(pnext, p1, tscal)
-        myverts.append((v1))
-        myverts.append((v2))
-    myfaces = [list(range(len(myverts)))]
-    return myverts, myfaces
-
-
-# -----------------------------------------------------
-# Subdivide ico sphere mesh
-# -----------------------------------------------------
-def subdivide_icosphere_mesh(verts, faces, radius):
-    myverts = verts
-    myfaces = []
-    vertnum = len(faces)
-    for f in faces:
-        laste = f[-1]
-        newface = []
-        for ts in range(len(f)):
-            v1 = slide_point3d(verts[laste], verts[f[ts]], 0.5)
-            v1.normalize()
-            v1 = v1 * radius
-            newface.append(len(myverts))
-            myverts.append(v1)
-            laste = f[ts]
-        myfaces.append((newface[0], newface[1], newface[2]))
-        myfaces.append((newface[0], newface[1], f[0]))
-        myfaces.append((newface[1], newface[2], f[1]))
-        myfaces.append((newface[2], newface[0], f[2]))
-    return myverts, myfaces
+    for index, (modname, modtype, settings) in enumerate(modifiers):
+        mod = mymods.get(modname)
+        if mod is not None and mod.type != modtype:
+            mymods.remove(mod)
+            mod = None
+        if mod is None:
+            mod = mymods.new(name=modname, type=modtype)
+        for key, value in settings.items():
+            if not is_same_value(getattr(mod, key), value):
+                setattr(mod, key, value)
+        modindex = mymods.find(modname)
+        if modindex != index:
+            move_modifier(myobject, modname, modindex, index)
 
 
 # --------------------------------------------------------------------
-# Gets mesh data from json file
+# Moves modifier up in the stack, without operators if possible
 # --------------------------------------------------------------------
-def load_mesh_data_from_library(meshname):
-    meshlibrary = load_meshlibrary_data()
-    return meshlibrary['Meshes'][meshname]
+def move_modifier(myobject, modname, from_index, to_index):
+    if hasattr(myobject.modifiers, "move"):
+        myobject.modifiers.move(from_index, to_index)
+    else:
+        for t in range(from_index - to_index):
+            bpy.ops.object.modifier_move_up({"object": myobject}, modifier=modname)
 
 
 # --------------------------------------------------------------------
-# Loads meshes json file
+# Compares property values, floats and vectors with tolerance
 # --------------------------------------------------------------------
-def load_meshlibrary_data():
-    json_data = None
-    library_path = get_meshlibrary_path()
-    with open(library_path, 'r') as f:
-        json_data = json.load(f)
-    return json_data
+def is_same_value(current, value, tolerance=1e-6):
+    if isinstance(value, bool) or not isinstance(value, (int, float, tuple, list)):
+        return current == value
+    if isinstance(value, (tuple, list)):
+        return len(current) == len(value) and all(
+            is_same_value(c, v, tolerance) for c, v in zip(current, value))
+    return abs(current - value) <= tolerance * max(1.0, abs(value))
 
 
 # --------------------------------------------------------------------
-# Gets mesh library file path
+# Copies material slots of the mesh, kept when the mesh is rebuilt
 # --------------------------------------------------------------------
-def get_meshlibrary_path():
-    data_path = get_data_path()
-    if data_path:
-        return path.join(data_path, "meshes.json")
-    else:
-        log_write("CRITICAL", "Mesh library not found. Please check your Blender addons directory.")
-        return None
+def copy_mesh_materials(source, target):
+    for mat in source.materials:
+        target.materials.append(mat)
 
 
 # --------------------------------------------------------------------
@@ -0,0 +1,412 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+import bpy
+import hashlib
+import json
+from time import perf_counter
+from bpy.types import Operator
+from bpy.props import IntProperty, StringProperty
+from bpy.app.handlers import persistent
+from bpy_extras.io_utils import ImportHelper
+from .archlab_utils_regeneration import *
+from .archlab_core import build_packed_mesh_data, build_mesh_data_parallel
+
+# Scene specs applied in this session, collection name: (object count
+# of the collection, dict of object id: (spec object, object name)),
+# only changed spec objects are compared with the scene
+applied_specs = {}
+
+
+# --------------------------------------------------------------------
+# Gets generator property name for the type name (e.g. 'plate')
+# --------------------------------------------------------------------
+def get_generator_name(typename):
+    for (genname, callbacks) in archlab_generators.items():
+        if callbacks.get('type') == typename:
+            return genname
+    raise ValueError("Unknown ArchLab object type: %s" % typename)
+
+
+# --------------------------------------------------------------------
+# Writes generator parameters given as dict
+# Collections (e.g. room_walls) are given as lists of dicts
+# Kinds (enums) are written first, whatever the order of the keys,
+# so presets written by their update do not override given values
+# --------------------------------------------------------------------
+def set_generator_properties(props, params):
+    rnaprops = props.bl_rna.properties
+    propnames = sorted(params, key=lambda propname: getattr(rnaprops.get(propname), 'type', None) != 'ENUM')
+    for propname in propnames:
+        value = params[propname]
+        prop = rnaprops.get(propname)
+        if prop is None or propname in ('rna_type', 'name'):
+            raise ValueError("Unknown parameter: %s" % propname)
+        if prop.type == 'COLLECTION':
+            if not isinstance(value, list) or not all(isinstance(v, dict) for v in value):
+                raise ValueError("Parameter %s must be a list of objects" % propname)
+            items = getattr(props, propname)
+            items.clear()
+            for itemparams in value:
+                set_generator_properties(items.add(), itemparams)
+        else:
+            try:
+                setattr(props, propname, value)
+            except TypeError as e:
+                # wrongly typed values are spec errors, as unknown parameters
+                raise ValueError("Wrong value of parameter %s: %s" % (propname, e))
+
+
+# --------------------------------------------------------------------
+# Creates ArchLab object, no context, selection or operator needed
+# The mesh is built when regeneration is not suspended
+# --------------------------------------------------------------------
+def build_object(typename, params=None, collection=None, location=(0.0, 0.0, 0.0),
+                 rotation=(0.0, 0.0, 0.0), name=None):
+    genname = get_generator_name(typename)
+    callbacks = archlab_generators[genname]
+    if collection is None:
+        collection = bpy.context.scene.collection
+    if name is None:
+        name = callbacks['label']
+
+    mymesh = bpy.data.meshes.new(name)
+    myobject = bpy.data.objects.new(name, mymesh)
+    myobject.location = location
+    myobject.rotation_euler = rotation
+    collection.objects.link(myobject)
+    props = getattr(myobject, genname).add()
+
+    # we set parameters and shape the mesh, once all parameters are set.
+    with suspended_regeneration():
+        set_generator_properties(props, params or {})
+        schedule_regeneration(myobject, callbacks['regenerate'])
+
+    setup = callbacks.get('setup')
+    if setup is not None:
+        setup(myobject, collection)
+    return myobject
+
+
+# --------------------------------------------------------------------
+# Gets core mesh builder task (typename, *args) of ArchLab object
+# --------------------------------------------------------------------
+def get_mesh_task(myobject):
+    for (genname, callbacks) in archlab_generators.items():
+        items = getattr(myobject, genname, None)
+        if items and 'mesh_args' in callbacks:
+            return (callbacks['type'],) + tuple(callbacks['mesh_args'](items[0]))
+    return None
+
+
+# --------------------------------------------------------------------
+# Builds mesh data of the objects in worker processes, ahead of the flush
+# Only the bulk mesh writes are left for the main thread, objects with
+# parameters changed while shaping (e.g. room wall count) are generated
+# by the flush as usual
+# --------------------------------------------------------------------
+def prebuild_objects(objects, processes=None):
+    tasks = [task for task in map(get_mesh_task, objects) if task is not None]
+    mesh_data = build_mesh_data_parallel(tasks, processes)
+    prebuild_mesh_data({(build_packed_mesh_data, task): packed
+                        for (task, packed) in mesh_data.items()})
+
+
+# --------------------------------------------------------------------
+# Builds all objects of the build spec (dict), meshes are built once
+# spec - {"collection": name, "objects": [{"type", "name", "location",
+#         "rotation", "params"}, ...]}
+# timings - dict receiving seconds spent per phase
+# processes - worker processes generating mesh data, 0 generates it
+#             in the flush on the main thread
+# --------------------------------------------------------------------
+def build_spec(spec, timings=None, processes=0):
+    if timings is None:
+        timings = {}
+    scene = bpy.context.scene
+    collection = scene.collection
+    if 'collection' in spec:
+        collection = bpy.data.collections.new(spec['collection'])
+        scene.collection.children.link(collection)
+
+    objects = []
+    start = perf_counter()
+    with suspended_regeneration():
+        for item in spec.get('objects', []):
+            objects.append(build_object(
+                item['type'],
+                params=item.get('params'),
+                collection=collection,
+                location=item.get('location', (0.0, 0.0, 0.0)),
+                rotation=item.get('rotation', (0.0, 0.0, 0.0)),
+                name=item.get('name'),
+            ))
+        timings['create'] = perf_counter() - start
+        start = perf_counter()
+        if processes > 1:
+            prebuild_objects(objects, processes)
+        timings['generate'] = perf_counter() - start
+        start = perf_counter()
+    # all meshes are built when the suspended block exits
+    timings['regenerate'] = perf_counter() - start
+    return objects
+
+
+# --------------------------------------------------------------------
+# Gets stable id of the spec object, the object name when not given
+# --------------------------------------------------------------------
+def get_spec_object_id(item):
+    specid = item.get('id', item.get('name'))
+    if specid is None:
+        raise ValueError("Spec object without id: %s" % json.dumps(item))
+    return str(specid)
+
+
+# --------------------------------------------------------------------
+# Gets fingerprint of the spec object type and parameters (not the
+# transform), stored on the object for specs applied in earlier sessions
+# --------------------------------------------------------------------
+def get_spec_object_hash(item):
+    data = json.dumps([item['type'], item.get('params', {})], sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+# --------------------------------------------------------------------
+# Gets objects of the applied spec, id: (spec object or None, name)
+# Scene objects are indexed again when they changed outside the spec
+# --------------------------------------------------------------------
+def get_applied_spec(collection, specname):
+    (count, applied) = applied_specs.get(specname, (None, None))
+    if applied is not None and count == len(collection.objects):
+        return applied
+    applied = {}
+    for myobject in collection.objects:
+        specid = myobject.get('archlab_id')
+        if specid is not None and myobject.get('archlab_spec') == specname:
+            applied[specid] = (None, myobject.name)
+    return applied
+
+
+# --------------------------------------------------------------------
+# Gets object of the applied spec, None when it was deleted or the name
+# is now used by another object
+# objects - scene objects by name, bpy.data.objects.get searches the
+#           whole list, one lookup per spec object grows quadratic
+# --------------------------------------------------------------------
+def get_spec_object(objects, objname, specid):
+    if objname is None:
+        return None
+    myobject = objects.get(objname)
+    if myobject is None or myobject.get('archlab_id') != specid:
+        return None
+    return myobject
+
+
+# --------------------------------------------------------------------
+# Verifies if object transform differs from the spec object transform
+# --------------------------------------------------------------------
+def is_transform_changed(myobject, location, rotation, tolerance=1e-6):
+    for (current, value) in zip(tuple(myobject.location) + tuple(myobject.rotation_euler),
+                                tuple(location) + tuple(rotation)):
+        if abs(current - value) > tolerance:
+            return True
+    return False
+
+
+# --------------------------------------------------------------------
+# Removes object of the applied spec, its mesh when no longer used
+# --------------------------------------------------------------------
+def remove_spec_object(objects, myobject):
+    objects.pop(myobject.name, None)
+    mymesh = myobject.data
+    bpy.data.objects.remove(myobject, do_unlink=True)
+    if mymesh is not None and mymesh.users == 0:
+        bpy.data.meshes.remove(mymesh)
+
+
+# --------------------------------------------------------------------
+# Applies scene spec (dict) to existing objects, diffed by stable id
+# Added and changed objects are rebuilt, moved objects only get the new
+# transform, removed objects are deleted, other objects are untouched
+# spec - build spec, objects have "id" (the "name" when not given)
+# timings - dict receiving seconds spent per phase
+# processes - worker processes generating mesh data (see build_spec)
+# Returns dict of object counts per change
+# --------------------------------------------------------------------
+def apply_spec(spec, timings=None, processes=0):
+    if timings is None:
+        timings = {}
+    scene = bpy.context.scene
+    specname = spec.get('collection', '')
+    collection = scene.collection
+    if specname:
+        collection = bpy.data.collections.get(specname)
+        if collection is None:
+            collection = bpy.data.collections.new(specname)
+            scene.collection.children.link(collection)
+
+    start = perf_counter()
+    applied = get_applied_spec(collection, specname)
+    objects = {myobject.name: myobject for myobject in bpy.data.objects}
+    items = {}
+    for item in spec.get('objects', []):
+        items[get_spec_object_id(item)] = item
+    stats = {'added': 0, 'changed': 0, 'moved': 0, 'removed': 0, 'unchanged': 0}
+    rebuilt = []
+    for (specid, (previous, objname)) in list(applied.items()):
+        if specid not in items:
+            myobject = get_spec_object(objects, objname, specid)
+            if myobject is not None:
+                remove_spec_object(objects, myobject)
+            del applied[specid]
+            stats['removed'] += 1
+    timings['diff'] = perf_counter() - start
+
+    start = perf_counter()
+    with suspended_regeneration():
+        for (specid, item) in items.items():
+            (previous, objname) = applied.get(specid, (None, None))
+            myobject = get_spec_object(objects, objname, specid)
+            if myobject is not None and previous is not None and previous == item:
+                stats['unchanged'] += 1
+                continue
+            itemhash = get_spec_object_hash(item)
+            location = item.get('location', (0.0, 0.0, 0.0))
+            rotation = item.get('rotation', (0.0, 0.0, 0.0))
+            genname = get_generator_name(item['type'])
+            if myobject is not None and genname not in myobject:
+                # type changed, the object is created again
+                remove_spec_object(objects, myobject)
+                myobject = None
+            if myobject is None:
+                myobject = build_object(item['type'], params=item.get('params'),
+                                        collection=collection, location=location,
+                                        rotation=rotation, name=item.get('name'))
+                myobject['archlab_id'] = specid
+                myobject['archlab_spec'] = specname
+                rebuilt.append(myobject)
+                stats['added'] += 1
+            elif myobject.get('archlab_spec_hash') != itemhash:
+                props = getattr(myobject, genname)[0]
+                # parameters missing in the spec go back to defaults
+                for prop in props.bl_rna.properties:
+                    if prop.identifier not in ('rna_type', 'name') and not prop.is_readonly:
+                        props.property_unset(prop.identifier)
+                set_generator_properties(props, item.get('params', {}))
+                schedule_regeneration(myobject, archlab_generators[genname]['regenerate'])
+                myobject.location = location
+                myobject.rotation_euler = rotation
+                rebuilt.append(myobject)
+                stats['changed'] += 1
+            elif is_transform_changed(myobject, location, rotation):
+                myobject.location = location
+                myobject.rotation_euler = rotation
+                stats['moved'] += 1
+            else:
+                stats['unchanged'] += 1
+            if 'name' in item and myobject.name != item['name']:
+                myobject.name = item['name']
+            myobject['archlab_spec_hash'] = itemhash
+            applied[specid] = (item, myobject.name)
+        applied_specs[specname] = (len(collection.objects), applied)
+        timings['create'] = perf_counter() - start
+        start = perf_counter()
+        if processes > 1:
+            prebuild_objects(rebuilt, processes)
+        timings['generate'] = perf_counter() - start
+        start = perf_counter()
+    # changed objects are rebuilt when the suspended block exits
+    timings['regenerate'] = perf_counter() - start
+    return stats
+
+
+# --------------------------------------------------------------------
+# Forgets applied specs, object names may differ after load and undo
+# --------------------------------------------------------------------
+@persistent
+def build_load_post(*args):
+    applied_specs.clear()
+
+
+# ------------------------------------------------------------------
+# Define operator class to apply scene spec file
+# Re-applying an edited spec only rebuilds the changed objects
+# ------------------------------------------------------------------
+class ArchLabApplySpec(Operator, ImportHelper):
+    bl_idname = "scene.archlab_apply_spec"
+    bl_label = "Apply Scene Spec"
+    bl_description = "Create, update and remove ArchLab objects to match the scene spec (JSON file)"
+    bl_category = 'ArchLab'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".json"
+    filter_glob = StringProperty(
+        default="*.json",
+        options={'HIDDEN'},
+    )
+    spec_processes = IntProperty(
+        name='Processes',
+        min=0, soft_max=32,
+        default=0,
+        description='Worker processes generating mesh data, 0 generates it in Blender',
+    )
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        start = perf_counter()
+        try:
+            with open(self.filepath, 'r') as f:
+                spec = json.load(f)
+            stats = apply_spec(spec, processes=self.spec_processes)
+        except (OSError, ValueError, KeyError) as e:
+            self.report({'ERROR'}, "ArchLab: %s" % e)
+            return {'CANCELLED'}
+        self.report({'INFO'}, "ArchLab: %i added, %i changed, %i moved, %i removed in %.3f s" % (
+            stats['added'], stats['changed'], stats['moved'], stats['removed'], perf_counter() - start))
+        return {'FINISHED'}
+
+
+# --------------------------------------------------------------------
+# Register build handlers
+# --------------------------------------------------------------------
+def register_build():
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(build_load_post)
+
+
+# --------------------------------------------------------------------
+# Unregister build handlers
+# --------------------------------------------------------------------
+def unregister_build():
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if build_load_post in handlers:
+            handlers.remove(build_load_post)
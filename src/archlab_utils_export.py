@@ -0,0 +1,210 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
+from bpy_extras.io_utils import ExportHelper
+from .archlab_utils_build import get_mesh_task
+from .archlab_core import write_obj, write_glb, write_mesh_files
+
+
+# --------------------------------------------------------------------
+# Gets exported ArchLab objects as (name, task, matrix), objects
+# without a core mesh builder are skipped
+# --------------------------------------------------------------------
+def get_export_objects(context, selected_only=False):
+    objects = context.selected_objects if selected_only else context.scene.objects
+    for myobject in objects:
+        task = get_mesh_task(myobject)
+        if task is not None:
+            yield (myobject.name, task, [tuple(row) for row in myobject.matrix_world])
+
+
+# ------------------------------------------------------------------
+# Define operator class to export ArchLab objects as Wavefront OBJ
+# Meshes are written from the core mesh builders, not from Blender
+# mesh data, modifiers are not applied
+# ------------------------------------------------------------------
+class ArchLabExportObj(Operator, ExportHelper):
+    bl_idname = "export_scene.archlab_obj"
+    bl_label = "Export ArchLab OBJ"
+    bl_description = "Export ArchLab objects as Wavefront OBJ, straight from their generator parameters"
+    bl_category = 'ArchLab'
+
+    filename_ext = ".obj"
+    filter_glob = StringProperty(
+        default="*.obj",
+        options={'HIDDEN'},
+    )
+    export_selected = BoolProperty(
+        name='Selection Only',
+        default=False,
+        description='Export only the selected objects',
+    )
+    export_normals = EnumProperty(
+        items=(
+            ('FLAT', 'Flat', 'One normal per face'),
+            ('SMOOTH', 'Smooth', 'One normal per vertex'),
+            ('NONE', 'None', 'Do not write normals'),
+        ),
+        name='Normals',
+        default='FLAT',
+        description='Normals written with the faces',
+    )
+    export_uvs = BoolProperty(
+        name='Box UVs',
+        default=False,
+        description='Write box projected texture coordinates',
+    )
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        normals = None if self.export_normals == 'NONE' else self.export_normals
+        objects = list(get_export_objects(context, self.export_selected))
+        write_obj(self.filepath, objects, normals=normals, uvs=self.export_uvs)
+        self.report({'INFO'}, "ArchLab: Exported %i objects" % len(objects))
+        return {'FINISHED'}
+
+
+# ------------------------------------------------------------------
+# Define operator class to export ArchLab objects as binary glTF
+# Objects with equal parameters share one mesh, modifiers are not applied
+# ------------------------------------------------------------------
+class ArchLabExportGlb(Operator, ExportHelper):
+    bl_idname = "export_scene.archlab_glb"
+    bl_label = "Export ArchLab glTF"
+    bl_description = "Export ArchLab objects as binary glTF, equal objects are instanced"
+    bl_category = 'ArchLab'
+
+    filename_ext = ".glb"
+    filter_glob = StringProperty(
+        default="*.glb",
+        options={'HIDDEN'},
+    )
+    export_selected = BoolProperty(
+        name='Selection Only',
+        default=False,
+        description='Export only the selected objects',
+    )
+    export_normals = EnumProperty(
+        items=(
+            ('FLAT', 'Flat', 'One normal per face'),
+            ('SMOOTH', 'Smooth', 'One normal per vertex'),
+        ),
+        name='Normals',
+        default='FLAT',
+        description='Normals written with the faces',
+    )
+    export_quantize = BoolProperty(
+        name='Quantize',
+        default=False,
+        description='Store positions and normals as integers (KHR_mesh_quantization)',
+    )
+    export_instancing = BoolProperty(
+        name='GPU Instancing',
+        default=True,
+        description='Write objects with equal parameters as instances of one node (EXT_mesh_gpu_instancing)',
+    )
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        objects = list(get_export_objects(context, self.export_selected))
+        write_glb(self.filepath, objects, normals=self.export_normals,
+                  quantize=self.export_quantize, instancing=self.export_instancing)
+        self.report({'INFO'}, "ArchLab: Exported %i objects" % len(objects))
+        return {'FINISHED'}
+
+
+# ------------------------------------------------------------------
+# Define operator class to export ArchLab objects for 3D printing
+# Every object is written into its own binary PLY or STL file
+# ------------------------------------------------------------------
+class ArchLabExportPrint(Operator):
+    bl_idname = "export_scene.archlab_print"
+    bl_label = "Export ArchLab PLY/STL"
+    bl_description = "Export every ArchLab object into its own binary PLY or STL file"
+    bl_category = 'ArchLab'
+
+    directory = StringProperty(
+        name='Directory',
+        subtype='DIR_PATH',
+    )
+    export_format = EnumProperty(
+        items=(
+            ('STL', 'STL', 'Binary STL, triangles with facet normals'),
+            ('PLY', 'PLY', 'Binary PLY, triangles'),
+        ),
+        name='Format',
+        default='STL',
+        description='File format of the written files',
+    )
+    export_selected = BoolProperty(
+        name='Selection Only',
+        default=True,
+        description='Export only the selected objects',
+    )
+    export_threads = IntProperty(
+        name='Threads',
+        min=1, soft_max=32,
+        default=4,
+        description='Files written at once',
+    )
+
+    # -----------------------------------------------------
+    # Select the output directory
+    # -----------------------------------------------------
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        objects = list(get_export_objects(context, self.export_selected))
+        files = write_mesh_files(bpy.path.abspath(self.directory), objects,
+                                 file_format=self.export_format, threads=self.export_threads)
+        self.report({'INFO'}, "ArchLab: Exported %i files" % len(files))
+        return {'FINISHED'}
+
+
+# --------------------------------------------------------------------
+# Adds ArchLab exporters to the File > Export menu
+# --------------------------------------------------------------------
+def menu_export_func(self, context):
+    self.layout.operator(ArchLabExportObj.bl_idname, text="ArchLab OBJ (.obj)")
+    self.layout.operator(ArchLabExportGlb.bl_idname, text="ArchLab glTF (.glb)")
+    self.layout.operator(ArchLabExportPrint.bl_idname, text="ArchLab PLY/STL (per object)")
@@ -0,0 +1,182 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+import bpy
+from bpy.app.handlers import persistent
+from collections import OrderedDict
+from .archlab_utils import *
+from .archlab_utils_regeneration import *
+
+# Meshes of animated objects, (generator, fingerprint): mesh name
+# Ordered from the least to the most recently used
+frame_cache = OrderedDict()
+
+# Last fingerprint built for animated object, object name: fingerprint
+frame_fingerprints = {}
+
+# Default memory cap of the frame cache, in megabytes
+frame_cache_memory = 256
+
+
+# --------------------------------------------------------------------
+# Gets frame cache memory cap from the addon preferences, in bytes
+# --------------------------------------------------------------------
+def get_frame_cache_memory():
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is not None and addon.preferences is not None:
+        return addon.preferences.frame_cache_memory * 1024 * 1024
+    return frame_cache_memory * 1024 * 1024
+
+
+# --------------------------------------------------------------------
+# Estimates memory used by the mesh, in bytes
+# --------------------------------------------------------------------
+def get_mesh_footprint(mymesh):
+    return len(mymesh.vertices) * 32 + len(mymesh.edges) * 16 + \
+        len(mymesh.loops) * 16 + len(mymesh.polygons) * 16
+
+
+# --------------------------------------------------------------------
+# Gets names of generators driven by animation or drivers
+# --------------------------------------------------------------------
+def get_animated_generators(myobject):
+    animdata = myobject.animation_data
+    if animdata is None:
+        return set()
+    fcurves = list(animdata.drivers)
+    if animdata.action is not None:
+        fcurves.extend(animdata.action.fcurves)
+    generators = set()
+    for fcurve in fcurves:
+        genname = fcurve.data_path.split('[', 1)[0]
+        if genname in archlab_generators:
+            generators.add(genname)
+    return generators
+
+
+# --------------------------------------------------------------------
+# Removes least recently used meshes until the cache fits the cap
+# Meshes still used by objects are left in the file
+# --------------------------------------------------------------------
+def trim_frame_cache(memory_cap):
+    footprint = 0
+    sizes = {}
+    for (key, meshname) in list(frame_cache.items()):
+        mymesh = bpy.data.meshes.get(meshname)
+        if mymesh is None:
+            del frame_cache[key]
+            continue
+        sizes[key] = get_mesh_footprint(mymesh)
+        footprint += sizes[key]
+    while frame_cache and footprint > memory_cap:
+        (key, meshname) = frame_cache.popitem(last=False)
+        footprint -= sizes[key]
+        mymesh = bpy.data.meshes.get(meshname)
+        if mymesh is not None and mymesh.users == 0:
+            bpy.data.meshes.remove(mymesh)
+
+
+# --------------------------------------------------------------------
+# Sets mesh of animated object, built once per parameter fingerprint
+# --------------------------------------------------------------------
+def update_frame_mesh(myobject, genname):
+    callbacks = archlab_generators[genname]
+    fingerprint = generator_fingerprint(getattr(myobject, genname)[0])
+    if frame_fingerprints.get(myobject.name) == fingerprint:
+        return
+    frame_fingerprints[myobject.name] = fingerprint
+
+    oldmesh = myobject.data
+    key = (genname, fingerprint)
+    mymesh = None
+    if key in frame_cache:
+        mymesh = bpy.data.meshes.get(frame_cache[key])
+    if mymesh is not None:
+        # Cache hit, only object level data is reconciled
+        frame_cache.move_to_end(key)
+        myobject.data = mymesh
+        reconcile = callbacks.get('reconcile')
+        if reconcile is not None:
+            reconcile(myobject)
+    else:
+        mymesh = bpy.data.meshes.new(oldmesh.name)
+        copy_mesh_materials(oldmesh, mymesh)
+        callbacks['shape'](myobject, mymesh, True)
+        myobject.data = mymesh
+        frame_cache[key] = mymesh.name
+
+    if oldmesh != mymesh and oldmesh.users == 0 and \
+            oldmesh.name not in frame_cache.values():
+        bpy.data.meshes.remove(oldmesh)
+
+
+# --------------------------------------------------------------------
+# Frame change handler, rebuilds animated ArchLab objects
+# --------------------------------------------------------------------
+@persistent
+def frame_cache_frame_change(scene, *args):
+    memory_cap = get_frame_cache_memory()
+    if memory_cap <= 0:
+        return
+    for myobject in scene.objects:
+        if myobject.animation_data is None or myobject.type != 'MESH':
+            continue
+        for genname in get_animated_generators(myobject):
+            update_frame_mesh(myobject, genname)
+    trim_frame_cache(memory_cap)
+
+
+# --------------------------------------------------------------------
+# Drops cached meshes, objects of the previous file are gone
+# --------------------------------------------------------------------
+@persistent
+def frame_cache_load_pre(*args):
+    frame_cache.clear()
+    frame_fingerprints.clear()
+
+
+# --------------------------------------------------------------------
+# Register frame cache handlers
+# --------------------------------------------------------------------
+def register_frame_cache():
+    bpy.app.handlers.frame_change_post.append(frame_cache_frame_change)
+    bpy.app.handlers.load_pre.append(frame_cache_load_pre)
+
+
+# --------------------------------------------------------------------
+# Unregister frame cache handlers
+# --------------------------------------------------------------------
+def unregister_frame_cache():
+    if frame_cache_frame_change in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(frame_cache_frame_change)
+    if frame_cache_load_pre in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(frame_cache_load_pre)
+    frame_cache.clear()
+    frame_fingerprints.clear()
@@ -28,180 +28,504 @@
 # ----------------------------------------------------------
 
 import bpy
+import hashlib
+import json
+from bpy.types import Operator
+from bpy.props import FloatProperty, FloatVectorProperty
+from .archlab_utils import *
+from .archlab_utils_regeneration import *
 
+# Registered materials, definition hash: material name
+material_registry = {}
 
+
+# --------------------------------------------------------------------
+# Definition of ceramic material
+# --------------------------------------------------------------------
+ceramic_material_data = {
+    'name': 'Ceramic Material (ArchLib)',
+    'distribution': 'MULTI_GGX',
+    'variation': True,
+    'inputs': (
+        ('Base Color', (0.604, 0.604, 0.604, 1.0)),
+        ('Subsurface', 0.0),
+        ('Subsurface Radius', (1.0, 1.0, 1.0)),
+        ('Subsurface Color', (0.7, 0.1, 0.1, 1.0)),
+        ('Metallic', 0.0),
+        ('Specular', 0.4),
+        ('Specular Tint', 0.2),
+        ('Roughness', 0.05),
+        ('Anisotropic', 0.0),
+        ('Anisotropic Rotation', 0.0),
+        ('Sheen', 0.0),
+        ('Sheen Tint', 0.5),
+        ('Clearcoat', 0.0),
+        ('Clearcoat Roughness', 0.03),
+        ('IOR', 1.45),
+        ('Transmission', 0.0),
+        ('Transmission Roughness', 0.0),
+    ),
+}
+
+
+# --------------------------------------------------------------------
+# Definition of cloud material
+# --------------------------------------------------------------------
+cloud_material_data = {
+    'name': 'Cloud Material (ArchLib)',
+}
+
+
+# --------------------------------------------------------------------
+# Definition of fabric material
+# --------------------------------------------------------------------
+fabric_material_data = {
+    'name': 'Fabric Material (ArchLib)',
+    'distribution': 'MULTI_GGX',
+    'variation': True,
+    'inputs': (
+        ('Base Color', (0.1, 0.8, 0.75, 1.0)),
+        ('Subsurface', 0.0),
+        ('Subsurface Radius', (1.0, 1.0, 1.0)),
+        ('Subsurface Color', (0.7, 0.1, 0.1, 1.0)),
+        ('Metallic', 0.0),
+        ('Specular', 0.0),
+        ('Specular Tint', 0.0),
+        ('Roughness', 0.0),
+        ('Anisotropic', 0.0),
+        ('Anisotropic Rotation', 0.0),
+        ('Sheen', 10.0),
+        ('Sheen Tint', 0.3),
+        ('Clearcoat', 0.0),
+        ('Clearcoat Roughness', 0.03),
+        ('IOR', 1.45),
+        ('Transmission', 0.0),
+        ('Transmission Roughness', 0.0),
+    ),
+}
+
+
+# --------------------------------------------------------------------
+# Definition of glass material
+# --------------------------------------------------------------------
+glass_material_data = {
+    'name': 'Glass Material (ArchLib)',
+    'distribution': 'MULTI_GGX',
+    'variation': True,
+    'inputs': (
+        ('Base Color', (0.8, 0.8, 0.8, 1.0)),
+        ('Subsurface', 0.0),
+        ('Subsurface Radius', (1.0, 1.0, 1.0)),
+        ('Subsurface Color', (0.7, 0.1, 0.1, 1.0)),
+        ('Metallic', 0.0),
+        ('Specular', 0.5),
+        ('Specular Tint', 0.0),
+        ('Roughness', 0.0),
+        ('Anisotropic', 0.0),
+        ('Anisotropic Rotation', 0.0),
+        ('Sheen', 0.0),
+        ('Sheen Tint', 0.5),
+        ('Clearcoat', 0.0),
+        ('Clearcoat Roughness', 0.03),
+        ('IOR', 1.5),
+        ('Transmission', 1.0),
+        ('Transmission Roughness', 0.0),
+    ),
+}
+
+
+# --------------------------------------------------------------------
+# Definition of matt glass material
+# --------------------------------------------------------------------
+matt_glass_material_data = {
+    'name': 'Matt Glass Material (ArchLib)',
+    'distribution': 'GGX',
+    'variation': True,
+    'inputs': (
+        ('Base Color', (0.8, 0.8, 0.8, 1.0)),
+        ('Subsurface', 0.0),
+        ('Subsurface Radius', (1.0, 1.0, 1.0)),
+        ('Subsurface Color', (0.7, 0.1, 0.1, 1.0)),
+        ('Metallic', 0.0),
+        ('Specular', 0.5),
+        ('Specular Tint', 0.0),
+        ('Roughness', 0.0),
+        ('Anisotropic', 0.0),
+        ('Anisotropic Rotation', 0.0),
+        ('Sheen', 0.0),
+        ('Sheen Tint', 0.5),
+        ('Clearcoat', 0.0),
+        ('Clearcoat Roughness', 0.03),
+        ('IOR', 1.5),
+        ('Transmission', 1.0),
+        ('Transmission Roughness', 1.0),
+    ),
+}
+
+
+# --------------------------------------------------------------------
+# Definition of metalic material
+# --------------------------------------------------------------------
+metalic_material_data = {
+    'name': 'Metalic Material (ArchLib)',
+}
+
+
+# --------------------------------------------------------------------
+# Definition of plastic material
+# --------------------------------------------------------------------
+plastic_material_data = {
+    'name': 'Plastic Material (ArchLib)',
+    'distribution': 'MULTI_GGX',
+    'variation': True,
+    'inputs': (
+        ('Base Color', (0.8, 0.032, 0.032, 1.0)),
+        ('Subsurface', 0.0),
+        ('Subsurface Radius', (1.0, 1.0, 1.0)),
+        ('Subsurface Color', (0.7, 0.1, 0.1, 1.0)),
+        ('Metallic', 0.0),
+        ('Specular', 0.4),
+        ('Specular Tint', 0.25),
+        ('Roughness', 0.05),
+        ('Anisotropic', 0.0),
+        ('Anisotropic Rotation', 0.0),
+        ('Sheen', 0.0),
+        ('Sheen Tint', 0.5),
+        ('Clearcoat', 0.0),
+        ('Clearcoat Roughness', 0.03),
+        ('IOR', 1.45),
+        ('Transmission', 0.0),
+        ('Transmission Roughness', 0.0),
+    ),
+}
+
+
+# --------------------------------------------------------------------
+# Definition of wax material
 # --------------------------------------------------------------------
-# Creates new ceramic material
+wax_material_data = {
+    'name': 'Wax Material (ArchLib)',
+    'distribution': 'MULTI_GGX',
+    'variation': True,
+    'inputs': (
+        ('Base Color', (0.39, 0.6, 0.12, 1.0)),
+        ('Subsurface', 1.0),
+        ('Subsurface Radius', (1.0, 1.0, 1.0)),
+        ('Subsurface Color', (0.39, 0.6, 0.12, 1.0)),
+        ('Metallic', 0.0),
+        ('Specular', 0.3),
+        ('Specular Tint', 0.2),
+        ('Roughness', 0.05),
+        ('Anisotropic', 0.0),
+        ('Anisotropic Rotation', 0.0),
+        ('Sheen', 0.0),
+        ('Sheen Tint', 0.5),
+        ('Clearcoat', 0.0),
+        ('Clearcoat Roughness', 0.03),
+        ('IOR', 1.45),
+        ('Transmission', 0.0),
+        ('Transmission Roughness', 0.0),
+    ),
+}
+
+
+# --------------------------------------------------------------------
+# Gets ceramic material, created once and reused
 # --------------------------------------------------------------------
 def meshlib_ceramic_material():
-    (mat, principled_node) = create_principled_material(matname='Ceramic Material (ArchLib)')
-    principled_node.distribution = 'MULTI_GGX'
-    principled_node.inputs['Base Color'].default_value = (0.604, 0.604, 0.604, 1.0)
-    principled_node.inputs['Subsurface'].default_value = 0.0
-    principled_node.inputs['Subsurface Radius'].default_value = (1.0, 1.0, 1.0)
-    principled_node.inputs['Subsurface Color'].default_value = (0.7, 0.1, 0.1, 1.0)
-    principled_node.inputs['Metallic'].default_value = 0.0
-    principled_node.inputs['Specular'].default_value = 0.4
-    principled_node.inputs['Specular Tint'].default_value = 0.2
-    principled_node.inputs['Roughness'].default_value = 0.05
-    principled_node.inputs['Anisotropic'].default_value = 0.0
-    principled_node.inputs['Anisotropic Rotation'].default_value = 0.0
-    principled_node.inputs['Sheen'].default_value = 0.0
-    principled_node.inputs['Sheen Tint'].default_value = 0.5
-    principled_node.inputs['Clearcoat'].default_value = 0.0
-    principled_node.inputs['Clearcoat Roughness'].default_value = 0.03
-    principled_node.inputs['IOR'].default_value = 1.45
-    principled_node.inputs['Transmission'].default_value = 0.0
-    principled_node.inputs['Transmission Roughness'].default_value = 0.0
-    return mat
+    return get_registry_material(ceramic_material_data)
 
 
 # --------------------------------------------------------------------
-# Creates new cloud material
+# Gets cloud material, created once and reused
 # --------------------------------------------------------------------
 def meshlib_cloud_material():
-    (mat, principled_node) = create_principled_material(matname='Cloud Material (ArchLib)')
-    return mat
+    return get_registry_material(cloud_material_data)
 
 
 # --------------------------------------------------------------------
-# Creates new fabric material
+# Gets fabric material, created once and reused
 # --------------------------------------------------------------------
 def meshlib_fabric_material():
-    (mat, principled_node) = create_principled_material(matname='Fabric Material (ArchLib)')
-    principled_node.distribution = 'MULTI_GGX'
-    principled_node.inputs['Base Color'].default_value = (0.1, 0.8, 0.75, 1.0)
-    principled_node.inputs['Subsurface'].default_value = 0.0
-    principled_node.inputs['Subsurface Radius'].default_value = (1.0, 1.0, 1.0)
-    principled_node.inputs['Subsurface Color'].default_value = (0.7, 0.1, 0.1, 1.0)
-    principled_node.inputs['Metallic'].default_value = 0.0
-    principled_node.inputs['Specular'].default_value = 0.0
-    principled_node.inputs['Specular Tint'].default_value = 0.0
-    principled_node.inputs['Roughness'].default_value = 0.0
-    principled_node.inputs['Anisotropic'].default_value = 0.0
-    principled_node.inputs['Anisotropic Rotation'].default_value = 0.0
-    principled_node.inputs['Sheen'].default_value = 10.0
-    principled_node.inputs['Sheen Tint'].default_value = 0.3
-    principled_node.inputs['Clearcoat'].default_value = 0.0
-    principled_node.inputs['Clearcoat Roughness'].default_value = 0.03
-    principled_node.inputs['IOR'].default_value = 1.45
-    principled_node.inputs['Transmission'].default_value = 0.0
-    principled_node.inputs['Transmission Roughness'].default_value = 0.0
-    return mat
+    return get_registry_material(fabric_material_data)
 
 
 # --------------------------------------------------------------------
-# Creates new glass material
+# Gets glass material, created once and reused
 # --------------------------------------------------------------------
 def meshlib_glass_material():
-    (mat, principled_node) = create_principled_material(matname='Glass Material (ArchLib)')
-    principled_node.distribution = 'MULTI_GGX'
-    principled_node.inputs['Base Color'].default_value = (0.8, 0.8, 0.8, 1.0)
-    principled_node.inputs['Subsurface'].default_value = 0.0
-    principled_node.inputs['Subsurface Radius'].default_value = (1.0, 1.0, 1.0)
-    principled_node.inputs['Subsurface Color'].default_value = (0.7, 0.1, 0.1, 1.0)
-    principled_node.inputs['Metallic'].default_value = 0.0
-    principled_node.inputs['Specular'].default_value = 0.5
-    principled_node.inputs['Specular Tint'].default_value = 0.0
-    principled_node.inputs['Roughness'].default_value = 0.0
-    principled_node.inputs['Anisotropic'].default_value = 0.0
-    principled_node.inputs['Anisotropic Rotation'].default_value = 0.0
-    principled_node.inputs['Sheen'].default_value = 0.0
-    principled_node.inputs['Sheen Tint'].default_value = 0.5
-    principled_node.inputs['Clearcoat'].default_value = 0.0
-    principled_node.inputs['Clearcoat Roughness'].default_value = 0.03
-    principled_node.inputs['IOR'].default_value = 1.5
-    principled_node.inputs['Transmission'].default_value = 1.0
-    principled_node.inputs['Transmission Roughness'].default_value = 0.0
-    return mat
+    return get_registry_material(glass_material_data)
 
 
 # --------------------------------------------------------------------
-# Creates new matt glass material
+# Gets matt glass material, created once and reused
 # --------------------------------------------------------------------
 def meshlib_matt_glass_material():
-    (mat, principled_node) = create_principled_material(matname='Matt Glass Material (ArchLib)')
-    principled_node.distribution = 'GGX'
-    principled_node.inputs['Base Color'].default_value = (0.8, 0.8, 0.8, 1.0)
-    principled_node.inputs['Subsurface'].default_value = 0.0
-    principled_node.inputs['Subsurface Radius'].default_value = (1.0, 1.0, 1.0)
-    principled_node.inputs['Subsurface Color'].default_value = (0.7, 0.1, 0.1, 1.0)
-    principled_node.inputs['Metallic'].default_value = 0.0
-    principled_node.inputs['Specular'].default_value = 0.5
-    principled_node.inputs['Specular Tint'].default_value = 0.0
-    principled_node.inputs['Roughness'].default_value = 0.0
-    principled_node.inputs['Anisotropic'].default_value = 0.0
-    principled_node.inputs['Anisotropic Rotation'].default_value = 0.0
-    principled_node.inputs['Sheen'].default_value = 0.0
-    principled_node.inputs['Sheen Tint'].default_value = 0.5
-    principled_node.inputs['Clearcoat'].default_value = 0.0
-    principled_node.inputs['Clearcoat Roughness'].default_value = 0.03
-    principled_node.inputs['IOR'].default_value = 1.5
-    principled_node.inputs['Transmission'].default_value = 1.0
-    principled_node.inputs['Transmission Roughness'].default_value = 1.0
-    return mat
+    return get_registry_material(matt_glass_material_data)
 
 
 # --------------------------------------------------------------------
-# Creates new metalic material
+# Gets metalic material, created once and reused
 # --------------------------------------------------------------------
 def meshlib_metalic_material():
-    (mat, principled_node) = create_principled_material(matname='Metalic Material (ArchLib)')
-    return mat
+    return get_registry_material(metalic_material_data)
 
 
 # --------------------------------------------------------------------
-# Creates new plastic material
+# Gets plastic material, created once and reused
 # --------------------------------------------------------------------
 def meshlib_plastic_material():
-    (mat, principled_node) = create_principled_material(matname='Plastic Material (ArchLib)')
-    principled_node.distribution = 'MULTI_GGX'
-    principled_node.inputs['Base Color'].default_value = (0.8, 0.032, 0.032, 1.0)
-    principled_node.inputs['Subsurface'].default_value = 0.0
-    principled_node.inputs['Subsurface Radius'].default_value = (1.0, 1.0, 1.0)
-    principled_node.inputs['Subsurface Color'].default_value = (0.7, 0.1, 0.1, 1.0)
-    principled_node.inputs['Metallic'].default_value = 0.0
-    principled_node.inputs['Specular'].default_value = 0.4
-    principled_node.inputs['Specular Tint'].default_value = 0.25
-    principled_node.inputs['Roughness'].default_value = 0.05
-    principled_node.inputs['Anisotropic'].default_value = 0.0
-    principled_node.inputs['Anisotropic Rotation'].default_value = 0.0
-    principled_node.inputs['Sheen'].default_value = 0.0
-    principled_node.inputs['Sheen Tint'].default_value = 0.5
-    principled_node.inputs['Clearcoat'].default_value = 0.0
-    principled_node.inputs['Clearcoat Roughness'].default_value = 0.03
-    principled_node.inputs['IOR'].default_value = 1.45
-    principled_node.inputs['Transmission'].default_value = 0.0
-    principled_node.inputs['Transmission Roughness'].default_value = 0.0
-    return mat
+    return get_registry_material(plastic_material_data)
 
 
 # --------------------------------------------------------------------
-# Creates new wax material
+# Gets wax material, created once and reused
 # --------------------------------------------------------------------
 def meshlib_wax_material():
-    (mat, principled_node) = create_principled_material(matname='Wax Material (ArchLib)')
-    principled_node.distribution = 'MULTI_GGX'
-    principled_node.inputs['Base Color'].default_value = (0.39, 0.6, 0.12, 1.0)
-    principled_node.inputs['Subsurface'].default_value = 1.0
-    principled_node.inputs['Subsurface Radius'].default_value = (1.0, 1.0, 1.0)
-    principled_node.inputs['Subsurface Color'].default_value = (0.39, 0.6, 0.12, 1.0)
-    principled_node.inputs['Metallic'].default_value = 0.0
-    principled_node.inputs['Specular'].default_value = 0.3
-    principled_node.inputs['Specular Tint'].default_value = 0.2
-    principled_node.inputs['Roughness'].default_value = 0.05
-    principled_node.inputs['Anisotropic'].default_value = 0.0
-    principled_node.inputs['Anisotropic Rotation'].default_value = 0.0
-    principled_node.inputs['Sheen'].default_value = 0.0
-    principled_node.inputs['Sheen Tint'].default_value = 0.5
-    principled_node.inputs['Clearcoat'].default_value = 0.0
-    principled_node.inputs['Clearcoat Roughness'].default_value = 0.03
-    principled_node.inputs['IOR'].default_value = 1.45
-    principled_node.inputs['Transmission'].default_value = 0.0
-    principled_node.inputs['Transmission Roughness'].default_value = 0.0
+    return get_registry_material(wax_material_data)
+
+
+# All material definitions, used to recognize materials of old files
+archlab_materials = (
+    ceramic_material_data,
+    cloud_material_data,
+    fabric_material_data,
+    glass_material_data,
+    matt_glass_material_data,
+    metalic_material_data,
+    plastic_material_data,
+    wax_material_data,
+)
+
+
+# --------------------------------------------------------------------
+# Gets stable hash of material definition
+# --------------------------------------------------------------------
+def get_material_hash(definition):
+    data = json.dumps(definition, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+# --------------------------------------------------------------------
+# Gets material for definition, builds it only when not in the file
+# --------------------------------------------------------------------
+def get_registry_material(definition):
+    defhash = get_material_hash(definition)
+    mat = bpy.data.materials.get(material_registry.get(defhash, ''))
+    if mat is None or mat.get('archlab_definition') != defhash:
+        mat = None
+        for m in bpy.data.materials:
+            if m.get('archlab_definition') == defhash:
+                mat = m
+                break
+        if mat is None:
+            mat = create_definition_material(definition)
+            mat['archlab_definition'] = defhash
+        material_registry[defhash] = mat.name
+    return mat
+
+
+# --------------------------------------------------------------------
+# Creates new material from definition
+# --------------------------------------------------------------------
+def create_definition_material(definition):
+    (mat, principled_node) = create_principled_material(matname=definition['name'])
+    if 'distribution' in definition:
+        principled_node.distribution = definition['distribution']
+    for (inputname, value) in definition.get('inputs', ()):
+        socket = principled_node.inputs.get(inputname)
+        if socket is not None:
+            socket.default_value = value
+    if definition.get('variation', False):
+        add_material_variation(mat, principled_node)
     return mat
 
 
+# --------------------------------------------------------------------
+# Adds per object variation to the material, one material serves all
+# Base color is multiplied by the object color (white keeps the color),
+# object property "archlab_roughness" is added to the roughness
+# --------------------------------------------------------------------
+def add_material_variation(mat, principled_node):
+    mat_nodes = mat.node_tree.nodes
+    mat_links = mat.node_tree.links
+    base_color = principled_node.inputs['Base Color']
+    info_node = mat_nodes.new('ShaderNodeObjectInfo')
+    info_node.location = (-600, 200)
+    color_node = mat_nodes.new('ShaderNodeMixRGB')
+    color_node.location = (-400, 200)
+    color_node.blend_type = 'MULTIPLY'
+    color_node.inputs['Fac'].default_value = 1.0
+    color_node.inputs['Color1'].default_value = base_color.default_value[:]
+    mat_links.new(info_node.outputs['Color'], color_node.inputs['Color2'])
+    mat_links.new(color_node.outputs['Color'], base_color)
+    # object attributes are available since Blender 3.0
+    if 'attribute_type' in bpy.types.ShaderNodeAttribute.bl_rna.properties:
+        roughness = principled_node.inputs['Roughness']
+        attribute_node = mat_nodes.new('ShaderNodeAttribute')
+        attribute_node.location = (-600, -200)
+        attribute_node.attribute_type = 'OBJECT'
+        attribute_node.attribute_name = 'archlab_roughness'
+        roughness_node = mat_nodes.new('ShaderNodeMath')
+        roughness_node.location = (-400, -200)
+        roughness_node.operation = 'ADD'
+        roughness_node.use_clamp = True
+        roughness_node.inputs[0].default_value = roughness.default_value
+        mat_links.new(attribute_node.outputs['Fac'], roughness_node.inputs[1])
+        mat_links.new(roughness_node.outputs['Value'], roughness)
+
+
+# --------------------------------------------------------------------
+# Update object color, read by materials with variation (no rebuild)
+# --------------------------------------------------------------------
+def update_material_color(self, context):
+    o = get_owner_object(self)
+    if o is not None and not is_same_value(o.color, tuple(self.material_color)):
+        o.color = self.material_color
+
+
+# --------------------------------------------------------------------
+# Update object property "archlab_roughness", read by materials with
+# variation (no rebuild)
+# --------------------------------------------------------------------
+def update_material_roughness(self, context):
+    o = get_owner_object(self)
+    if o is not None and not is_same_value(o.get('archlab_roughness', 0.0), self.material_roughness):
+        o['archlab_roughness'] = self.material_roughness
+        # custom properties do not tag the object for redraw
+        o.update_tag()
+
+
+# --------------------------------------------------------------------
+# Property definition creator
+# --------------------------------------------------------------------
+def material_color_property(callback=None):
+    return FloatVectorProperty(
+        name='Color',
+        subtype='COLOR', size=4,
+        min=0.0, max=1.0,
+        default=(1.0, 1.0, 1.0, 1.0),
+        description='Object color, tints the shared ArchLab material', update=callback,
+    )
+
+
+# --------------------------------------------------------------------
+# Property definition creator
+# --------------------------------------------------------------------
+def material_roughness_property(callback=None):
+    return FloatProperty(
+        name='Roughness',
+        min=-1.0, max=1.0,
+        default=0.0, precision=3,
+        description='Added to the roughness of the shared ArchLab material (Blender 3.0+)', update=callback,
+    )
+
+
+# --------------------------------------------------------------------
+# Verifies if material settings are equal to the definition
+# --------------------------------------------------------------------
+def is_definition_material(mat, definition):
+    if mat.node_tree is None:
+        return False
+    principled_node = None
+    for node in mat.node_tree.nodes:
+        if node.type == 'BSDF_PRINCIPLED':
+            principled_node = node
+            break
+    if principled_node is None:
+        return False
+    if principled_node.distribution != definition.get('distribution', principled_node.distribution):
+        return False
+    for (inputname, value) in definition.get('inputs', ()):
+        socket = principled_node.inputs.get(inputname)
+        if socket is None:
+            continue
+        current = get_definition_socket_value(socket)
+        if current is None or not is_same_value(current, value):
+            return False
+    return True
+
+
+# --------------------------------------------------------------------
+# Gets value of the material input as set from the definition, inputs
+# linked to variation nodes keep it in the first node input
+# Returns None for inputs linked to other nodes (edited material)
+# --------------------------------------------------------------------
+def get_definition_socket_value(socket):
+    if not socket.is_linked:
+        return socket.default_value
+    node = socket.links[0].from_node
+    if node.type == 'MIX_RGB':
+        return node.inputs['Color1'].default_value
+    if node.type == 'MATH':
+        return node.inputs[0].default_value
+    return None
+
+
+# --------------------------------------------------------------------
+# Gets definition hash of material, also for materials of old files
+# Stamped materials edited since (settings drifted from the definition)
+# give None, they are not merged with the others
+# --------------------------------------------------------------------
+def get_material_definition_hash(mat):
+    defhash = mat.get('archlab_definition')
+    if defhash is not None:
+        for definition in archlab_materials:
+            if get_material_hash(definition) == defhash:
+                return defhash if is_definition_material(mat, definition) else None
+        return None
+    basename = mat.name.rsplit('.', 1)[0] if mat.name[-4:-3] == '.' else mat.name
+    for definition in archlab_materials:
+        if definition['name'] == basename and is_definition_material(mat, definition):
+            return get_material_hash(definition)
+    return None
+
+
+# --------------------------------------------------------------------
+# Merges duplicated ArchLab materials, users are moved to one material
+# The registry material is kept, materials of old files may lack the
+# variation nodes, an edited registry material keeps its duplicates
+# Returns amount of removed materials
+# --------------------------------------------------------------------
+def dedupe_materials():
+    definitions = {get_material_hash(definition): definition for definition in archlab_materials}
+    groups = {}
+    for mat in bpy.data.materials:
+        defhash = get_material_definition_hash(mat)
+        if defhash is not None:
+            groups.setdefault(defhash, []).append(mat)
+    removed = 0
+    for (defhash, mats) in groups.items():
+        target = get_registry_material(definitions[defhash])
+        if get_material_definition_hash(target) != defhash:
+            continue
+        for mat in mats:
+            if mat != target:
+                mat.user_remap(target)
+                bpy.data.materials.remove(mat)
+                removed += 1
+    return removed
+
+
+# ------------------------------------------------------------------
+# Define operator class to merge duplicated ArchLab materials
+# ------------------------------------------------------------------
+class ArchLabDedupeMaterials(Operator):
+    bl_idname = "material.archlab_dedupe_materials"
+    bl_label = "Merge Duplicated Materials"
+    bl_description = "Replace duplicated ArchLab materials with one shared material"
+    bl_category = 'ArchLab'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        removed = dedupe_materials()
+        self.report({'INFO'}, "ArchLab: Removed %i duplicated materials" % removed)
+        return {'FINISHED'}
+
+
 # --------------------------------------------------------------------
 # Creates new principled material
 # --------------------------------------------------------------------
@@ -0,0 +1,341 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+import bpy
+from statistics import median
+from time import perf_counter
+from bpy.types import Operator, Panel
+from bpy.props import BoolProperty, IntProperty, StringProperty
+from bpy_extras.io_utils import ExportHelper
+from .archlab_core.profile import *
+from .archlab_utils_regeneration import archlab_generators, flush_regeneration
+
+# Phases shown in the panel, in rebuild order
+profile_panel_phases = (
+    ('read', 'Parameter read'),
+    ('fingerprint', 'Fingerprint'),
+    ('generate', 'Generation'),
+    ('pack', 'Pack'),
+    ('weld', 'Weld'),
+    ('normals', 'Normals'),
+    ('write', 'Mesh write'),
+    ('shading', 'Shading'),
+    ('modifiers', 'Modifier reconcile'),
+)
+
+# Text block receiving the scene performance report
+scene_report_text = "ArchLab Report"
+
+
+# --------------------------------------------------------------------
+# Enables or disables profiling as set in the addon preferences
+# --------------------------------------------------------------------
+def update_profiling(self=None, context=None):
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is None or addon.preferences is None or not addon.preferences.profile_regeneration:
+        disable_profiling()
+    else:
+        enable_profiling(addon.preferences.profile_capacity)
+
+
+# ------------------------------------------------------------------
+# Define operator class to export recorded phases as Chrome trace
+# ------------------------------------------------------------------
+class ArchLabExportProfile(Operator, ExportHelper):
+    bl_idname = "wm.archlab_export_profile"
+    bl_label = "Export ArchLab Profile"
+    bl_description = "Export recorded rebuild phases in Chrome trace format (chrome://tracing, Perfetto)"
+    bl_category = 'ArchLab'
+
+    filename_ext = ".json"
+    filter_glob = StringProperty(
+        default="*.json",
+        options={'HIDDEN'},
+    )
+
+    # -----------------------------------------------------
+    # Verify if available
+    # -----------------------------------------------------
+    @classmethod
+    def poll(cls, context):
+        return is_profiling()
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        count = write_chrome_trace(self.filepath)
+        self.report({'INFO'}, "ArchLab: Exported %i profile events" % count)
+        return {'FINISHED'}
+
+
+# ------------------------------------------------------------------
+# Define operator class to drop recorded phases
+# ------------------------------------------------------------------
+class ArchLabClearProfile(Operator):
+    bl_idname = "wm.archlab_clear_profile"
+    bl_label = "Clear ArchLab Profile"
+    bl_description = "Drop recorded rebuild phases"
+    bl_category = 'ArchLab'
+
+    # -----------------------------------------------------
+    # Verify if available
+    # -----------------------------------------------------
+    @classmethod
+    def poll(cls, context):
+        return is_profiling()
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        clear_profile()
+        return {'FINISHED'}
+
+
+# --------------------------------------------------------------------
+# Gets generator type (e.g. 'room') of the object, or None
+# --------------------------------------------------------------------
+def get_object_type(myobject):
+    for (genname, callbacks) in archlab_generators.items():
+        if genname in myobject:
+            return callbacks.get('type', genname)
+    return None
+
+
+# --------------------------------------------------------------------
+# Times depsgraph evaluation of the object geometry, median in seconds
+# The object is tagged alone, so only its modifier stack is evaluated
+# --------------------------------------------------------------------
+def time_object_evaluation(myobject, depsgraph, repeat):
+    times = []
+    for t in range(repeat):
+        if myobject is not None:
+            myobject.update_tag(refresh={'DATA'})
+        start = perf_counter()
+        depsgraph.update()
+        times.append(perf_counter() - start)
+    return median(times)
+
+
+# --------------------------------------------------------------------
+# Gets performance report rows of all ArchLab objects in the file,
+# sorted by cost (see sort_scene_report)
+# measure - time depsgraph evaluation of objects with modifiers, the
+#           cost of an update without changes is subtracted
+# Objects sharing mesh and modifier stack are measured once, objects
+# outside of the view layer are not evaluated and not measured
+# --------------------------------------------------------------------
+def get_scene_report(context, measure=True, repeat=3):
+    # pending rebuilds would be timed as modifier evaluation
+    flush_regeneration()
+    depsgraph = context.evaluated_depsgraph_get()
+    depsgraph.update()
+    evaluated_objects = set(o.original.name for o in depsgraph.objects)
+    idle = time_object_evaluation(None, depsgraph, repeat) if measure else 0.0
+
+    objects = [(o, get_object_type(o)) for o in bpy.data.objects if o.type == 'MESH']
+    objects = [(o, typename) for (o, typename) in objects if typename is not None]
+    measured = {}
+    rows = []
+    window_manager = context.window_manager
+    window_manager.progress_begin(0, len(objects))
+    try:
+        for (index, (myobject, typename)) in enumerate(objects):
+            window_manager.progress_update(index)
+            mymesh = myobject.data
+            mods = [m for m in myobject.modifiers if m.show_viewport]
+            row = {
+                'name': myobject.name,
+                'type': typename,
+                'vertices': len(mymesh.vertices),
+                'faces': len(mymesh.polygons),
+                'modifiers': ', '.join('%s (%s)' % (m.name, m.type) for m in myobject.modifiers),
+                'regenerate_ms': None,
+                'modifier_ms': None,
+            }
+            last = get_last_profile(myobject.name)
+            if 'regenerate' in last:
+                row['regenerate_ms'] = last['regenerate'] * 1000.0
+            if myobject.name in evaluated_objects:
+                # evaluated object data is the mesh with modifiers applied
+                evaluated = myobject.evaluated_get(depsgraph).data
+                row['evaluated_vertices'] = len(evaluated.vertices)
+                row['evaluated_faces'] = len(evaluated.polygons)
+                if not mods:
+                    row['modifier_ms'] = 0.0
+                elif measure:
+                    key = (mymesh.name, tuple((m.name, m.type) for m in mods))
+                    if key not in measured:
+                        seconds = time_object_evaluation(myobject, depsgraph, repeat)
+                        measured[key] = max(0.0, seconds - idle) * 1000.0
+                    row['modifier_ms'] = measured[key]
+            rows.append(row)
+    finally:
+        window_manager.progress_end()
+    return sort_scene_report(rows)
+
+
+# ------------------------------------------------------------------
+# Define operator class to write the scene performance report into
+# a text block
+# ------------------------------------------------------------------
+class ArchLabSceneReport(Operator):
+    bl_idname = "scene.archlab_performance_report"
+    bl_label = "ArchLab Performance Report"
+    bl_description = "List ArchLab objects with mesh sizes, modifier stacks and costs in a text block"
+    bl_category = 'ArchLab'
+    bl_options = {'REGISTER'}
+
+    measure_evaluation = BoolProperty(
+        name='Time Modifiers',
+        default=True,
+        description='Time depsgraph evaluation of objects with modifiers',
+    )
+    evaluation_repeat = IntProperty(
+        name='Repeat',
+        min=1, soft_max=10,
+        default=3,
+        description='Timed evaluations per object, the median is reported',
+    )
+
+    # -----------------------------------------------------
+    # Verify if available
+    # -----------------------------------------------------
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        rows = get_scene_report(context, self.measure_evaluation, self.evaluation_repeat)
+        mytext = bpy.data.texts.get(scene_report_text)
+        if mytext is None:
+            mytext = bpy.data.texts.new(scene_report_text)
+        mytext.from_string(format_scene_report(rows))
+        self.report({'INFO'}, "ArchLab: Reported %i objects into the text block %s" % (
+            len(rows), scene_report_text))
+        return {'FINISHED'}
+
+
+# ------------------------------------------------------------------
+# Define operator class to export the scene performance report as CSV
+# ------------------------------------------------------------------
+class ArchLabExportSceneReport(Operator, ExportHelper):
+    bl_idname = "scene.archlab_export_performance_report"
+    bl_label = "Export ArchLab Performance Report"
+    bl_description = "Export ArchLab objects with mesh sizes, modifier stacks and costs as CSV"
+    bl_category = 'ArchLab'
+
+    filename_ext = ".csv"
+    filter_glob = StringProperty(
+        default="*.csv",
+        options={'HIDDEN'},
+    )
+    measure_evaluation = BoolProperty(
+        name='Time Modifiers',
+        default=True,
+        description='Time depsgraph evaluation of objects with modifiers',
+    )
+    evaluation_repeat = IntProperty(
+        name='Repeat',
+        min=1, soft_max=10,
+        default=3,
+        description='Timed evaluations per object, the median is reported',
+    )
+
+    # -----------------------------------------------------
+    # Verify if available
+    # -----------------------------------------------------
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        rows = get_scene_report(context, self.measure_evaluation, self.evaluation_repeat)
+        count = write_scene_report_csv(self.filepath, rows)
+        self.report({'INFO'}, "ArchLab: Exported report of %i objects" % count)
+        return {'FINISHED'}
+
+
+# ------------------------------------------------------------------
+# Define panel class to show the last rebuild of the active object
+# (while profiling is enabled in the addon preferences) and the scene
+# performance report
+# ------------------------------------------------------------------
+class ArchLabProfilePanel(Panel):
+    bl_idname = "VIEW3D_PT_archlab_profile"
+    bl_label = "Profile"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = "UI"
+    bl_category = 'ArchLab'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    # -----------------------------------------------------
+    # Draw (create UI interface)
+    # -----------------------------------------------------
+    def draw(self, context):
+        layout = self.layout
+        if is_profiling():
+            o = context.object
+            last = get_last_profile(o.name) if o is not None else {}
+            if 'regenerate' not in last:
+                layout.label(text='No rebuild recorded for the active object.')
+            else:
+                column = layout.column(align=True)
+                column.label(text='Last rebuild: %.2f ms' % (last['regenerate'] * 1000.0))
+                for (phase, label) in profile_panel_phases:
+                    if phase in last:
+                        column.label(text='%s: %.2f ms' % (label, last[phase] * 1000.0))
+            row = layout.row(align=True)
+            row.operator("wm.archlab_export_profile", text="Export Trace", icon="EXPORT")
+            row.operator("wm.archlab_clear_profile", text="Clear", icon="X")
+        row = layout.row(align=True)
+        row.operator("scene.archlab_performance_report", text="Scene Report", icon="TEXT")
+        row.operator("scene.archlab_export_performance_report", text="Export CSV", icon="EXPORT")
+
+
+# --------------------------------------------------------------------
+# Register profiling, enabled when set in the addon preferences
+# --------------------------------------------------------------------
+def register_profile():
+    update_profiling()
+
+
+# --------------------------------------------------------------------
+# Unregister profiling, recorded events are dropped
+# --------------------------------------------------------------------
+def unregister_profile():
+    disable_profiling()
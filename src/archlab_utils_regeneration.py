@@ -0,0 +1,442 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+import bpy
+import hashlib
+import sys
+from bpy.types import Operator
+from bpy.props import StringProperty
+from bpy.app.handlers import persistent
+from contextlib import contextmanager
+from .archlab_core.library import get_meshlibrary_entry_version
+from .archlab_core.profile import profile_phase
+from .archlab_utils import clear_mesh, copy_mesh_materials
+
+# Objects waiting for regeneration, object pointer: (object name,
+# regenerate function), renamed objects are still found by the pointer
+regeneration_queue = {}
+
+# Depth of nested suspended_regeneration blocks
+regeneration_suspended = 0
+
+# Mesh data generated during the current flush, (generate, args): data
+regeneration_batch = None
+
+# Mesh data built ahead of the next flush (e.g. by worker processes)
+regeneration_prebuilt = {}
+
+# Meshes left without users during the current flush, removed together
+regeneration_orphans = []
+
+# Registered generators, generator property name: dict of callbacks
+archlab_generators = {}
+
+# Meshes shared by objects with equal parameters, fingerprint: mesh name
+shared_meshes = {}
+
+# Generator parameters not affecting the mesh data
+fingerprint_ignored = {'material_color', 'material_roughness'}
+
+# Default delay between the first change and the rebuild, in seconds
+regeneration_latency = 1.0 / 60.0
+
+
+# --------------------------------------------------------------------
+# Gets regeneration latency from the addon preferences
+# --------------------------------------------------------------------
+def get_regeneration_latency():
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is not None and addon.preferences is not None:
+        return addon.preferences.regeneration_latency
+    return regeneration_latency
+
+
+# --------------------------------------------------------------------
+# Gets object owning the property group (None for operator properties)
+# Selection and active object are never used, so drivers, animation
+# and background scripts rebuild the right object
+# --------------------------------------------------------------------
+def get_owner_object(props):
+    owner = getattr(props, 'id_data', None)
+    if isinstance(owner, bpy.types.Object):
+        return owner
+    return None
+
+
+# --------------------------------------------------------------------
+# Marks object dirty, it is rebuilt once on the next timer tick
+# regenerate - function rebuilding the object, takes the object
+# --------------------------------------------------------------------
+def schedule_regeneration(myobject, regenerate):
+    if myobject is None:
+        return
+    regeneration_queue[myobject.as_pointer()] = (myobject.name, regenerate)
+    if regeneration_suspended > 0:
+        # Rebuilt when the outermost suspended block exits
+        return
+    if bpy.app.background:
+        # Timers do not run without the user interface
+        flush_regeneration()
+    elif not bpy.app.timers.is_registered(regeneration_timer):
+        bpy.app.timers.register(
+            regeneration_timer,
+            first_interval=get_regeneration_latency()
+        )
+
+
+# --------------------------------------------------------------------
+# Gets queued object by its pointer, None when the object was removed
+# The name is tried first, objects renamed since are looked up in the file
+# objects - objects by name, bpy.data.objects.get searches the whole list
+# --------------------------------------------------------------------
+def get_queued_object(pointer, objname, objects=None):
+    if objects is not None:
+        myobject = objects.get(objname)
+    else:
+        myobject = bpy.data.objects.get(objname)
+    if myobject is not None and myobject.as_pointer() == pointer:
+        return myobject
+    for myobject in bpy.data.objects:
+        if myobject.as_pointer() == pointer:
+            return myobject
+    return None
+
+
+# --------------------------------------------------------------------
+# Rebuilds all dirty objects, the latest parameters are always used
+# --------------------------------------------------------------------
+def flush_regeneration():
+    global regeneration_batch
+    if regeneration_batch is not None:
+        # Already flushing, queued objects are visited by the outer loop
+        return
+    regeneration_batch = dict(regeneration_prebuilt)
+    regeneration_prebuilt.clear()
+    objects = None
+    if len(regeneration_queue) > 1:
+        objects = {myobject.name: myobject for myobject in bpy.data.objects}
+    try:
+        while regeneration_queue:
+            pointer = next(iter(regeneration_queue))
+            (objname, regenerate) = regeneration_queue.pop(pointer)
+            myobject = get_queued_object(pointer, objname, objects)
+            if myobject is not None:
+                with profile_phase('regenerate', myobject.name):
+                    regenerate(myobject)
+    finally:
+        regeneration_batch = None
+        remove_orphan_meshes()
+
+
+# --------------------------------------------------------------------
+# Removes mesh left without users by a rebuild, during a flush meshes
+# are removed together, every removal scans all datablocks of the file
+# --------------------------------------------------------------------
+def remove_unused_mesh(mymesh):
+    if regeneration_batch is None:
+        bpy.data.meshes.remove(mymesh)
+    else:
+        # its name is free for the mesh replacing it
+        mymesh.name = "temp"
+        regeneration_orphans.append(mymesh)
+
+
+# --------------------------------------------------------------------
+# Removes meshes collected by the flush, unless linked again since
+# --------------------------------------------------------------------
+def remove_orphan_meshes():
+    orphans = {mymesh.as_pointer(): mymesh for mymesh in regeneration_orphans if mymesh.users == 0}
+    regeneration_orphans.clear()
+    if not orphans:
+        return
+    # batch_remove scans the file once for all meshes
+    if hasattr(bpy.data, 'batch_remove'):
+        bpy.data.batch_remove(list(orphans.values()))
+    else:
+        for mymesh in orphans.values():
+            bpy.data.meshes.remove(mymesh)
+
+
+# --------------------------------------------------------------------
+# Generates mesh data, identical parameters in a batch are generated once
+# generate - function returning (vertices, edges, faces) for args
+# --------------------------------------------------------------------
+def batched_mesh_data(generate, *args):
+    if regeneration_batch is None:
+        return generate(*args)
+    key = (generate, args)
+    mesh_data = regeneration_batch.get(key)
+    if mesh_data is None:
+        mesh_data = generate(*args)
+        regeneration_batch[key] = mesh_data
+    return mesh_data
+
+
+# --------------------------------------------------------------------
+# Adds mesh data built ahead, used by the next flush instead of generating
+# mesh_data - dict (generate, args): data, keys as in batched_mesh_data
+# --------------------------------------------------------------------
+def prebuild_mesh_data(mesh_data):
+    regeneration_prebuilt.update(mesh_data)
+
+
+# --------------------------------------------------------------------
+# Registers generator callbacks under the generator property name
+# regenerate - function rebuilding the object, takes the object
+# mesh_args - function giving the core mesh builder arguments, takes
+#             the generator properties
+# --------------------------------------------------------------------
+def register_generator(name, **callbacks):
+    archlab_generators[name] = callbacks
+
+
+# --------------------------------------------------------------------
+# Gets hashable fingerprint of generator parameters
+# Equal fingerprints always give equal mesh data
+# --------------------------------------------------------------------
+def generator_fingerprint(props):
+    fingerprint = []
+    for prop in props.bl_rna.properties:
+        propname = prop.identifier
+        if propname in ('rna_type', 'name') or prop.type == 'POINTER':
+            continue
+        if propname in fingerprint_ignored:
+            continue
+        if prop.type == 'COLLECTION':
+            value = tuple(generator_fingerprint(item) for item in getattr(props, propname))
+        elif getattr(prop, 'is_array', False):
+            value = tuple(getattr(props, propname))
+        else:
+            value = getattr(props, propname)
+        fingerprint.append((propname, value))
+    return tuple(fingerprint)
+
+
+# --------------------------------------------------------------------
+# Gets mesh fingerprint of the object generator
+# Parameters, mesh library entry version and addon version are hashed
+# --------------------------------------------------------------------
+def get_mesh_fingerprint(myobject, genname):
+    with profile_phase('fingerprint'):
+        props = getattr(myobject, genname)[0]
+        library_mesh = archlab_generators[genname].get('library_mesh')
+        library_version = None
+        if library_mesh is not None:
+            library_version = get_meshlibrary_entry_version(library_mesh(props))
+        addon = sys.modules.get(__package__)
+        addon_version = getattr(addon, 'bl_info', {}).get('version')
+        data = repr((genname, generator_fingerprint(props), library_version, addon_version))
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+# --------------------------------------------------------------------
+# Links mesh shared by objects with equal parameters
+# Returns the linked mesh, or None when no such mesh exists
+# --------------------------------------------------------------------
+def link_shared_mesh(myobject, genname):
+    fingerprint = get_mesh_fingerprint(myobject, genname)
+    mymesh = bpy.data.meshes.get(shared_meshes.get(fingerprint, ''))
+    if mymesh is None or mymesh.get('archlab_fingerprint') != fingerprint:
+        return None
+    if myobject.data != mymesh:
+        myobject.data = mymesh
+    reconcile = archlab_generators[genname].get('reconcile')
+    if reconcile is not None:
+        reconcile(myobject)
+    return mymesh
+
+
+# --------------------------------------------------------------------
+# Shares object mesh with objects getting equal parameters later
+# --------------------------------------------------------------------
+def share_mesh(myobject, genname):
+    fingerprint = get_mesh_fingerprint(myobject, genname)
+    myobject.data['archlab_fingerprint'] = fingerprint
+    shared_meshes[fingerprint] = myobject.data.name
+
+
+# --------------------------------------------------------------------
+# Gets mesh the object is shaped into, its own mesh is cleared when no
+# other object uses it, otherwise a new mesh gets its materials
+# Removing the old mesh scans every datablock of the file (31 ms with
+# 50k objects), the reused mesh keeps rebuilds independent of it
+# --------------------------------------------------------------------
+def get_rebuild_mesh(myobject):
+    mymesh = myobject.data
+    if mymesh.users == 1 and mymesh.library is None:
+        # objects getting the old parameters must not link the cleared mesh
+        if 'archlab_fingerprint' in mymesh:
+            del mymesh['archlab_fingerprint']
+        clear_mesh(mymesh)
+        return mymesh
+    tmp_mesh = bpy.data.meshes.new("temp")
+    copy_mesh_materials(mymesh, tmp_mesh)
+    return tmp_mesh
+
+
+# --------------------------------------------------------------------
+# Indexes shared meshes stored in the file
+# --------------------------------------------------------------------
+def index_shared_meshes():
+    shared_meshes.clear()
+    for mymesh in bpy.data.meshes:
+        fingerprint = mymesh.get('archlab_fingerprint')
+        if fingerprint is not None:
+            shared_meshes[fingerprint] = mymesh.name
+
+
+# --------------------------------------------------------------------
+# Copies generator parameters, only changed values are written
+# --------------------------------------------------------------------
+def copy_generator_properties(source, target):
+    for prop in source.bl_rna.properties:
+        propname = prop.identifier
+        if propname in ('rna_type', 'name') or prop.type == 'POINTER':
+            continue
+        if prop.type == 'COLLECTION':
+            sourceitems = getattr(source, propname)
+            targetitems = getattr(target, propname)
+            while len(targetitems) > len(sourceitems):
+                targetitems.remove(len(targetitems) - 1)
+            while len(targetitems) < len(sourceitems):
+                targetitems.add()
+            for (sourceitem, targetitem) in zip(sourceitems, targetitems):
+                copy_generator_properties(sourceitem, targetitem)
+        elif not prop.is_readonly:
+            value = getattr(source, propname)
+            if getattr(prop, 'is_array', False):
+                value = tuple(value)
+                if tuple(getattr(target, propname)) != value:
+                    setattr(target, propname, value)
+            elif getattr(target, propname) != value:
+                setattr(target, propname, value)
+
+
+# --------------------------------------------------------------------
+# Suspends regeneration for bulk parameter writes
+# Dirty objects are rebuilt once, when the outermost block exits
+# --------------------------------------------------------------------
+@contextmanager
+def suspended_regeneration():
+    global regeneration_suspended
+    regeneration_suspended += 1
+    try:
+        yield
+    finally:
+        regeneration_suspended -= 1
+        if regeneration_suspended == 0:
+            flush_regeneration()
+
+
+# ------------------------------------------------------------------
+# Define operator class to apply generator parameters to selection
+# Every selected object is rebuilt once, in a single batch
+# ------------------------------------------------------------------
+class ArchLabApplyToSelected(Operator):
+    bl_idname = "object.archlab_apply_to_selected"
+    bl_label = "Apply to Selected"
+    bl_description = "Copy generator parameters of the active object to all selected objects"
+    bl_category = 'ArchLab'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    generator = StringProperty(options={'HIDDEN'})
+
+    # -----------------------------------------------------
+    # Verify if available
+    # -----------------------------------------------------
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and context.active_object is not None
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        callbacks = archlab_generators.get(self.generator)
+        o = context.active_object
+        if callbacks is None or self.generator not in o:
+            self.report({'WARNING'}, "ArchLab: Active object has no such generator")
+            return {'CANCELLED'}
+        source = getattr(o, self.generator)[0]
+        with suspended_regeneration():
+            for myobject in context.selected_objects:
+                if myobject == o or self.generator not in myobject:
+                    continue
+                copy_generator_properties(source, getattr(myobject, self.generator)[0])
+                schedule_regeneration(myobject, callbacks['regenerate'])
+        return {'FINISHED'}
+
+
+# --------------------------------------------------------------------
+# Timer callback, runs once per scheduled burst of changes
+# --------------------------------------------------------------------
+def regeneration_timer():
+    flush_regeneration()
+    return None
+
+
+# --------------------------------------------------------------------
+# Drops pending rebuilds, objects of the previous file are gone
+# --------------------------------------------------------------------
+@persistent
+def regeneration_load_pre(*args):
+    regeneration_queue.clear()
+    shared_meshes.clear()
+
+
+# --------------------------------------------------------------------
+# Indexes shared meshes, after load and undo mesh names may differ
+# --------------------------------------------------------------------
+@persistent
+def regeneration_load_post(*args):
+    index_shared_meshes()
+
+
+# --------------------------------------------------------------------
+# Register regeneration handlers
+# --------------------------------------------------------------------
+def register_regeneration():
+    bpy.app.handlers.load_pre.append(regeneration_load_pre)
+    bpy.app.handlers.load_post.append(regeneration_load_post)
+    bpy.app.handlers.undo_post.append(regeneration_load_post)
+    bpy.app.handlers.redo_post.append(regeneration_load_post)
+
+
+# --------------------------------------------------------------------
+# Unregister regeneration handlers, pending rebuilds are applied
+# --------------------------------------------------------------------
+def unregister_regeneration():
+    if bpy.app.timers.is_registered(regeneration_timer):
+        bpy.app.timers.unregister(regeneration_timer)
+    flush_regeneration()
+    if regeneration_load_pre in bpy.app.handlers.load_pre:
+        bpy.app.handlers.load_pre.remove(regeneration_load_pre)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if regeneration_load_post in handlers:
+            handlers.remove(regeneration_load_post)
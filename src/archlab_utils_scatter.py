@@ -0,0 +1,325 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+import bpy
+import numpy as np
+from bpy.types import Operator
+from bpy.props import EnumProperty, IntProperty, FloatProperty, StringProperty
+from .archlab_utils import *
+from .archlab_utils_regeneration import *
+
+# Edge length of the instancer triangles, small enough to stay hidden
+scatter_face_size = 0.001
+
+
+# --------------------------------------------------------------------
+# Gets grid placements, positions (N x 3) and headings (N) in radians
+# --------------------------------------------------------------------
+def grid_placements(count_x, count_y, spacing_x, spacing_y):
+    (grid_x, grid_y) = np.meshgrid(
+        np.arange(count_x) * spacing_x,
+        np.arange(count_y) * spacing_y
+    )
+    positions = np.zeros((count_x * count_y, 3))
+    positions[:, 0] = grid_x.ravel()
+    positions[:, 1] = grid_y.ravel()
+    headings = np.zeros(count_x * count_y)
+    return positions, headings
+
+
+# --------------------------------------------------------------------
+# Gets placements evenly spaced along segments (M x 2 x 3), segments
+# need not be connected (e.g. edges of several curve splines)
+# Instances are turned along the segment direction
+# Segments must have some length, see has_segment_length
+# --------------------------------------------------------------------
+def segment_placements(segments, count):
+    vectors = segments[:, 1] - segments[:, 0]
+    lengths = np.linalg.norm(vectors, axis=1)
+    distances = np.concatenate(([0.0], np.cumsum(lengths)))
+    samples = np.linspace(0.0, distances[-1], count)
+    indices = np.clip(np.searchsorted(distances, samples, side='right') - 1, 0, len(segments) - 1)
+    factors = (samples - distances[indices]) / np.maximum(lengths[indices], 1e-12)
+    positions = segments[indices, 0] + vectors[indices] * np.minimum(factors, 1.0)[:, None]
+    headings = np.arctan2(vectors[indices, 1], vectors[indices, 0])
+    return positions, headings
+
+
+# --------------------------------------------------------------------
+# Verifies if segments (M x 2 x 3) can take placements
+# --------------------------------------------------------------------
+def has_segment_length(segments):
+    return len(segments) > 0 and np.linalg.norm(segments[:, 1] - segments[:, 0], axis=1).sum() > 0.0
+
+
+# --------------------------------------------------------------------
+# Gets placements along inner faces of room walls
+# walls - list of (width, depth, angle), as used by the room generator
+# offset - distance from the inner wall face
+# Instances are turned to face the room inside
+# --------------------------------------------------------------------
+def room_placements(walls, spacing, offset):
+    walls = np.asarray(walls, dtype=float).reshape(-1, 3)
+    angles = np.cumsum(walls[:, 2])
+    directions = np.stack([np.cos(angles), np.sin(angles), np.zeros(len(walls))], axis=1)
+    normals = np.stack([-directions[:, 1], directions[:, 0], np.zeros(len(walls))], axis=1)
+    starts = np.concatenate(([[0.0, 0.0, 0.0]], np.cumsum(directions[:-1] * walls[:-1, 0:1], axis=0)))
+    counts = np.maximum(np.floor(walls[:, 0] / spacing).astype(int), 0)
+    wallindices = np.repeat(np.arange(len(walls)), counts)
+    # instances are centered in equal slots of every wall
+    slots = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    along = (slots + 0.5) * (walls[wallindices, 0] / counts[wallindices])
+    inside = walls[wallindices, 1] / 2 + offset
+    positions = starts[wallindices] + directions[wallindices] * along[:, None] + \
+        normals[wallindices] * inside[:, None]
+    headings = angles[wallindices] + np.pi / 2
+    return positions, headings
+
+
+# --------------------------------------------------------------------
+# Gets segments (M x 2 x 3) of curve object, in world space
+# Every spline is sampled on its own (edges of the evaluated curve), so
+# nothing is placed between splines and cyclic splines stay closed
+# --------------------------------------------------------------------
+def get_curve_segments(mycurve):
+    mymesh = mycurve.to_mesh()
+    points = np.empty(len(mymesh.vertices) * 3)
+    mymesh.vertices.foreach_get("co", points)
+    edges = np.empty(len(mymesh.edges) * 2, dtype=np.int32)
+    mymesh.edges.foreach_get("vertices", edges)
+    mycurve.to_mesh_clear()
+    points = transform_points(points.reshape(-1, 3), mycurve.matrix_world)
+    return points[edges.reshape(-1, 2)]
+
+
+# --------------------------------------------------------------------
+# Transforms points (N x 3) with 4x4 matrix
+# --------------------------------------------------------------------
+def transform_points(points, matrix):
+    matrix = np.array(matrix)
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+# --------------------------------------------------------------------
+# Writes instancer mesh, one small triangle per placement
+# Face instancing uses the triangle center and orientation, so the
+# first edge of every triangle points along the heading
+# --------------------------------------------------------------------
+def write_instancer_mesh(mymesh, positions, headings, size=scatter_face_size):
+    count = len(positions)
+    forward = np.stack([np.cos(headings), np.sin(headings), np.zeros(count)], axis=1) * size
+    side = np.stack([-forward[:, 1], forward[:, 0], np.zeros(count)], axis=1)
+    corner = positions - (forward + side) / 3.0
+    vertices = np.stack([corner, corner + forward, corner + side], axis=1)
+    mymesh.vertices.add(count * 3)
+    mymesh.vertices.foreach_set("co", vertices.ravel())
+    mymesh.loops.add(count * 3)
+    mymesh.loops.foreach_set("vertex_index", np.arange(count * 3, dtype=np.int32))
+    mymesh.polygons.add(count)
+    mymesh.polygons.foreach_set("loop_start", np.arange(0, count * 3, 3, dtype=np.int32))
+    if not bpy.types.MeshPolygon.bl_rna.properties['loop_total'].is_readonly:
+        mymesh.polygons.foreach_set("loop_total", np.full(count, 3, dtype=np.int32))
+    mymesh.update(calc_edges=True)
+
+
+# --------------------------------------------------------------------
+# Gets generator property name of the object, or None
+# --------------------------------------------------------------------
+def get_object_generator(myobject):
+    for genname in archlab_generators:
+        if genname in myobject:
+            return genname
+    return None
+
+
+# ------------------------------------------------------------------------------
+# Create instancer of the source object, all instances share one mesh.
+# ------------------------------------------------------------------------------
+def create_scatter(self, context, source):
+    if self.scatter_mode == 'GRID':
+        (positions, headings) = grid_placements(
+            self.scatter_count_x, self.scatter_count_y,
+            self.scatter_spacing_x, self.scatter_spacing_y)
+        matrix = source.matrix_world
+    elif self.scatter_mode == 'CURVE':
+        mycurve = bpy.data.objects[self.scatter_target]
+        (positions, headings) = segment_placements(
+            get_curve_segments(mycurve), self.scatter_count)
+        matrix = None
+    else:
+        myroom = bpy.data.objects[self.scatter_target]
+        rp = myroom.ArchLabRoomGenerator[0]  # "rp" means "room properties".
+        walls = [(w.wall_width, w.wall_depth, w.wall_angle) for w in rp.room_walls]
+        (positions, headings) = room_placements(
+            walls, self.scatter_spacing_x, self.scatter_offset)
+        matrix = myroom.matrix_world
+
+    # we create the instancer, placements are stored in its mesh
+    scattermesh = bpy.data.meshes.new(source.name + " Scatter")
+    write_instancer_mesh(scattermesh, positions, headings)
+    scatterobject = bpy.data.objects.new(source.name + " Scatter", scattermesh)
+    if matrix is not None:
+        scatterobject.matrix_world = matrix
+    scatterobject.instance_type = 'FACES'
+    scatterobject.show_instancer_for_viewport = False
+    scatterobject.show_instancer_for_render = False
+    context.collection.objects.link(scatterobject)
+
+    # the instanced object is a copy of the source, sharing its mesh
+    instanceobject = source.copy()
+    instanceobject.parent = scatterobject
+    instanceobject.matrix_parent_inverse.identity()
+    instanceobject.location = (0.0, 0.0, 0.0)
+    instanceobject.rotation_euler = (0.0, 0.0, 0.0)
+    context.collection.objects.link(instanceobject)
+
+    # we select, and activate, the instancer.
+    deselect_all(context)
+    scatterobject.select_set(True)
+    context.view_layer.objects.active = scatterobject
+    return len(positions)
+
+
+# ------------------------------------------------------------------
+# Define operator class to scatter instances of ArchLab objects
+# ------------------------------------------------------------------
+class ArchLabScatter(Operator):
+    bl_idname = "object.archlab_scatter"
+    bl_label = "Scatter Instances"
+    bl_description = "Place instances of the active ArchLab object on a grid, a curve or along room walls"
+    bl_category = 'ArchLab'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    scatter_mode = EnumProperty(
+        items=(
+            ('GRID', 'Grid', 'Place instances on a grid'),
+            ('CURVE', 'Curve', 'Place instances along a curve'),
+            ('ROOM', 'Room', 'Place instances along inner faces of room walls'),
+        ),
+        name='Mode',
+        default='GRID',
+        description='Placement of instances',
+    )
+    scatter_target = StringProperty(
+        name='Target',
+        description='Curve or room object used for placement',
+    )
+    scatter_count = IntProperty(
+        name='Count',
+        min=1, soft_max=10000,
+        default=10,
+        description='Amount of instances along the curve',
+    )
+    scatter_count_x = IntProperty(
+        name='Count X',
+        min=1, soft_max=1000,
+        default=10,
+        description='Amount of instances along X axis',
+    )
+    scatter_count_y = IntProperty(
+        name='Count Y',
+        min=1, soft_max=1000,
+        default=10,
+        description='Amount of instances along Y axis',
+    )
+    scatter_spacing_x = FloatProperty(
+        name='Spacing X',
+        min=0.001,
+        default=1.0, precision=3, unit='LENGTH',
+        description='Distance between instances along X axis, or along walls',
+    )
+    scatter_spacing_y = FloatProperty(
+        name='Spacing Y',
+        min=0.001,
+        default=1.0, precision=3, unit='LENGTH',
+        description='Distance between instances along Y axis',
+    )
+    scatter_offset = FloatProperty(
+        name='Wall Offset',
+        default=0.3, precision=3, unit='LENGTH',
+        description='Distance of instances from the inner wall face',
+    )
+
+    # -----------------------------------------------------
+    # Verify if available
+    # -----------------------------------------------------
+    @classmethod
+    def poll(cls, context):
+        o = context.active_object
+        return context.mode == 'OBJECT' and o is not None and \
+            get_object_generator(o) is not None
+
+    # -----------------------------------------------------
+    # Draw (create UI interface)
+    # -----------------------------------------------------
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row()
+        row.prop(self, 'scatter_mode')
+        if self.scatter_mode == 'GRID':
+            row = layout.row()
+            row.prop(self, 'scatter_count_x')
+            row.prop(self, 'scatter_count_y')
+            row = layout.row()
+            row.prop(self, 'scatter_spacing_x')
+            row.prop(self, 'scatter_spacing_y')
+        else:
+            row = layout.row()
+            row.prop_search(self, 'scatter_target', bpy.data, 'objects')
+            if self.scatter_mode == 'CURVE':
+                row = layout.row()
+                row.prop(self, 'scatter_count')
+            else:
+                row = layout.row()
+                row.prop(self, 'scatter_spacing_x', text='Spacing')
+                row = layout.row()
+                row.prop(self, 'scatter_offset')
+
+    # -----------------------------------------------------
+    # Execute
+    # -----------------------------------------------------
+    def execute(self, context):
+        if self.scatter_mode != 'GRID':
+            target = bpy.data.objects.get(self.scatter_target)
+            if target is None:
+                self.report({'WARNING'}, "ArchLab: Select a target object")
+                return {'CANCELLED'}
+            if self.scatter_mode == 'CURVE' and target.type != 'CURVE':
+                self.report({'WARNING'}, "ArchLab: Target is not a curve")
+                return {'CANCELLED'}
+            if self.scatter_mode == 'CURVE' and not has_segment_length(get_curve_segments(target)):
+                self.report({'ERROR'}, "ArchLab: Target curve has no length")
+                return {'CANCELLED'}
+            if self.scatter_mode == 'ROOM' and 'ArchLabRoomGenerator' not in target:
+                self.report({'WARNING'}, "ArchLab: Target is not an ArchLab room")
+                return {'CANCELLED'}
+        count = create_scatter(self, context, context.active_object)
+        self.report({'INFO'}, "ArchLab: Placed %i instances" % count)
+        return {'FINISHED'}
@@ -0,0 +1,127 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Object build tests, they need Blender (bpy) and are skipped without it.
+# Run: blender --background --python-expr
+#      "import pytest; pytest.main(['tests'])"
+# ----------------------------------------------------------
+import importlib
+import sys
+from os import path
+
+import pytest
+
+bpy = pytest.importorskip("bpy")
+
+
+# --------------------------------------------------------------------
+# Imports addon package from the repository source folder
+# --------------------------------------------------------------------
+def import_addon():
+    repo_dir = path.dirname(path.dirname(path.realpath(__file__)))
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+    return importlib.import_module("src")
+
+
+# --------------------------------------------------------------------
+# Plate kind and a custom diameter give the same plate in any key order
+# --------------------------------------------------------------------
+@pytest.mark.parametrize("params", [
+    {"plate_diameter": 0.3, "plate_type": "DinnerPlate01"},
+    {"plate_type": "DinnerPlate01", "plate_diameter": 0.3},
+])
+def test_plate_spec_kind_with_diameter(params):
+    build = import_addon().archlab_utils_build
+    plate = build.build_object("plate", params)
+    pp = plate.ArchLabPlateGenerator[0]
+    assert pp.plate_type == 'DinnerPlate01'
+    assert pp.plate_diameter == pytest.approx(0.3)
+    # the height is not given, the kind preset is kept
+    assert pp.plate_height == pytest.approx(0.02)
+    xs = [v.co.x for v in plate.data.vertices]
+    assert max(xs) - min(xs) == pytest.approx(0.3, abs=1e-4)
+
+
+# --------------------------------------------------------------------
+# Gets width of the object mesh along X
+# --------------------------------------------------------------------
+def get_mesh_width(myobject):
+    xs = [v.co.x for v in myobject.data.vertices]
+    return max(xs) - min(xs)
+
+
+# --------------------------------------------------------------------
+# Mesh used only by the object is rebuilt in place, mesh shared with
+# another object is left to it (copy on write)
+# --------------------------------------------------------------------
+def test_rebuild_mesh_reuse():
+    build = import_addon().archlab_utils_build
+    first = build.build_object("cube", {"cube_width": 1.25})
+    second = build.build_object("cube", {"cube_width": 1.25})
+    assert first.data == second.data
+    meshes = len(bpy.data.meshes)
+
+    second.ArchLabCubeGenerator[0].cube_width = 2.5
+    assert first.data != second.data
+    assert get_mesh_width(first) == pytest.approx(1.25)
+    assert get_mesh_width(second) == pytest.approx(2.5)
+
+    ownmesh = second.data
+    second.ArchLabCubeGenerator[0].cube_width = 3.5
+    assert second.data == ownmesh
+    assert get_mesh_width(second) == pytest.approx(3.5)
+    assert len(bpy.data.meshes) == meshes + 1
+
+    # back to the shared parameters, the own mesh is removed
+    second.ArchLabCubeGenerator[0].cube_width = 1.25
+    assert first.data == second.data
+    assert len(bpy.data.meshes) == meshes
+
+
+# --------------------------------------------------------------------
+# Duplicates are merged into the registry material, a material of an
+# old file without the variation nodes is never kept
+# --------------------------------------------------------------------
+def test_dedupe_materials_keeps_variation():
+    materials = import_addon().archlab_utils_material_data
+    definition = materials.ceramic_material_data
+    bpy.ops.wm.read_homefile(use_empty=True)
+    oldmat = materials.create_definition_material(dict(definition, variation=False))
+    newmat = materials.get_registry_material(definition)
+    cube = bpy.data.objects.new("Cube", bpy.data.meshes.new("Cube"))
+    cube.data.materials.append(oldmat)
+    # registry is empty after the file is loaded again
+    materials.material_registry.clear()
+
+    assert materials.dedupe_materials() == 1
+    assert cube.data.materials[0] == newmat
+    assert [node for node in newmat.node_tree.nodes if node.type == 'OBJECT_INFO']
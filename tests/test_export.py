@@ -0,0 +1,140 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+# MIT License
+#
+# Copyright (c) 2018-2019 Maciej Klemarczyk, Trogon Studios
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ##### END MIT LICENSE BLOCK #####
+
+# ----------------------------------------------------------
+# Author: Maciej Klemarczyk (github: mklemarczyk)
+# Publisher: Trogon Studios (github: trogon)
+# ----------------------------------------------------------
+
+
+# ----------------------------------------------------------
+# Exporter tests of the geometry core, they run without Blender.
+# Run: python -m pytest tests
+# ----------------------------------------------------------
+import json
+import struct
+import sys
+from os import path
+
+import numpy as np
+
+
+# --------------------------------------------------------------------
+# Imports geometry core from the repository source folder
+# --------------------------------------------------------------------
+def import_core():
+    src_dir = path.join(path.dirname(path.dirname(path.realpath(__file__))), "src")
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    import archlab_core
+    return archlab_core
+
+
+# --------------------------------------------------------------------
+# Meshes without faces get zero vertex normals
+# --------------------------------------------------------------------
+def test_vertex_normals_without_faces():
+    archlab_core = import_core()
+    coords = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+    normals = archlab_core.calc_packed_vertex_normals(
+        coords, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+    assert normals.dtype.kind == 'f'
+    assert np.array_equal(normals, np.zeros((2, 3)))
+
+
+# --------------------------------------------------------------------
+# Smooth normals OBJ export of an edges only mesh (circle without fill)
+# --------------------------------------------------------------------
+def test_obj_smooth_edges_only(tmp_path):
+    archlab_core = import_core()
+    filepath = str(tmp_path / "circle.obj")
+    objects = [
+        ("Circle", ("circle", 1.0, 8, 'NONE', 0.0), None),
+        ("Circle.001", ("circle", 1.0, 8, 'NONE', 0.0), None),
+    ]
+    archlab_core.write_obj(filepath, objects, normals='SMOOTH')
+    records = [line.split() for line in open(filepath)]
+    lines = [r for r in records if r[0] == 'l']
+    assert len([r for r in records if r[0] == 'v']) == 16
+    assert len(lines) == 16
+    # the second object indexes its own vertices
+    assert lines[8] == ['l', '9', '10']
+    assert not [r for r in records if r[0] == 'f']
+
+
+# --------------------------------------------------------------------
+# Reads JSON and BIN chunks of a binary glTF file
+# --------------------------------------------------------------------
+def read_glb(filepath):
+    data = open(filepath, 'rb').read()
+    (json_length,) = struct.unpack_from('<I', data, 12)
+    gltf = json.loads(data[20:20 + json_length].decode('utf-8'))
+    return gltf, data[20 + json_length + 8:]
+
+
+# --------------------------------------------------------------------
+# glTF is Y up: the cube height (Blender Z) goes to Y, depth (Blender Y)
+# goes to -Z, node and instance translations are converted the same way
+# --------------------------------------------------------------------
+def test_glb_y_up(tmp_path):
+    archlab_core = import_core()
+    filepath = str(tmp_path / "cube.glb")
+    cube = ("cube", 1.0, 2.0, 4.0)
+    moved = archlab_core.get_transform_matrix(location=(1.0, 2.0, 3.0))
+    objects = [
+        ("Cube", cube, moved),
+        ("Cube.001", cube, moved),
+        ("Box", ("cube", 1.0, 2.0, 6.0), moved),
+    ]
+    archlab_core.write_glb(filepath, objects)
+    (gltf, binary) = read_glb(filepath)
+    position = gltf['accessors'][gltf['meshes'][0]['primitives'][0]['attributes']['POSITION']]
+    assert np.allclose(position['min'], [-0.5, -1.0, -2.0])
+    assert np.allclose(position['max'], [0.5, 1.0, 2.0])
+
+    instances = gltf['nodes'][0]['extensions']['EXT_mesh_gpu_instancing']['attributes']
+    accessor = gltf['accessors'][instances['TRANSLATION']]
+    view = gltf['bufferViews'][accessor['bufferView']]
+    translations = np.frombuffer(binary, np.float32, 6, view['byteOffset']).reshape(-1, 3)
+    assert np.allclose(translations, [[1.0, 3.0, -2.0], [1.0, 3.0, -2.0]])
+    assert np.allclose(gltf['nodes'][1]['translation'], [1.0, 3.0, -2.0])
+    assert np.allclose(gltf['nodes'][1]['rotation'], [0.0, 0.0, 0.0, 1.0])
+
+
+# --------------------------------------------------------------------
+# Quantization bounds are taken in glTF axes, the dequantized top of an
+# off-center mesh ends at its Blender Z
+# --------------------------------------------------------------------
+def test_glb_quantized_y_up(tmp_path):
+    archlab_core = import_core()
+    filepath = str(tmp_path / "cube.glb")
+    offset = archlab_core.get_transform_matrix(location=(0.0, 0.0, 1.0))
+    archlab_core.write_glb(filepath, [("Cube", ("cube", 1.0, 2.0, 4.0), offset)], quantize=True)
+    (gltf, binary) = read_glb(filepath)
+    node = gltf['nodes'][0]
+    position = gltf['accessors'][gltf['meshes'][0]['primitives'][0]['attributes']['POSITION']]
+    high = np.array(position['max']) * node['scale'] + node['translation']
+    low = np.array(position['min']) * node['scale'] + node['translation']
+    assert np.allclose(high, [0.5, 2.0, 2.0], atol=1e-3)
+    assert np.allclose(low, [-0.5, 0.0, -2.0], atol=1e-3)